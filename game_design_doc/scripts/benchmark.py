@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+脚本性能基准测试
+
+生成指定规模的合成文档（段落、含合并单元格的表格、嵌入图片的 .docx；多工作表的 .xlsx；
+Markdown），然后分别计时 read_docx、read_docx_enhanced、read_excel、
+MarkdownToDocx.convert 和 GameDocGenerator.generate。
+
+每个测试项在单独的子进程中运行，记录耗时、峰值内存（RSS）和每秒处理项数，
+结果保存为 JSON，可与上一次的结果比较，发现性能退化。
+
+用法:
+    python benchmark.py [--paragraphs N] [--tables N] [--rows R] [--cols C] [--images N]
+                        [--sheets N] [--sheet-rows R] [--sheet-cols C] [--md-sections N] [--docs N]
+                        [--repeat N] [--only 名称...] [--output results.json] [--compare 上次结果.json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 测试项：名称 -> 使用的合成文件
+CASES = {
+    "read_docx": "docx",
+    "read_docx_stream": "docx",
+    "read_docx_enhanced": "docx",
+    "read_docx_enhanced_stream": "docx",
+    "read_excel": "xlsx",
+    "read_excel_stream": "xlsx",
+    "convert_md": "md",
+    "generate_doc": None,
+}
+
+WORDS = ("攻击", "防御", "生命", "冷却", "技能", "道具", "建筑", "升级", "奖励", "活动",
+         "任务", "等级", "配置", "数值", "效果", "持续", "时间", "消耗", "解锁", "条件")
+
+
+def _sentence(rng, words=12):
+    return "".join(rng.choice(WORDS) for _ in range(words)) + "。"
+
+
+# ---------------------------------------------------------------- 合成文档
+
+def make_png(width, height, seed=0):
+    """生成纯色PNG图片的字节（不同 seed 颜色不同，内容不会被去重）"""
+    color = bytes(((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    raw = b"".join(b"\x00" + color * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+def make_docx(path, paragraphs=2000, tables=10, rows=100, cols=6, images=10, seed=1):
+    """
+    生成合成 Word 文档
+
+    每 50 个段落插入一个标题；表格的第2行横向合并前两列、第1列的第3-5行纵向合并；
+    图片均匀分布在段落中。正文直接按 XML 生成，避免 python-docx 逐段插入的开销。
+    """
+    from docx import Document
+    from docx.oxml import OxmlElement, parse_xml
+    from docx.oxml.ns import nsdecls
+    from docx.shared import Inches
+
+    rng = random.Random(seed)
+    doc = Document()
+    body = doc.element.body
+    sectPr = body.sectPr
+    blocks = []
+
+    def paragraph(text, style=None):
+        p = OxmlElement('w:p')
+        if style:
+            p.style = style
+        r = p.add_r()
+        r.text = text
+        return p
+
+    def table(index):
+        cell_w = 9000 // cols
+        grid = "".join(f'<w:gridCol w:w="{cell_w}"/>' for _ in range(cols))
+        trs = []
+        for i in range(rows):
+            tcs = []
+            j = 0
+            while j < cols:
+                props = f'<w:tcW w:w="{cell_w}" w:type="dxa"/>'
+                span = 1
+                if i == 1 and j == 0 and cols > 1:
+                    span = 2
+                    props += '<w:gridSpan w:val="2"/>'
+                elif j == 0 and i in (2, 3, 4):
+                    props += '<w:vMerge w:val="restart"/>' if i == 2 else '<w:vMerge/>'
+                text = f"表{index}-{i}-{j}" if i == 0 else (f"{rng.randint(1, 99999)}" if j else rng.choice(WORDS))
+                if j == 0 and i in (3, 4):
+                    text = ""
+                tcs.append(f'<w:tc><w:tcPr>{props}</w:tcPr><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>')
+                j += span
+            trs.append("<w:tr>" + "".join(tcs) + "</w:tr>")
+        return parse_xml(
+            f'<w:tbl {nsdecls("w")}><w:tblPr><w:tblStyle w:val="TableGrid"/>'
+            f'<w:tblW w:w="0" w:type="auto"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>'
+            + "".join(trs) + "</w:tbl>")
+
+    image_every = paragraphs // images if images else 0
+    table_every = paragraphs // tables if tables else 0
+    image_count = table_count = 0
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            blocks.append(paragraph(f"第{i // 50 + 1}章 {rng.choice(WORDS)}", "Heading1"))
+        p = paragraph(_sentence(rng, rng.randint(8, 30)))
+        if image_every and i % image_every == image_every // 2 and image_count < images:
+            inline = doc.part.new_pic_inline(io.BytesIO(make_png(64, 48, image_count)), width=Inches(1))
+            drawing = OxmlElement('w:drawing')
+            drawing.append(inline)
+            p.add_r().append(drawing)
+            image_count += 1
+        blocks.append(p)
+        if table_every and i % table_every == table_every - 1 and table_count < tables:
+            blocks.append(table(table_count))
+            table_count += 1
+
+    for block in blocks:
+        sectPr.addprevious(block)
+    doc.save(path)
+    return {"paragraphs": paragraphs, "tables": table_count, "rows": rows, "cols": cols, "images": image_count}
+
+
+def make_xlsx(path, sheets=5, rows=10000, cols=15, seed=1):
+    """生成合成工作簿：第一行为表头，各列依次为整数、浮点数、文本、日期"""
+    import openpyxl
+
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    base = datetime(2024, 1, 1)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"sheet_{s}")
+        ws.append(["id"] + [f"field_{j}" for j in range(1, cols)])
+        for i in range(rows - 1):
+            row = [10000 + i]
+            for j in range(1, cols):
+                kind = j % 4
+                if kind == 0:
+                    row.append(rng.randint(0, 100000))
+                elif kind == 1:
+                    row.append(round(rng.random() * 1000, 3))
+                elif kind == 2:
+                    row.append(rng.choice(WORDS) + str(rng.randint(0, 50)))
+                else:
+                    row.append(base + timedelta(minutes=rng.randint(0, 500000)))
+            ws.append(row)
+    wb.save(path)
+    return {"sheets": sheets, "rows": rows, "cols": cols}
+
+
+def make_markdown(path, sections=200, seed=1):
+    """生成合成 Markdown：每节包含标题、段落、嵌套列表、代码块和表格"""
+    rng = random.Random(seed)
+    lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(sections):
+            block = [
+                f"## 第{i + 1}节 {rng.choice(WORDS)}",
+                f"{_sentence(rng)}其中**{rng.choice(WORDS)}**和*{rng.choice(WORDS)}*需要特别说明。",
+                f"- {_sentence(rng, 6)}",
+                f"  - {_sentence(rng, 4)} **{rng.randint(1, 100)}**",
+                f"1. {_sentence(rng, 5)}",
+                "",
+                "```",
+                f"def rule_{i}(level):",
+                "    return level * 2",
+                "```",
+                "| 字段 | 类型 | 说明 |",
+                "|---|---|---|",
+            ] + [f"| field_{j} | int | {_sentence(rng, 3)} |" for j in range(8)] + [""]
+            f.write("\n".join(block) + "\n")
+            lines += len(block)
+    return {"sections": sections, "lines": lines}
+
+
+# ---------------------------------------------------------------- 测试项（在子进程中执行）
+
+def _peak_rss_kb():
+    """
+    当前进程的峰值内存（KB），不支持的平台返回None
+
+    Linux 上优先读取 /proc/self/status 的 VmHWM：ru_maxrss 在 exec 后会保留父进程的峰值，
+    子进程测得的数值可能是父进程生成合成文档时的内存。
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_case(name, path, workdir, params):
+    """执行一个测试项，返回处理的项数"""
+    sys.path.insert(0, SCRIPT_DIR)
+    if name.startswith("read_docx_enhanced"):
+        from read_docx_enhanced import read_docx_enhanced
+        data = read_docx_enhanced(path, max_paragraphs=10 ** 9, max_tables=10 ** 9,
+                                  engine="stream" if name.endswith("stream") else "docx",
+                                  image_metadata_only=True, table_limit=None)
+        return len(data["content"])
+    if name.startswith("read_docx"):
+        from read_docx import read_docx
+        data = read_docx(path, max_paragraphs=10 ** 9, max_tables=10 ** 9,
+                         engine="stream" if name.endswith("stream") else "docx",
+                         image_metadata_only=True, table_limit=None)
+        return len(data["content"])
+    if name.startswith("read_excel"):
+        from read_xlsx import read_excel
+        data = read_excel(path, max_rows=params["sheet_rows"], max_cols=params["sheet_cols"],
+                          engine="stream" if name.endswith("stream") else "openpyxl")
+        return sum(len(sheet["data"]) for sheet in data["sheets"])
+    if name == "convert_md":
+        from convert_md_v2 import MarkdownToDocx
+        MarkdownToDocx(path, os.path.join(workdir, "convert_md.docx")).convert(quiet=True)
+        with open(path, encoding="utf-8") as f:
+            return sum(1 for _ in f)
+    if name == "generate_doc":
+        from generate_doc import FUNC_TYPES, GameDocGenerator
+        for i in range(params["docs"]):
+            GameDocGenerator(f"功能{i}", FUNC_TYPES[i % len(FUNC_TYPES)],
+                             os.path.join(workdir, "generated", f"doc_{i}.docx")).generate(quiet=True)
+        return params["docs"]
+    raise ValueError(f"未知的测试项: {name}")
+
+
+def _case_main(argv):
+    """子进程入口：benchmark.py _case <名称> <文件> <工作目录> <参数JSON>"""
+    name, path, workdir, params = argv[0], argv[1], argv[2], json.loads(argv[3])
+    start = time.perf_counter()
+    items = _run_case(name, path, workdir, params)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "items": items, "peak_rss_kb": _peak_rss_kb()}))
+    return 0
+
+
+def run_case(name, path, workdir, params, repeat=1):
+    """在子进程中运行测试项 repeat 次，取耗时最短的一次"""
+    env = dict(os.environ, GDD_CACHE_DIR=os.path.join(workdir, "cache"))
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_case", name, path or "", workdir, json.dumps(params)],
+            capture_output=True, text=True, encoding="utf-8", env=env)
+        if proc.returncode != 0:
+            return {"name": name, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    seconds = best["seconds"]
+    return {
+        "name": name,
+        "seconds": round(seconds, 4),
+        "items": best["items"],
+        "items_per_second": round(best["items"] / seconds, 1) if seconds > 0 else None,
+        "peak_rss_kb": best["peak_rss_kb"],
+    }
+
+
+# ---------------------------------------------------------------- 比较与输出
+
+def compare(results, baseline):
+    """与上一次结果比较，返回 [(名称, 上次耗时, 本次耗时, 比值)]"""
+    previous = {r["name"]: r for r in baseline.get("results", []) if "seconds" in r}
+    rows = []
+    for r in results:
+        old = previous.get(r["name"])
+        if old and "seconds" in r and old["seconds"] > 0:
+            rows.append((r["name"], old["seconds"], r["seconds"], r["seconds"] / old["seconds"]))
+    return rows
+
+
+def format_results(report, comparison=None):
+    lines = [f"{'测试项':<28}{'耗时(秒)':>10}{'项数':>10}{'项/秒':>12}{'峰值内存(MB)':>14}"]
+    for r in report["results"]:
+        if "error" in r:
+            lines.append(f"{r['name']:<30}失败: {r['error']}")
+            continue
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r["peak_rss_kb"] else "-"
+        ips = f"{r['items_per_second']:.0f}" if r["items_per_second"] else "-"
+        lines.append(f"{r['name']:<30}{r['seconds']:>10.3f}{r['items']:>10}{ips:>12}{rss:>14}")
+    if comparison:
+        lines.append("")
+        lines.append("与上次结果比较（比值 > 1 表示变慢）：")
+        for name, old, new, ratio in comparison:
+            flag = "  ⚠️" if ratio > 1.1 else ""
+            lines.append(f"  {name:<28}{old:>8.3f} → {new:<8.3f} ×{ratio:.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["_case"]:
+        return _case_main(argv[1:])
+
+    parser = argparse.ArgumentParser(description='文档脚本性能基准测试')
+    parser.add_argument('--paragraphs', type=int, default=3000, help='Word文档段落数（默认3000）')
+    parser.add_argument('--tables', type=int, default=10, help='Word文档表格数（默认10）')
+    parser.add_argument('--rows', type=int, default=200, help='每个表格的行数（默认200）')
+    parser.add_argument('--cols', type=int, default=6, help='每个表格的列数（默认6）')
+    parser.add_argument('--images', type=int, default=20, help='嵌入图片数（默认20）')
+    parser.add_argument('--sheets', type=int, default=5, help='工作表数（默认5）')
+    parser.add_argument('--sheet-rows', type=int, default=5000, help='每个工作表的行数（默认5000）')
+    parser.add_argument('--sheet-cols', type=int, default=15, help='每个工作表的列数（默认15）')
+    parser.add_argument('--md-sections', type=int, default=300, help='Markdown 章节数（默认300）')
+    parser.add_argument('--docs', type=int, default=20, help='generate_doc 生成的文档数（默认20）')
+    parser.add_argument('--repeat', type=int, default=1, help='每项重复次数，取最短耗时（默认1）')
+    parser.add_argument('--only', nargs='+', choices=list(CASES), help='只运行指定的测试项')
+    parser.add_argument('--output', help='结果JSON的保存路径')
+    parser.add_argument('--compare', help='与之前保存的结果JSON比较')
+    parser.add_argument('--keep', help='把合成文档保留在该目录（默认使用临时目录并在结束后删除）')
+    args = parser.parse_args(argv)
+
+    params = {
+        "paragraphs": args.paragraphs, "tables": args.tables, "rows": args.rows, "cols": args.cols,
+        "images": args.images, "sheets": args.sheets, "sheet_rows": args.sheet_rows,
+        "sheet_cols": args.sheet_cols, "md_sections": args.md_sections, "docs": args.docs,
+    }
+    cases = args.only or list(CASES)
+    workdir = os.path.abspath(args.keep) if args.keep else tempfile.mkdtemp(prefix="gdd_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    try:
+        inputs = {}
+        needed = {CASES[name] for name in cases}
+        if "docx" in needed:
+            inputs["docx"] = os.path.join(workdir, "synthetic.docx")
+            make_docx(inputs["docx"], args.paragraphs, args.tables, args.rows, args.cols, args.images)
+        if "xlsx" in needed:
+            inputs["xlsx"] = os.path.join(workdir, "synthetic.xlsx")
+            make_xlsx(inputs["xlsx"], args.sheets, args.sheet_rows, args.sheet_cols)
+        if "md" in needed:
+            inputs["md"] = os.path.join(workdir, "synthetic.md")
+            make_markdown(inputs["md"], args.md_sections)
+
+        results = []
+        for name in cases:
+            result = run_case(name, inputs.get(CASES[name]), workdir, params, args.repeat)
+            print(f"  {name}: " + (f"{result['seconds']:.3f}s" if "seconds" in result else result["error"]),
+                  file=sys.stderr)
+            results.append(result)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    comparison = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            comparison = compare(results, json.load(f))
+    print(format_results(report, comparison))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置表索引
+
+扫描目录下的所有 .xlsx 配置表，把工作表名、表头字段和主键（第一列）的值写入 SQLite 倒排索引，
+用于快速回答“哪个已有配置表有类似字段”“某个ID在哪个表里”。
+
+索引按文件的大小、修改时间和内容哈希增量更新：未变化的文件不会重新读取，
+删除的文件会从索引中移除。每次查询前都会检查已索引目录的变化，保证结果与文件一致。
+
+索引文件默认保存在解析缓存目录下（见 parse_cache），可通过 --db 指定。
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import zipfile
+import argparse
+from itertools import islice
+import parse_cache
+
+# 索引结构变化时递增，旧索引会被重建
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    header_rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key_field TEXT,
+    key_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fields (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    value TEXT NOT NULL,
+    row INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sheets_path ON sheets(path);
+CREATE INDEX IF NOT EXISTS fields_name ON fields(name_lower);
+CREATE INDEX IF NOT EXISTS fields_sheet ON fields(sheet_id);
+CREATE INDEX IF NOT EXISTS keys_value ON keys(value);
+CREATE INDEX IF NOT EXISTS keys_sheet ON keys(sheet_id);
+"""
+
+# 查询默认返回的最大结果数
+DEFAULT_LIMIT = 50
+
+def default_db_path():
+    return os.path.join(parse_cache.cache_root(), "config_index.sqlite")
+
+def connect(db_path=None):
+    """打开（必要时创建）索引数据库"""
+    db_path = db_path or default_db_path()
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        with conn:
+            for table in ("keys", "fields", "sheets", "files", "roots"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+def collect_xlsx_files(root):
+    """递归查找目录下的 .xlsx 文件，跳过 Excel 临时文件"""
+    paths = glob.glob(os.path.join(root, "**", "*.xlsx"), recursive=True)
+    return sorted(os.path.abspath(p) for p in paths
+                  if not os.path.basename(p).startswith("~$") and os.path.isfile(p))
+
+def normalize_key(value):
+    """主键值统一为文本：整数值的小数（如 1001.0）写成 1001"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def scan_workbook(file_path, header_rows=1):
+    """
+    读取一个工作簿的索引内容（使用 read_xlsx 的 stream 引擎）
+
+    返回 [{"name", "fields": [(行, 列, 字段名)], "keys": [(值, 行)]}]；
+    表头取前 header_rows 行的非空单元格，主键取表头之后第一列的非空值。
+    """
+    # 只在需要重新索引时才导入 read_xlsx（及 openpyxl），查询时不需要
+    from read_xlsx import _open_stream_workbook, _iter_sheet_xml
+    
+    sheets = []
+    with zipfile.ZipFile(file_path) as zf:
+        book = _open_stream_workbook(zf)
+        for name, path in book["sheets"]:
+            fields = []
+            for row_idx, cells in islice(_iter_sheet_xml(zf, path, book), header_rows):
+                if row_idx > header_rows:
+                    break
+                fields.extend((row_idx, col, str(value).strip()) for col, value in cells
+                              if value is not None and str(value).strip())
+            keys = []
+            for row_idx, cells in _iter_sheet_xml(zf, path, book, max_col=1):
+                if row_idx <= header_rows or not cells or cells[0][1] is None:
+                    continue
+                value = normalize_key(cells[0][1])
+                if value:
+                    keys.append((value, row_idx))
+            sheets.append({"name": name, "fields": fields, "keys": keys})
+    return sheets
+
+def _index_file(conn, root, file_path, st, digest, header_rows):
+    """在一个事务中替换单个文件的索引内容"""
+    try:
+        sheets, error = scan_workbook(file_path, header_rows), None
+    except Exception as e:
+        sheets, error = [], str(e)
+
+    with conn:
+        conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+        conn.execute("INSERT INTO files (path, root, size, mtime_ns, sha256, error) VALUES (?, ?, ?, ?, ?, ?)",
+                     (file_path, root, st.st_size, st.st_mtime_ns, digest, error))
+        for position, sheet in enumerate(sheets):
+            key_field = next((name for row, col, name in sheet["fields"] if col == 1), None)
+            sheet_id = conn.execute(
+                "INSERT INTO sheets (path, name, position, key_field, key_count) VALUES (?, ?, ?, ?, ?)",
+                (file_path, sheet["name"], position, key_field, len(sheet["keys"]))).lastrowid
+            conn.executemany("INSERT INTO fields (sheet_id, row, col, name, name_lower) VALUES (?, ?, ?, ?, ?)",
+                             [(sheet_id, row, col, name, name.lower()) for row, col, name in sheet["fields"]])
+            conn.executemany("INSERT INTO keys (sheet_id, value, row) VALUES (?, ?, ?)",
+                             [(sheet_id, value, row) for value, row in sheet["keys"]])
+    return error
+
+def update_root(conn, root, header_rows=None):
+    """
+    增量更新一个目录的索引
+
+    目录嵌套时（如先后索引 cfg/ 和 cfg/items/），每个文件只属于包含它的最内层目录，
+    外层目录更新时跳过内层目录的文件，同一个文件不会被两个目录反复重新索引。
+
+    参数:
+        root: 配置表目录
+        header_rows: 表头行数（默认沿用该目录上次建索引时的设置，首次为1）；与上次不同时全部重建
+
+    返回统计 {"root", "files", "indexed", "unchanged", "removed", "failed", "seconds"}
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise ValueError(f"目录不存在: {root}")
+
+    row = conn.execute("SELECT header_rows FROM roots WHERE path = ?", (root,)).fetchone()
+    previous_header_rows = row[0] if row else None
+    header_rows = header_rows or previous_header_rows or 1
+    rebuild = previous_header_rows is not None and previous_header_rows != header_rows
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO roots (path, header_rows) VALUES (?, ?)", (root, header_rows))
+    root_header_rows = dict(conn.execute("SELECT path, header_rows FROM roots"))
+    nested = [path for path in root_header_rows if _is_within(path, root)]
+
+    # 目录下已索引的文件，包括此前属于外层或内层目录的文件
+    prefix = os.path.join(root, "")
+    known = {path: (owner, size, mtime_ns, sha256) for path, owner, size, mtime_ns, sha256 in
+             conn.execute("SELECT path, root, size, mtime_ns, sha256 FROM files WHERE root = ? OR substr(path, 1, ?) = ?",
+                          (root, len(prefix), prefix))}
+    stats = {"root": root, "files": 0, "indexed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+    for file_path in collect_xlsx_files(root):
+        if any(_is_within(file_path, path) for path in nested):
+            continue  # 由内层目录负责
+        stats["files"] += 1
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        old = known.pop(file_path, None)
+        # 此前属于外层目录的文件，表头行数相同时可以沿用原来的索引内容
+        reusable = old and (not rebuild if old[0] == root else root_header_rows.get(old[0]) == header_rows)
+        if reusable and old[1] == st.st_size and old[2] == st.st_mtime_ns:
+            if old[0] != root:
+                with conn:
+                    conn.execute("UPDATE files SET root = ? WHERE path = ?", (root, file_path))
+            stats["unchanged"] += 1
+            continue
+
+        digest = parse_cache.file_digest(file_path)
+        if reusable and old[3] == digest:
+            # 只有修改时间变化（如重新保存），内容未变
+            with conn:
+                conn.execute("UPDATE files SET root = ?, size = ?, mtime_ns = ? WHERE path = ?",
+                             (root, st.st_size, st.st_mtime_ns, file_path))
+            stats["unchanged"] += 1
+            continue
+
+        if _index_file(conn, root, file_path, st, digest, header_rows):
+            stats["failed"] += 1
+        stats["indexed"] += 1
+
+    # 内层目录的文件由内层目录自己检查是否已删除
+    removed = [path for path, (owner, *_) in known.items() if owner == root]
+    with conn:
+        for file_path in removed:
+            conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+    stats["removed"] = len(removed)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def _is_within(path, root):
+    """path 是否位于目录 root 之下（不含 root 本身）"""
+    return path.startswith(os.path.join(root, ""))
+
+def refresh(conn):
+    """检查所有已索引目录的变化，返回各目录的更新统计"""
+    roots = [path for (path,) in conn.execute("SELECT path FROM roots")]
+    stats = []
+    for root in roots:
+        if os.path.isdir(root):
+            stats.append(update_root(conn, root))
+        else:
+            with conn:
+                conn.execute("DELETE FROM files WHERE root = ?", (root,))
+                conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+    return stats
+
+def find_fields(conn, keyword, exact=False, limit=DEFAULT_LIMIT):
+    """按字段名查找（默认不区分大小写的包含匹配）"""
+    keyword = keyword.strip().lower()
+    condition, arg = ("f.name_lower = ?", keyword) if exact else ("f.name_lower LIKE ? ESCAPE '\\'", _like(keyword))
+    rows = conn.execute(f"""
+        SELECT f.name, s.path, s.name, f.row, f.col
+        FROM fields f JOIN sheets s ON s.id = f.sheet_id
+        WHERE {condition}
+        ORDER BY f.name_lower = ? DESC, s.path, s.position, f.row, f.col
+        LIMIT ?""", (arg, keyword, limit))
+    return [{"field": field, "file": path, "sheet": sheet, "row": row, "col": col}
+            for field, path, sheet, row, col in rows]
+
+def find_keys(conn, value, limit=DEFAULT_LIMIT):
+    """按主键值精确查找"""
+    rows = conn.execute("""
+        SELECT k.value, s.path, s.name, s.key_field, k.row
+        FROM keys k JOIN sheets s ON s.id = k.sheet_id
+        WHERE k.value = ?
+        ORDER BY s.path, s.position, k.row
+        LIMIT ?""", (normalize_key(value), limit))
+    return [{"id": key, "file": path, "sheet": sheet, "key_field": key_field, "row": row}
+            for key, path, sheet, key_field, row in rows]
+
+def find_sheets(conn, keyword, limit=DEFAULT_LIMIT):
+    """按工作表名查找（不区分大小写的包含匹配），附带表头字段"""
+    rows = conn.execute("""
+        SELECT id, path, name, key_field, key_count FROM sheets
+        WHERE lower(name) LIKE ? ESCAPE '\\'
+        ORDER BY path, position
+        LIMIT ?""", (_like(keyword.strip().lower()), limit)).fetchall()
+    result = []
+    for sheet_id, path, name, key_field, key_count in rows:
+        fields = [field for (field,) in conn.execute(
+            "SELECT name FROM fields WHERE sheet_id = ? ORDER BY row, col", (sheet_id,))]
+        result.append({"sheet": name, "file": path, "key_field": key_field, "key_count": key_count,
+                       "fields": fields})
+    return result
+
+def _like(keyword):
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def format_output(query, keyword, results, format_type="markdown", limit=DEFAULT_LIMIT):
+    """格式化查询结果"""
+    if format_type == "json":
+        return json.dumps({"query": query, "keyword": keyword, "results": results}, ensure_ascii=False, indent=2)
+
+    titles = {"field": "字段", "id": "主键", "sheet": "工作表"}
+    lines = [f"# 配置表索引查询（{titles[query]}）: {keyword}", ""]
+    if not results:
+        lines.append("未找到匹配的结果")
+        return "\n".join(lines)
+
+    if query == "field":
+        lines.append("| 字段 | 文件 | 工作表 | 位置 |")
+        lines.append("| --- | --- | --- | --- |")
+        for r in results:
+            lines.append(f"| {r['field']} | {r['file']} | {r['sheet']} | 第{r['row']}行第{r['col']}列 |")
+    elif query == "id":
+        lines.append("| 主键 | 文件 | 工作表 | 主键字段 | 行 |")
+        lines.append("| --- | --- | --- | --- | --- |")
+        for r in results:
+            lines.append(f"| {r['id']} | {r['file']} | {r['sheet']} | {r['key_field'] or ''} | {r['row']} |")
+    else:
+        for r in results:
+            lines.append(f"## {r['sheet']}（{r['file']}）")
+            lines.append(f"- 主键字段: {r['key_field'] or '无'}，共 {r['key_count']} 行")
+            lines.append(f"- 字段: {', '.join(r['fields'])}")
+            lines.append("")
+    if len(results) >= limit:
+        lines.append(f"\n（仅显示前{limit}条，可用 --limit 调整）")
+    return "\n".join(lines)
+
+def _print_stats(stats):
+    for s in stats:
+        print(f"{s['root']}: {s['files']} 个文件，重新索引 {s['indexed']}，未变化 {s['unchanged']}，"
+              f"移除 {s['removed']}，失败 {s['failed']}，耗时 {s['seconds']:.2f}s", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="read_xlsx.py index", description="配置表字段与主键索引")
+    parser.add_argument("--db", help="索引文件路径（默认在解析缓存目录下）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="扫描目录建立/增量更新索引")
+    build.add_argument("directory", help="配置表目录（递归查找 .xlsx）")
+    build.add_argument("--header-rows", type=int, default=None,
+                       help="表头行数（字段名所在的前几行，默认1；修改后会重建该目录的索引）")
+
+    for name, help_text in (("field", "按字段名查找（包含匹配，不区分大小写）"),
+                            ("id", "按主键（第一列）的值查找"),
+                            ("sheet", "按工作表名查找，列出其字段")):
+        query = commands.add_parser(name, help=help_text)
+        query.add_argument("keyword", help="查询内容")
+        query.add_argument("format", nargs="?", default="markdown", help="输出格式: json|markdown（默认markdown）")
+        query.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"最多返回的结果数（默认{DEFAULT_LIMIT}）")
+        query.add_argument("--no-refresh", action="store_true", help="查询前不检查配置表的变化")
+        if name == "field":
+            query.add_argument("--exact", action="store_true", help="字段名完全相同才匹配")
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        if args.command == "build":
+            try:
+                stats = update_root(conn, args.directory, args.header_rows)
+            except ValueError as e:
+                print(f"错误: {e}")
+                return 1
+            _print_stats([stats])
+            return 0
+
+        if not args.no_refresh:
+            refresh(conn)
+        if args.command == "field":
+            results = find_fields(conn, args.keyword, args.exact, args.limit)
+        elif args.command == "id":
+            results = find_keys(conn, args.keyword, args.limit)
+        else:
+            results = find_sheets(conn, args.keyword, args.limit)
+        print(format_output(args.command, args.keyword, results, args.format, args.limit))
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word 文档内容项的紧凑表示（read_docx_enhanced 的 content）
+
+内容项原先每项一个字典：没有图片的段落也带一个新建的空 image_ids 列表，每个图片段落
+还要把前后文的文字复制成新的上下文字典，上万个内容项的长文档中这些字典占了解析结果
+的大部分内存。这里的内容项使用 __slots__：
+    - 没有图片/上下文时使用共享的空元组
+    - 标题级别（样式名）经过驻留，同级标题共用同一个字符串
+    - 上下文只引用相邻内容项的上下文条目 (type, text, level)，同一段落被多个图片段落
+      引用时共用同一个条目，输出时才生成 {"type", "text", "level"} 字典
+
+内容项实现只读的映射接口（item["text"]、item.get("has_images")、"note" in item 等），
+键、值和键的顺序都与原来的字典相同，to_dict() 转换为原来的字典。内容项只在模块内部使用
+（解析缓存和命令行输出）；read_docx_enhanced / iter_docx_enhanced 返回给调用方的仍是
+to_dict() 转换后的字典。需要直接序列化内容项时传入 json_default：
+    json.dumps(data, ensure_ascii=False, indent=2, default=json_default)
+"""
+
+import sys
+from abc import abstractmethod
+from collections.abc import Mapping
+
+# 没有图片或上下文时共用的空元组
+EMPTY = ()
+
+
+class ContentItem(Mapping):
+    """内容项基类：子类给出 type 与按输出顺序排列的键（_keys），取值见 _value"""
+    __slots__ = ()
+    type = None
+    has_images = False  # 只用于属性访问；表格的映射中没有这个键
+
+    @abstractmethod
+    def _keys(self):
+        """按输出顺序排列的键"""
+
+    def _value(self, key):
+        if key == "type":
+            return self.type
+        return getattr(self, key)
+
+    def __getitem__(self, key):
+        if key in self._keys():
+            return self._value(key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dict(self):
+        """转换为原来的字典形式"""
+        return {key: self._value(key) for key in self._keys()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Paragraph(ContentItem):
+    """段落：image_ids 为图片关系ID元组；上下文只在图片段落中设置（见 set_context）"""
+    __slots__ = ("text", "image_ids", "index", "context_before", "context_after", "_entry")
+    type = "paragraph"
+    KEYS = ("type", "text", "has_images", "image_ids", "index")
+    CONTEXT_KEYS = KEYS + ("context_before", "context_after")
+
+    def __init__(self, text, image_ids=EMPTY, index=0):
+        self.text = text
+        self.image_ids = tuple(image_ids) if image_ids else EMPTY
+        self.index = index
+        self.context_before = None
+        self.context_after = None
+        self._entry = None
+
+    @property
+    def has_images(self):
+        return bool(self.image_ids)
+
+    @property
+    def level(self):
+        return None
+
+    def context_entry(self):
+        """作为其他内容项的上下文时的条目 (type, text, level)，只生成一次"""
+        if self._entry is None:
+            self._entry = (self.type, self.text, self.level)
+        return self._entry
+
+    def set_context(self, before, after):
+        """设置前后文：before/after 为相邻的标题、段落内容项"""
+        self.context_before = tuple(item.context_entry() for item in before) or EMPTY
+        self.context_after = tuple(item.context_entry() for item in after) or EMPTY
+
+    def _keys(self):
+        return self.KEYS if self.context_before is None else self.CONTEXT_KEYS
+
+    def _value(self, key):
+        if key == "image_ids":
+            return list(self.image_ids)
+        if key == "context_before" or key == "context_after":
+            return _context_dicts(getattr(self, key))
+        return ContentItem._value(self, key)
+
+    def to_dict(self):
+        return self._fill({"type": self.type})
+
+    def _fill(self, item):
+        item["text"] = self.text
+        item["has_images"] = bool(self.image_ids)
+        item["image_ids"] = list(self.image_ids)
+        item["index"] = self.index
+        if self.context_before is not None:
+            item["context_before"] = _context_dicts(self.context_before)
+            item["context_after"] = _context_dicts(self.context_after)
+        return item
+
+
+class Heading(Paragraph):
+    """标题：level 为标题样式名（如 "Heading 2"）"""
+    __slots__ = ("_level",)
+    type = "heading"
+    KEYS = ("type", "level", "text", "has_images", "image_ids", "index")
+    CONTEXT_KEYS = KEYS + ("context_before", "context_after")
+
+    def __init__(self, level, text, image_ids=EMPTY, index=0):
+        self._level = sys.intern(level)
+        super().__init__(text, image_ids, index)
+
+    @property
+    def level(self):
+        return self._level
+
+    def to_dict(self):
+        return self._fill({"type": self.type, "level": self._level})
+
+
+class Table(ContentItem):
+    """表格：extra 为分页、截断等附加字段（row_offset/header/note），没有时为None"""
+    __slots__ = ("rows", "cols", "data", "index", "extra")
+    type = "table"
+    KEYS = ("type", "rows", "cols", "data", "index")
+
+    def __init__(self, rows, cols, data, index=0, extra=None):
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self.index = index
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, table, index):
+        """由 read_docx 的表格内容项生成，附加字段保持原来的顺序"""
+        extra = {key: value for key, value in table.items() if key not in cls.KEYS}
+        return cls(table["rows"], table["cols"], table["data"], index, extra)
+
+    def _keys(self):
+        return self.KEYS if self.extra is None else self.KEYS + tuple(self.extra)
+
+    def _value(self, key):
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        return ContentItem._value(self, key)
+
+    def to_dict(self):
+        item = {"type": self.type, "rows": self.rows, "cols": self.cols, "data": self.data, "index": self.index}
+        if self.extra is not None:
+            item.update(self.extra)
+        return item
+
+
+def _context_dicts(entries):
+    return [{"type": kind, "text": text, "level": level} for kind, text, level in entries]
+
+
+def json_default(value):
+    """json.dump/json.dumps 的 default 参数：内容项转换为字典"""
+    if isinstance(value, ContentItem):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,19 +1,164 @@
 
+import io
 import os
 import re
+import sys
+import copy
+import glob
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_BREAK
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.enum.style import WD_STYLE_TYPE
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+from docx_table import HEADER_FONT, TableWriter
+import profiling
+
+# 行内样式：**加粗** 和 *斜体*（不支持嵌套）
+INLINE_PATTERN = re.compile(r'(\*\*.*?\*\*|\*[^*]+?\*)')
+
+# python-docx 会把这些字符转换成 w:tab / w:br，不能直接写入 w:t
+SPECIAL_RUN_CHARS = re.compile(r'[\t\n\r]')
+
+# 行内样式对应的字体：(中西文字体, 是否加粗)
+RUN_STYLES = {
+    'normal': ('宋体', False),
+    'bold': ('宋体', True),
+    'kaiti': ('楷体', False),  # 斜体映射为楷体，不使用斜体
+}
+CODE_FONT = 'Courier New'
+
+# 块级语法
+FENCE_PATTERN = re.compile(r'^(\s*)(`{3,}|~{3,})(.*)$')
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*)')
+LIST_PATTERN = re.compile(r'^([ \t]*)([-*+]|\d+\.)\s+(.*)$')
+TABLE_SEPARATOR_PATTERN = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')
+
+# 列表嵌套层级对应的段落样式（默认模板只有3级）
+LIST_STYLES = {
+    False: ('List Bullet', 'List Bullet 2', 'List Bullet 3'),
+    True: ('List Number', 'List Number 2', 'List Number 3'),
+}
+
+
+def _indent_width(whitespace):
+    return len(whitespace.expandtabs(4))
+
+
+def _split_table_row(line):
+    return [cell.strip() for cell in line.strip('|').split('|')]
+
+
+def iter_blocks(lines):
+    """
+    逐行扫描 Markdown，按顺序生成块级元素（轻量 AST）
+
+    参数:
+        lines: 可迭代的文本行（如打开的文件对象），只遍历一次，不会整体读入内存
+
+    生成的块为字典：
+        {"type": "heading", "level": 1-6, "text": ...}
+        {"type": "list", "ordered": bool, "depth": 嵌套层级(从0开始), "text": ...}
+        {"type": "code", "lang": ..., "lines": [...]}   代码行保留原有缩进和空白
+        {"type": "table", "rows": [[单元格, ...], ...]} 不含分隔符行
+        {"type": "paragraph", "text": ...}
+
+    其他来源（如 pipeline.py 从 Word 文档读出的内容）生成的块可以带 "plain": True，
+    表示文本中的 * 是普通字符，写入时不解析行内样式。
+    """
+    table_rows = None
+    list_indents = []   # 当前列表各层的缩进宽度
+    code = None         # (围栏, 围栏缩进, 代码块)
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        # 代码块内：只检查结束围栏，其余原样保留
+        if code is not None:
+            fence, indent, block = code
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                yield block
+                code = None
+                continue
+            # 去掉与起始围栏相同的缩进
+            if indent and line[:indent].strip() == '':
+                line = line[indent:]
+            block["lines"].append(line)
+            continue
+
+        stripped = line.strip()
+
+        # 表格：连续的 |...| 行
+        if stripped.startswith('|') and stripped.endswith('|'):
+            if table_rows is None:
+                table_rows = []
+            if not TABLE_SEPARATOR_PATTERN.match(stripped):
+                table_rows.append(_split_table_row(stripped))
+            continue
+        if table_rows is not None:
+            if table_rows:
+                yield {"type": "table", "rows": table_rows}
+            table_rows = None
+
+        match = FENCE_PATTERN.match(line)
+        if match:
+            list_indents = []
+            fence = match.group(2)
+            code = (fence, _indent_width(match.group(1)),
+                    {"type": "code", "lang": match.group(3).strip(), "lines": []})
+            continue
+
+        if not stripped:
+            continue
+
+        match = LIST_PATTERN.match(line)
+        if match:
+            width = _indent_width(match.group(1))
+            while list_indents and list_indents[-1] > width:
+                list_indents.pop()
+            if not list_indents or list_indents[-1] < width:
+                list_indents.append(width)
+            yield {"type": "list", "ordered": match.group(2)[0].isdigit(),
+                   "depth": len(list_indents) - 1, "text": match.group(3).strip()}
+            continue
+        list_indents = []
+
+        match = HEADING_PATTERN.match(stripped)
+        if match:
+            yield {"type": "heading", "level": len(match.group(1)), "text": match.group(2)}
+            continue
+
+        yield {"type": "paragraph", "text": stripped}
+
+    # 文件以表格或未闭合的代码块结尾
+    if table_rows:
+        yield {"type": "table", "rows": table_rows}
+    if code is not None:
+        yield code[2]
 
 class MarkdownToDocx:
-    def __init__(self, input_file, output_file):
+    def __init__(self, input_file, output_file, template=None):
+        """template: build_template() 生成的已配置样式的文档（.docx 字节），省去每次重新配置样式"""
         self.input_file = input_file
         self.output_file = output_file
-        self.doc = Document()
-        self._setup_styles()
+        with profiling.phase("template"):
+            if template is None:
+                self.doc = Document()
+                self._setup_styles()
+            else:
+                self.doc = Document(io.BytesIO(template))
+            self._run_templates = self._build_run_templates()
+        self._style_ids = {}
+        self._body = self.doc._body
+        self._sectPr = self.doc.element.body.sectPr
+        self._tables = TableWriter(self.doc)
         
     def _setup_styles(self):
         """配置文档基本样式，支持中文"""
@@ -32,13 +177,67 @@ class MarkdownToDocx:
                 h_style.font.bold = True
 
 
-    def parse_inline_styles(self, paragraph, text):
-        """解析行内样式：**Bold**, *Italic*"""
-        # 使用更复杂的正则同时匹配 **bold** 和 *italic*
-        # 注意：这里简单的实现不支持嵌套
-        parts = re.split(r'(\*\*.*?\*\*|\*[^*]+?\*)', text)
-        
-        for part in parts:
+    def _build_run_templates(self):
+        """
+        预先构建每种行内样式的 w:r 模板，生成 run 时直接复制模板
+
+        模板按原来逐个 run 设置字体的顺序构建（font.name + rFonts 的 eastAsia），
+        保证复制出的 XML 与逐个设置完全相同。每种样式各有不带文本、带 w:t、
+        带 xml:space="preserve" 的 w:t 三个模板。
+        """
+        def style(font_name, bold, header):
+            run = Run(OxmlElement('w:r'), None)
+            if bold:
+                run.font.bold = True
+            run.font.name = font_name
+            run.element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
+            if header:
+                # 表头：在原样式基础上加粗并改为微软雅黑
+                run.font.bold = True
+                run.font.name = HEADER_FONT
+                run.element.rPr.rFonts.set(qn('w:eastAsia'), HEADER_FONT)
+            return run.element
+
+        bases = {}
+        for name, (font_name, bold) in RUN_STYLES.items():
+            bases[name, False] = style(font_name, bold, False)
+            bases[name, True] = style(font_name, bold, True)
+        code = Run(OxmlElement('w:r'), None)
+        code.font.name = CODE_FONT
+        bases['code', False] = code.element
+
+        templates = {}
+        for key, r in bases.items():
+            plain = copy.deepcopy(r)
+            plain.add_t('x')
+            preserve = copy.deepcopy(r)
+            preserve.add_t(' x ')
+            templates[key] = (r, plain, preserve)
+        return templates
+
+    def _make_run(self, text, style, header=False):
+        """复制样式模板生成一个 w:r 元素，内容与 paragraph.add_run(text) 相同"""
+        empty, plain, preserve = self._run_templates[style, header]
+        if not text:
+            return copy.deepcopy(empty)
+        if SPECIAL_RUN_CHARS.search(text):
+            # 制表符、换行交给 python-docx 转换
+            r = copy.deepcopy(empty)
+            Run(r, None).text = text
+            return r
+        r = copy.deepcopy(preserve if len(text.strip()) < len(text) else plain)
+        r[-1].text = text
+        return r
+
+    def parse_inline_styles(self, paragraph, text, header=False):
+        """解析行内样式：**Bold**, *Italic*；header 为 True 时按表头样式（加粗、微软雅黑）生成"""
+        # 一次性追加到段落末尾
+        paragraph._p.extend(self.inline_runs(text, header))
+
+    def inline_runs(self, text, header=False):
+        """按行内样式把文本切分为 w:r 元素列表"""
+        runs = []
+        for part in INLINE_PATTERN.split(text):
             if not part:
                 continue
                 
@@ -46,152 +245,216 @@ class MarkdownToDocx:
                 # 加粗 (Bold)
                 content = part[2:-2]
                 if content:
-                    run = paragraph.add_run(content)
-                    run.font.bold = True
-                    run.font.name = '宋体'
-                    run.element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
+                    runs.append(self._make_run(content, 'bold', header))
             elif part.startswith('*') and part.endswith('*'):
                 # 斜体 (Italic) -> 映射为楷体 (KaiTi)
                 content = part[1:-1]
                 if content:
-                    run = paragraph.add_run(content)
-                    # run.font.italic = True # 不使用斜体，而是使用楷体
-                    run.font.name = '楷体' 
-                    run.element.rPr.rFonts.set(qn('w:eastAsia'), '楷体')
+                    runs.append(self._make_run(content, 'kaiti', header))
             else:
                 # 普通文本
-                run = paragraph.add_run(part)
-                run.font.name = '宋体'
-                run.element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
+                runs.append(self._make_run(part, 'normal', header))
+        return runs
+
+
+    def _add_paragraph(self, style=None):
+        """
+        在正文末尾（w:sectPr 之前）添加段落，效果同 doc.add_paragraph(style=style)
 
+        直接插入到 sectPr 前面，并缓存样式名对应的样式ID，避免 python-docx 每次
+        从头查找插入位置和默认样式，段落数很多时仍是线性时间。
+        """
+        p = OxmlElement('w:p')
+        if self._sectPr is not None:
+            self._sectPr.addprevious(p)
+        else:
+            self._body._element.append(p)
+        if style is not None:
+            if style not in self._style_ids:
+                self._style_ids[style] = self.doc.part.get_style_id(style, WD_STYLE_TYPE.PARAGRAPH)
+            p.style = self._style_ids[style]
+        return Paragraph(p, self._body)
 
-    def convert(self):
+    def plain_runs(self, text, header=False):
+        """不解析行内样式，整段文本作为一个普通 run"""
+        return [self._make_run(text, 'normal', header)] if text else []
+
+    def render_block(self, block):
+        """把 iter_blocks 生成的一个块写入文档"""
+        kind = block["type"]
+        runs = self.plain_runs if block.get("plain") else self.inline_runs
+        if kind == "heading":
+            p = self._add_paragraph(f'Heading {block["level"]}')
+            p.add_run(block["text"])
+        elif kind == "list":
+            styles = LIST_STYLES[block["ordered"]]
+            p = self._add_paragraph(styles[min(block["depth"], len(styles) - 1)])
+            p._p.extend(runs(block["text"]))
+        elif kind == "code":
+            for line in block["lines"]:
+                p = self._add_paragraph('No Spacing')
+                p._p.append(self._make_run(line, 'code'))
+        elif kind == "table":
+            self._create_table(block["rows"], runs)
+        else:
+            p = self._add_paragraph()
+            p._p.extend(runs(block["text"]))
+
+    def convert(self, quiet=False):
         with open(self.input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        table_mode = False
-        table_rows = []
-        code_mode = False
-
-        for line in lines:
-            line = line.strip()
-            
-            # 处理代码块
-            if line.startswith('```'):
-                code_mode = not code_mode
-                continue
-            
-            if code_mode:
-                p = self.doc.add_paragraph()
-                p.style = 'No Spacing'
-                run = p.add_run(line)
-                run.font.name = 'Courier New'
-                continue
+            for block in profiling.iterate("parse", iter_blocks(f)):
+                profiling.count(block["type"])
+                with profiling.phase("render"):
+                    self.render_block(block)
 
-            # 处理表格
-            if line.startswith('|') and line.endswith('|'):
-                if not table_mode:
-                    table_mode = True
-                    table_rows = []
-                
-                # 跳过分隔符行 |---|---|
-                if '---' in line:
-                    continue
-                    
-                row_data = [cell.strip() for cell in line.strip('|').split('|')]
-                table_rows.append(row_data)
-                continue
-            else:
-                if table_mode:
-                    # 表格结束，写入表格
-                    self._create_table(table_rows)
-                    table_mode = False
-                    table_rows = []
+        with profiling.phase("save"):
+            self.doc.save(self.output_file)
+        if not quiet:
+            print(f"✅ Converted: {self.output_file}")
 
-            if not line:
-                continue
+    def _create_table(self, rows, cell_runs=None):
+        """写入表格：第一行为表头（灰色背景，文字加粗 + 微软雅黑），单元格默认解析行内样式"""
+        if not rows:
+            return
+        self._tables.add_table(rows, cell_runs=cell_runs or self.inline_runs)
 
-            # 处理标题
-            header_match = re.match(r'^(#{1,6})\s+(.*)', line)
-            if header_match:
-                level = len(header_match.group(1))
-                content = header_match.group(2)
-                self.doc.add_heading(content, level=level)
-                continue
 
-            # 处理列表
-            if line.startswith('- ') or line.startswith('* '):
-                p = self.doc.add_paragraph(style='List Bullet')
-                self.parse_inline_styles(p, line[2:])
-                continue
-            
-            # 处理有序列表 (简单匹配 1. )
-            if re.match(r'^\d+\.\s', line):
-                content = re.sub(r'^\d+\.\s', '', line)
-                p = self.doc.add_paragraph(style='List Number')
-                self.parse_inline_styles(p, content)
-                continue
+def build_template():
+    """构建已配置好中文字体和标题样式的空白文档，返回 .docx 字节，供批量转换的各进程共用"""
+    buffer = io.BytesIO()
+    MarkdownToDocx(None, None).doc.save(buffer)
+    return buffer.getvalue()
 
-            # 普通段落
-            p = self.doc.add_paragraph()
-            self.parse_inline_styles(p, line)
 
-        # 如果文件以表格结尾
-        if table_mode:
-             self._create_table(table_rows)
+def collect_markdown_files(inputs):
+    """
+    展开输入的文件、目录（递归查找 .md）或通配符
 
-        self.doc.save(self.output_file)
-        print(f"✅ Converted: {self.output_file}")
+    返回 [(Markdown路径, 相对路径)]，相对路径用于在输出目录中还原目录结构：
+    目录中的文件相对于该目录；单独指定的文件和通配符匹配的文件相对于它们的公共上级目录，
+    不同目录下的同名文件不会映射到同一个输出文件。
+    两个输入的相对路径仍然相同时（如两个目录下有相同的子路径）抛出 ValueError。
+    """
+    found = {}
+    loose = []  # 单独指定或通配符匹配的文件，相对路径在全部收集后计算
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths = glob.glob(os.path.join(pattern, '**', '*.md'), recursive=True)
+            for path in paths:
+                if not os.path.isdir(path):
+                    found.setdefault(os.path.abspath(path), (path, os.path.relpath(path, pattern)))
+        else:
+            paths = glob.glob(pattern, recursive=True) or [pattern]
+            loose.extend(path for path in paths if not os.path.isdir(path))
+    
+    loose = [path for path in loose if os.path.abspath(path) not in found]
+    if loose:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in loose])
+        for path in loose:
+            found.setdefault(os.path.abspath(path), (path, os.path.relpath(os.path.abspath(path), base)))
+    
+    targets = {}
+    for path, rel in found.values():
+        key = os.path.normcase(os.path.splitext(rel)[0])
+        if key in targets:
+            raise ValueError(f"{targets[key]} 与 {path} 会输出到同一个文件: {os.path.splitext(rel)[0]}.docx")
+        targets[key] = path
+    return sorted(found.values(), key=lambda item: item[1])
 
-    def _create_table(self, rows):
-        if not rows:
-            return
-        
-        num_cols = max(len(r) for r in rows)
-        table = self.doc.add_table(rows=len(rows), cols=num_cols)
-        table.style = 'Table Grid'
-        
-        for i, row_data in enumerate(rows):
-            row_cells = table.rows[i].cells
-            for j, cell_text in enumerate(row_data):
-                if j < len(row_cells):
-                    cell = row_cells[j]
-                    # 清除可能默认存在的段落
-                    # cell.text = "" 
-                    # 应该保留第一个段落但清空内容，或者直接获取第一个段落
-                    if not cell.paragraphs:
-                        p = cell.add_paragraph()
-                    else:
-                        p = cell.paragraphs[0]
-                        p.clear() # 清空内容
-                        
-                    self.parse_inline_styles(p, cell_text)
-                    
-                    # 第一行 (表头) 样式优化
-                    if i == 0:
-                        # 背景色 (灰色)
-                        tcPr = cell._element.get_or_add_tcPr()
-                        shd = OxmlElement('w:shd')
-                        shd.set(qn('w:val'), 'clear')
-                        shd.set(qn('w:color'), 'auto')
-                        shd.set(qn('w:fill'), 'F2F2F2') # 浅灰色背景
-                        tcPr.append(shd)
-                        
-                        # 字体加粗 + 微软雅黑
-                        for run in p.runs:
-                            run.font.bold = True
-                            run.font.name = '微软雅黑'
-                            run.element.rPr.rFonts.set(qn('w:eastAsia'), '微软雅黑')
-
-
-def main():
+
+_worker_template = None
+
+
+def _init_worker(template):
+    global _worker_template
+    _worker_template = template
+
+
+def _convert_task(input_file, output_file):
+    """批量转换的单个文件任务，在工作进程中执行；返回 (输入, 输出, 耗时, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        MarkdownToDocx(input_file, output_file, template=_worker_template).convert(quiet=True)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return input_file, output_file, time.perf_counter() - start, error
+
+
+def convert_batch(inputs, output_dir, workers=None, stream=None):
+    """
+    批量转换多个 Markdown 文件，输出到 output_dir 下的同名 .docx（保持目录结构）
+
+    样式模板只构建一次并序列化，各工作进程都从该模板开始转换。
+
+    参数:
+        inputs: 文件、目录或通配符列表
+        output_dir: 输出根目录
+        workers: 工作进程数（默认CPU核数；为1时在当前进程中顺序执行）
+        stream: 逐个文件输出耗时的流（默认stderr）
+
+    返回: 统计信息 {"files", "failed": [(输入, 错误信息)], "seconds"}
+    """
+    stream = stream or sys.stderr
+    files = collect_markdown_files(inputs)
+    tasks = [(path, os.path.join(output_dir, os.path.splitext(rel)[0] + '.docx')) for path, rel in files]
+    workers = workers or os.cpu_count() or 1
+    failed = []
+    start = time.perf_counter()
+    template = build_template()
+
+    def report(result):
+        input_file, output_file, seconds, error = result
+        if error:
+            failed.append((input_file, error))
+            stream.write(f"❌ {input_file}: {error}\n")
+        else:
+            stream.write(f"✅ {output_file} ({seconds:.2f}s)\n")
+        stream.flush()
+
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(template)
+        for task in tasks:
+            report(_convert_task(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(template,)) as executor:
+            futures = [executor.submit(_convert_task, *task) for task in tasks]
+            for future in as_completed(futures):
+                report(future.result())
+
+    return {"files": len(tasks), "failed": failed, "seconds": time.perf_counter() - start}
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Convert Markdown to Docx (Custom)')
-    parser.add_argument('input', help='Input Markdown file')
-    parser.add_argument('output', help='Output Docx file')
-    args = parser.parse_args()
+    parser.add_argument('input', nargs='+', help='Input Markdown file (with --batch: files, directories or globs)')
+    parser.add_argument('output', help='Output Docx file (with --batch: output directory)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Convert many files in parallel, mirroring directories under the output directory')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --batch (default: CPU count)')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    if not args.batch and len(args.input) > 1:
+        parser.error('multiple inputs require --batch')
+    
+    with profiling.session(args.profile, "convert_md_v2"):
+        if args.batch:
+            try:
+                stats = convert_batch(args.input, args.output, workers=args.workers)
+            except ValueError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 1
+            print(f"✅ 批量转换完成：{stats['files']} 个文件，失败 {len(stats['failed'])} 个，"
+                  f"耗时 {stats['seconds']:.2f} 秒", file=sys.stderr)
+            for input_file, error in stats["failed"]:
+                print(f"  ❌ {input_file}: {error}", file=sys.stderr)
+            return 1 if stats["failed"] else 0
     
-    converter = MarkdownToDocx(args.input, args.output)
-    converter.convert()
+        converter = MarkdownToDocx(args.input[0], args.output)
+        converter.convert()
+        return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
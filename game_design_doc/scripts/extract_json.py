@@ -1,17 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+把 Word 文档的增强读取结果保存为 JSON
+
+用法:
+    python extract_json.py <文件路径.docx> [输出.json]
+
+未指定输出文件时，保存为文档同目录下的 <文档名>.json。
+"""
+
+import os
+import sys
 import json
+import argparse
+
 from read_docx_enhanced import read_docx_enhanced
 
-data = read_docx_enhanced(r"g:\zmd works\skills\S神石玩法.docx", 
-                          extract_images_flag=False)
 
-# 保存为JSON
-with open(r"g:\zmd works\skills\temp_images\shenshi\document_data.json", 
-          "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把Word文档的增强读取结果保存为JSON')
+    parser.add_argument('file', help='Word文档路径')
+    parser.add_argument('output', nargs='?', help='输出JSON文件（默认与文档同目录同名）')
+    args = parser.parse_args(argv)
+
+    data = read_docx_enhanced(args.file, extract_images_flag=False)
+    if "error" in data:
+        print(f"错误: {data['error']}", file=sys.stderr)
+        return 1
+
+    output = args.output or os.path.splitext(args.file)[0] + ".json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    print(f"✓ JSON文件已保存: {output}")
+    print(f"✓ 共{len(data['content'])}个内容项")
+
+    # 统计包含图片的段落
+    image_paras = [item for item in data['content'] if item.get('has_images')]
+    print(f"✓ 包含图片的段落: {len(image_paras)}个")
+    return 0
 
-print("✓ JSON文件已保存")
-print(f"✓ 共{len(data['content'])}个内容项")
 
-# 统计包含图片的段落
-image_paras = [item for item in data['content'] if item.get('has_images')]
-print(f"✓ 包含图片的段落: {len(image_paras)}个")
+if __name__ == "__main__":
+    sys.exit(main())
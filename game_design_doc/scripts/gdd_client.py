@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻脚本服务的客户端
+
+参数与直接运行脚本相同，只在前面加上脚本名：
+    python gdd_client.py read_docx 文档.docx markdown
+    python gdd_client.py read_xlsx 配置表.xlsx json --sheets "item*"
+    python gdd_client.py read_xlsx index field 道具
+
+服务（gdd_server.py）正在运行时把请求交给服务执行，免去解释器导入 python-docx/lxml/openpyxl
+的时间；服务未运行、平台不支持 Unix 域套接字或服务的代码已过期时，在本进程中直接执行脚本，
+输出与退出码都与直接运行脚本相同。
+
+本模块只导入标准库中的轻量模块，不要在这里导入各脚本或其依赖。
+"""
+
+import os
+import sys
+import json
+import socket
+
+# 可以通过服务执行的脚本（均提供 main(argv)）
+SCRIPTS = ("read_docx", "read_docx_enhanced", "read_xlsx", "search_index",
+           "convert_md_v2", "generate_doc", "pipeline", "extract_json")
+
+# 随请求转发的环境变量前缀（解析缓存目录、缓存上限等）
+ENV_PREFIX = "GDD_"
+
+
+def socket_path():
+    """服务套接字路径：默认在解析缓存目录下（与 parse_cache.cache_root 相同，这里不导入 parse_cache 以加快启动）"""
+    path = os.environ.get("GDD_SERVER_SOCKET")
+    if path:
+        return path
+    root = os.environ.get("GDD_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "game_design_doc")
+    return os.path.join(root, "gdd_server.sock")
+
+
+def request(message, path=None, timeout=None):
+    """
+    向服务发送一个请求并返回响应
+
+    服务未运行时抛出 OSError（FileNotFoundError / ConnectionRefusedError 等）。
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionResetError("服务未返回响应")
+    return json.loads(line)
+
+
+def run_remote(script, argv):
+    """
+    通过服务执行脚本
+
+    返回 {"code", "stdout", "stderr"}；服务不可用、代码已过期或工作进程异常退出时返回None
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    message = {
+        "script": script,
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": {key: value for key, value in os.environ.items() if key.startswith(ENV_PREFIX)},
+    }
+    try:
+        response = request(message)
+    except OSError:
+        return None
+    if response.get("stale"):
+        print("提示: 脚本已修改，常驻服务仍在运行旧代码，本次在本进程中执行；"
+              "请运行 gdd_server.py stop 后重新 start", file=sys.stderr)
+        return None
+    if response.get("fallback"):
+        print(f"提示: {response['fallback']}，本次在本进程中执行", file=sys.stderr)
+        return None
+    return response
+
+
+def run_local(script, argv):
+    """在本进程中执行脚本，返回退出码"""
+    import importlib
+    return importlib.import_module(script).main(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in SCRIPTS:
+        print(f"用法: gdd_client.py <脚本名> [脚本参数...]\n脚本名: {', '.join(SCRIPTS)}", file=sys.stderr)
+        return 2
+    script, script_argv = argv[0], argv[1:]
+
+    response = run_remote(script, script_argv)
+    if response is None:
+        return run_local(script, script_argv)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻脚本服务
+
+每次调用 `python read_docx.py ...` 都要启动解释器并导入 python-docx/lxml/openpyxl，
+小文档的大部分耗时都花在这里。本服务在 Unix 域套接字上监听，由常驻的工作进程池
+执行脚本：工作进程启动时预先导入所有脚本模块，之后的请求直接调用各脚本的 main(argv)，
+模块级缓存（样式模板、样式ID等）和磁盘上的解析缓存在请求之间保持热状态。
+
+客户端见 gdd_client.py：参数与直接运行脚本相同，服务未运行时在本进程中执行。
+
+协议：每个连接发送一行JSON请求，返回一行JSON响应
+    请求 {"script": 脚本名, "argv": [...], "cwd": 工作目录, "env": {GDD_* 环境变量}}
+    响应 {"code": 退出码, "stdout": 标准输出, "stderr": 标准错误}
+    脚本文件在服务启动后被修改时响应 {"stale": true}，工作进程异常退出（进程池损坏）时响应
+    {"fallback": 原因} 并重建进程池，这两种情况下客户端都改为在本进程中执行。
+    另有 {"command": "ping"} 与 {"command": "shutdown"}。
+
+用法:
+    python gdd_server.py start [--workers N]   # 在后台启动
+    python gdd_server.py serve [--workers N]   # 在前台运行
+    python gdd_server.py status
+    python gdd_server.py stop
+
+套接字默认为解析缓存目录下的 gdd_server.sock，可通过环境变量 GDD_SERVER_SOCKET 修改。
+
+实测（小文档 read_docx，随机器不同）：直接运行脚本约 200–300ms，通过客户端约 40–100ms。
+服务端的请求往返只需约 2.5ms，其余是客户端进程本身的开销（空解释器启动约 17ms，导入 json 约 12ms）；
+每次调用仍要启动一个 Python 解释器，整个调用达不到只需几毫秒。
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib
+import threading
+import traceback
+import subprocess
+import socketserver
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from gdd_client import SCRIPTS, ENV_PREFIX, socket_path, request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# start 等待服务就绪的最长时间（秒）
+START_TIMEOUT = 30
+
+
+def _scripts_signature():
+    """各脚本文件的修改时间，用于发现服务启动后被修改的代码"""
+    signature = {}
+    for name in os.listdir(SCRIPT_DIR):
+        if name.endswith(".py"):
+            try:
+                signature[name] = os.stat(os.path.join(SCRIPT_DIR, name)).st_mtime_ns
+            except OSError:
+                pass
+    return signature
+
+
+def _init_worker():
+    """工作进程初始化：预先导入所有脚本模块（及其依赖的 python-docx/lxml/openpyxl）"""
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    for script in SCRIPTS:
+        importlib.import_module(script)
+
+
+def run_script(script, argv, cwd=None, env=None):
+    """
+    在当前进程中执行脚本的 main(argv)，捕获标准输出和标准错误
+
+    cwd 与 env（GDD_* 环境变量）只在执行期间生效；sys.argv[0] 设为脚本文件名，
+    用法提示中的程序名与直接运行脚本相同。
+    返回 {"code", "stdout", "stderr"}
+    """
+    module = importlib.import_module(script)
+    env = env or {}
+    keys = set(env) | {key for key in os.environ if key.startswith(ENV_PREFIX)}
+    saved_env = {key: os.environ.get(key) for key in keys}
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv
+    out, err = io.StringIO(), io.StringIO()
+    try:
+        sys.argv = [f"{script}.py"] + list(argv)
+        for key in keys:
+            if key in env:
+                os.environ[key] = env[key]
+            else:
+                os.environ.pop(key, None)
+        if cwd:
+            os.chdir(cwd)
+        with redirect_stdout(out), redirect_stderr(err):
+            try:
+                code = module.main(argv)
+            except SystemExit as e:
+                code = e.code
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    finally:
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    # 与 sys.exit 的处理相同：None 为0，非整数打印到标准错误并返回1
+    if code is None:
+        code = 0
+    elif not isinstance(code, int):
+        err.write(f"{code}\n")
+        code = 1
+    return {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        try:
+            message = json.loads(self.rfile.readline())
+            command = message.get("command")
+            if command == "ping":
+                response = {"pid": os.getpid(), "workers": server.workers,
+                            "uptime": round(time.time() - server.started, 1), "requests": server.requests}
+            elif command == "shutdown":
+                response = {"ok": True}
+                threading.Thread(target=server.shutdown, daemon=True).start()
+            elif message.get("script") not in SCRIPTS:
+                response = {"code": 2, "stdout": "", "stderr": f"未知的脚本: {message.get('script')}\n"}
+            elif _scripts_signature() != server.signature:
+                response = {"stale": True}
+            else:
+                server.requests += 1
+                response = server.run(message["script"], message.get("argv", []),
+                                      message.get("cwd"), message.get("env"))
+        except Exception as e:
+            response = {"code": 1, "stdout": "", "stderr": f"服务错误: {e}\n"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class ScriptServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """每个连接一个线程接收请求，脚本在工作进程池中执行"""
+    daemon_threads = True
+
+    def __init__(self, path, workers):
+        self.workers = workers
+        self.started = time.time()
+        self.requests = 0
+        self.signature = _scripts_signature()
+        self.pool_lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        # 预先启动全部工作进程，第一个请求不必等待导入
+        for future in [self.pool.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        super().__init__(path, _Handler)
+
+    def run(self, script, argv, cwd=None, env=None):
+        """
+        在进程池中执行脚本；工作进程异常退出（崩溃、被杀死）时重建进程池，
+        返回 {"fallback": 原因}，由客户端在本进程中重新执行该请求
+        """
+        pool = self.pool
+        try:
+            return pool.submit(run_script, script, argv, cwd, env).result()
+        except BrokenProcessPool:
+            with self.pool_lock:
+                if self.pool is pool:
+                    pool.shutdown(wait=False)
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return {"fallback": "服务的工作进程异常退出，已重启工作进程"}
+
+
+def serve(path=None, workers=None):
+    """在前台运行服务，直到收到 stop 请求或被中断"""
+    path = path or socket_path()
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        request({"command": "ping"}, path, timeout=1)
+    except OSError:
+        # 没有服务在监听：清理上次异常退出留下的套接字文件
+        if os.path.exists(path):
+            os.remove(path)
+    else:
+        print(f"错误: 服务已在运行: {path}", file=sys.stderr)
+        return 1
+
+    server = ScriptServer(path, workers)
+    print(f"服务已启动: {path}（{workers} 个工作进程）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        if os.path.exists(path):
+            os.remove(path)
+    return 0
+
+
+def start(path=None, workers=None):
+    """在后台启动服务，等待其可以响应请求"""
+    path = path or socket_path()
+    argv = [sys.executable, os.path.abspath(__file__), "serve", "--socket", path]
+    if workers:
+        argv += ["--workers", str(workers)]
+    subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return request({"command": "ping"}, path, timeout=1)
+        except OSError:
+            time.sleep(0.1)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常驻脚本服务：预先导入依赖，由工作进程池执行脚本")
+    parser.add_argument("command", choices=("start", "serve", "status", "stop"),
+                        help="start 后台启动 / serve 前台运行 / status 查看状态 / stop 停止")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认为CPU核数）")
+    parser.add_argument("--socket", default=None, help="套接字路径（默认在解析缓存目录下）")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("错误: 当前平台不支持 Unix 域套接字，请直接运行各脚本", file=sys.stderr)
+        return 1
+    path = args.socket or socket_path()
+
+    if args.command == "serve":
+        return serve(path, args.workers)
+
+    if args.command == "start":
+        try:
+            status = request({"command": "ping"}, path, timeout=1)
+            print(f"服务已在运行: {path}（PID {status['pid']}）", file=sys.stderr)
+            return 0
+        except OSError:
+            pass
+        status = start(path, args.workers)
+        if status is None:
+            print(f"错误: 服务启动超时: {path}", file=sys.stderr)
+            return 1
+        print(f"服务已启动: {path}（PID {status['pid']}，{status['workers']} 个工作进程）", file=sys.stderr)
+        return 0
+
+    try:
+        status = request({"command": "ping" if args.command == "status" else "shutdown"}, path, timeout=5)
+    except OSError:
+        print(f"服务未运行: {path}", file=sys.stderr)
+        return 1 if args.command == "status" else 0
+    if args.command == "status":
+        print(f"服务运行中: {path}（PID {status['pid']}，{status['workers']} 个工作进程，"
+              f"已运行 {status['uptime']} 秒，处理 {status['requests']} 个请求）")
+    else:
+        print(f"服务已停止: {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,113 +5,217 @@
 根据模板自动生成标准化的Word文档框架
 """
 
+import io
+import sys
+import copy
+import csv
+import json
+import time
+import hashlib
+import zipfile
+import tempfile
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
 import os
 from datetime import datetime
 
+import parse_cache
+import profiling
+from docx_table import HEADER_FILL, HEADER_FONT, TABLE_STYLE, TableWriter
+
+# 基础模板中的样式定义版本，修改 build_base_template 后递增，使磁盘上缓存的旧模板失效
+STYLE_VERSION = 1
+
+# 文档框架内容的版本，修改各章节内容后递增，批量生成时已有文档会重新生成
+GENERATOR_VERSION = 1
+
+FUNC_TYPES = ('system', 'building', 'activity', 'other')
+
+# 批量生成的文档在核心属性 identifier 中记录输入摘要（见 _input_stamp）的前缀
+STAMP_PREFIX = 'gdd-generate:'
+
+# 清单文件的列名（支持中文表头）
+MANIFEST_COLUMNS = {
+    'name': 'name', '功能名称': 'name',
+    'type': 'type', '功能类型': 'type',
+    'output': 'output', '输出路径': 'output',
+}
+
+DOC_TABLE_STYLE = 'GDD Table'               # 基于 Table Grid，首行灰色底纹
+DOC_TABLE_HEADER_STYLE = 'GDD Table Header'  # 表头文字：微软雅黑 + 加粗
+
+_base_template = None
+
+
+def _set_east_asian_font(style, font_name):
+    """设置样式字体（含 eastAsia），并去掉主题字体引用，否则 Word 会优先使用主题字体"""
+    style.font.name = font_name
+    rFonts = style.element.rPr.rFonts
+    rFonts.set(qn('w:eastAsia'), font_name)
+    for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme'):
+        rFonts.attrib.pop(qn(attr), None)
+
+
+def build_base_template():
+    """
+    构建已配置好所有样式的空白文档，返回 .docx 字节
+
+    - 正文：宋体 12pt
+    - 标题1-9：微软雅黑、加粗、黑色、左对齐
+    - 表格样式 GDD Table：Table Grid 边框，首行灰色底纹
+    - 字符样式 GDD Table Header：表头文字微软雅黑 + 加粗
+    """
+    doc = Document()
+    styles = doc.styles
+    
+    styles['Normal'].font.name = '宋体'
+    styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
+    styles['Normal'].font.size = Pt(12)
+    
+    for level in range(1, 10):
+        style = styles[f'Heading {level}']
+        _set_east_asian_font(style, HEADER_FONT)
+        style.font.bold = True
+        style.font.color.rgb = RGBColor(0, 0, 0)
+        color = style.element.rPr.color
+        for attr in ('w:themeColor', 'w:themeShade', 'w:themeTint'):
+            color.attrib.pop(qn(attr), None)
+        style.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+    
+    header_style = styles.add_style(DOC_TABLE_HEADER_STYLE, WD_STYLE_TYPE.CHARACTER)
+    header_style.font.name = HEADER_FONT
+    header_style.element.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), HEADER_FONT)
+    header_style.font.bold = True
+    
+    # 表格首行的条件格式（tblStylePr）python-docx 没有对应接口，直接写入 XML
+    table_style = styles.add_style(DOC_TABLE_STYLE, WD_STYLE_TYPE.TABLE)
+    table_style.base_style = styles[TABLE_STYLE]
+    table_style.element.append(parse_xml(
+        f'<w:tblStylePr {nsdecls("w")} w:type="firstRow">'
+        f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{HEADER_FILL}"/></w:tcPr>'
+        f'</w:tblStylePr>'))
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def base_template():
+    """按样式版本缓存在磁盘（解析缓存目录下的 templates/）和进程内的基础模板"""
+    global _base_template
+    if _base_template is None:
+        _base_template = parse_cache.cached_bytes(
+            "templates", f"generate_doc-v{STYLE_VERSION}.docx", build_base_template)
+    return _base_template
+
+
+_reusable_doc = None
+
+
+def _reusable_document():
+    """
+    进程内复用已解析的基础模板：每次把正文恢复为模板的初始内容后返回同一个文档对象
+
+    批量生成时省去每个文档重新解压、解析模板的开销；生成过程只修改正文，不改动样式等其他部件。
+    """
+    global _reusable_doc
+    if _reusable_doc is None:
+        doc = Document(io.BytesIO(base_template()))
+        _reusable_doc = (doc, copy.deepcopy(doc.element.body))
+    doc, body = _reusable_doc
+    doc.element.body[:] = [copy.deepcopy(child) for child in body]
+    return doc
+
+
+def _save_atomic(doc, path):
+    """先保存到同目录的临时文件再替换，中断时不会留下半个文档"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.~', suffix='.docx.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            doc.save(f)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
 class GameDocGenerator:
     """游戏功能文档生成器"""
     
-    def __init__(self, func_name, func_type, output_path=None):
+    def __init__(self, func_name, func_type, output_path=None, doc=None):
+        """doc: 从基础模板打开的空文档（可选，批量生成时复用）"""
         self.func_name = func_name
         self.func_type = func_type
-        self.output_path = output_path or f"{func_name}_设计文档.docx"
-        self.doc = Document()
-        self._setup_styles()
+        self.output_path = output_path or default_output_name(func_name)
+        # 样式都已在基础模板中定义好，标题和表头只引用样式
+        if doc is None:
+            with profiling.phase("template"):
+                doc = Document(io.BytesIO(base_template()))
+        self.doc = doc
+        self._tables = TableWriter(self.doc, style=DOC_TABLE_STYLE, shade_header=False,
+                                   header_run_style=DOC_TABLE_HEADER_STYLE)
+        self._style_ids = {}
     
-    def _setup_styles(self):
-        """设置文档样式"""
-        # 设置中文字体
-        self.doc.styles['Normal'].font.name = '宋体'
-        self.doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
-        self.doc.styles['Normal'].font.size = Pt(12)
-        
     def _add_heading(self, text, level=1):
-        """添加标题"""
-        heading = self.doc.add_heading(text, level=level)
-        heading.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-        
-        # 强制设置标题字体为微软雅黑+加粗
-        for run in heading.runs:
-            run.font.name = '微软雅黑'
-            run.element.rPr.rFonts.set(qn('w:eastAsia'), '微软雅黑')
-            run.font.bold = True
-            run.font.color.rgb = RGBColor(0, 0, 0)
-            
-        return heading
+        """添加标题（微软雅黑 + 加粗 + 黑色，由标题样式提供）；level 为0时为文档标题"""
+        return self._add_paragraph(text, style='Title' if level == 0 else f'Heading {level}')
     
     def _add_paragraph(self, text, style=None):
-        """添加段落"""
-        para = self.doc.add_paragraph(text, style=style)
+        """添加段落；样式名对应的样式ID只查找一次（python-docx 每次设置样式都会遍历全部样式）"""
+        para = self.doc.add_paragraph(text)
+        if style is not None:
+            if style not in self._style_ids:
+                self._style_ids[style] = self.doc.part.get_style_id(style, WD_STYLE_TYPE.PARAGRAPH)
+            para._p.style = self._style_ids[style]
         return para
     
     def _add_table(self, headers, rows_data=None, num_empty_rows=3):
-        """添加表格"""
-        num_rows = len(rows_data) + 1 if rows_data else num_empty_rows + 1
-        num_cols = len(headers)
-        
-        table = self.doc.add_table(rows=num_rows, cols=num_cols)
-        table.style = 'Table Grid'
-        
-        # 设置表头
-        header_cells = table.rows[0].cells
-        for i, header in enumerate(headers):
-            header_cells[i].text = header
-            # 表头加粗 + 背景色 + 微软雅黑
-            tcPr = header_cells[i]._element.get_or_add_tcPr()
-            shd = OxmlElement('w:shd')
-            shd.set(qn('w:val'), 'clear')
-            shd.set(qn('w:color'), 'auto')
-            shd.set(qn('w:fill'), 'F2F2F2') # 浅灰色背景
-            tcPr.append(shd)
-
-            for paragraph in header_cells[i].paragraphs:
-                for run in paragraph.runs:
-                    run.font.bold = True
-                    run.font.name = '微软雅黑'
-                    run.element.rPr.rFonts.set(qn('w:eastAsia'), '微软雅黑')
-        
-        # 填充数据
-        if rows_data:
-            for i, row_data in enumerate(rows_data, start=1):
-                row_cells = table.rows[i].cells
-                for j, cell_data in enumerate(row_data):
-                    row_cells[j].text = str(cell_data)
-        
-        return table
+        """添加表格（表头加粗 + 背景色 + 微软雅黑）"""
+        rows = [headers] + [[str(cell_data) for cell_data in row_data] for row_data in rows_data or []]
+        num_rows = len(rows) if rows_data else num_empty_rows + 1
+        return self._tables.add_table(rows, num_cols=len(headers), num_rows=num_rows)
     
-    def generate(self):
+    def generate(self, quiet=False):
         """生成文档"""
-        # 标题
-        title = self.doc.add_heading(f'{self.func_name} 功能设计文档', level=0)
-        title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+        with profiling.phase("build"):
+            # 标题
+            title = self._add_heading(f'{self.func_name} 功能设计文档', level=0)
+            title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
         
-        # 添加生成信息
-        self._add_paragraph(f'生成时间：{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
-        self._add_paragraph(f'功能类型：{self._get_type_name()}')
-        self._add_paragraph('')
+            # 添加生成信息
+            self._add_paragraph(f'生成时间：{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+            self._add_paragraph(f'功能类型：{self._get_type_name()}')
+            self._add_paragraph('')
         
-        # 一、设计目的
-        self._add_section_design_purpose()
+            # 一、设计目的
+            self._add_section_design_purpose()
         
-        # 二、功能概述
-        self._add_section_overview()
+            # 二、功能概述
+            self._add_section_overview()
         
-        # 三、规则说明
-        self._add_section_rules()
+            # 三、规则说明
+            self._add_section_rules()
         
-        # 四、策划需求
-        self._add_section_requirements()
+            # 四、策划需求
+            self._add_section_requirements()
         
         # 保存文档
-        self.doc.save(self.output_path)
-        print(f"✅ 文档已生成：{self.output_path}")
+        with profiling.phase("save"):
+            _save_atomic(self.doc, self.output_path)
+        if not quiet:
+            print(f"✅ 文档已生成：{self.output_path}")
     
     def _get_type_name(self):
         """获取功能类型中文名"""
@@ -291,25 +395,191 @@ class GameDocGenerator:
         self._add_paragraph('')
 
 
-def main():
+def default_output_name(func_name):
+    return f"{func_name}_设计文档.docx"
+
+
+def read_feature_list(path):
+    """
+    读取批量生成清单（CSV / JSON / xlsx），返回 [{"name", "type", "output"}]
+
+    CSV 和 xlsx 第一行为表头，需要 name、type 列（或 功能名称、功能类型），可选 output 列
+    （或 输出路径）；JSON 为对象列表，键同上。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    elif ext in ('.xlsx', '.xlsm'):
+        import openpyxl
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = [str(v).strip() if v is not None else '' for v in next(rows, ())]
+            records = [dict(zip(header, row)) for row in rows]
+        finally:
+            wb.close()
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            records = list(csv.DictReader(f))
+    
+    features = []
+    for record in records:
+        feature = {}
+        for key, value in record.items():
+            column = MANIFEST_COLUMNS.get(str(key).strip().lower()) or MANIFEST_COLUMNS.get(str(key).strip())
+            if column and value not in (None, ''):
+                feature[column] = str(value).strip()
+        if feature.get('name'):
+            features.append(feature)
+    return features
+
+
+def _input_stamp(name, func_type):
+    """决定文档内容的输入摘要：功能名称、类型和模板/生成器版本"""
+    payload = json.dumps([name, func_type, STYLE_VERSION, GENERATOR_VERSION], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def read_stamp(path):
+    """读取文档核心属性中记录的输入摘要，不是批量生成的文档或无法读取时返回None"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            root = parse_xml(zf.read('docProps/core.xml'))
+    except (OSError, KeyError, zipfile.BadZipFile, SyntaxError):
+        return None
+    identifier = root.find(qn('dc:identifier'))
+    text = identifier.text if identifier is not None else None
+    if text and text.startswith(STAMP_PREFIX):
+        return text[len(STAMP_PREFIX):]
+    return None
+
+
+def _generate_task(name, func_type, output_path):
+    """批量生成的单个文档任务，在工作进程中执行；返回 (名称, 输出路径, 错误信息)"""
+    try:
+        generator = GameDocGenerator(name, func_type, output_path, doc=_reusable_document())
+        # 输入摘要保存在文档自身的核心属性中，不依赖缓存目录
+        generator.doc.core_properties.identifier = STAMP_PREFIX + _input_stamp(name, func_type)
+        generator.generate(quiet=True)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return name, output_path, error
+
+
+def generate_batch(manifest_path, output_dir=None, workers=None, force=False, stream=None):
+    """
+    按清单批量生成文档框架
+    
+    参数:
+        manifest_path: 清单文件（见 read_feature_list）
+        output_dir: 输出目录（默认当前目录）；清单中的 output 为相对路径时相对于该目录
+        workers: 工作进程数（默认CPU核数；为1时在当前进程中顺序执行）
+        force: 为 True 时覆盖已存在的文档，全部重新生成
+        stream: 逐个文档输出结果的流（默认stderr）
+    
+    不指定 force 时从不覆盖已存在的输出文件：文档核心属性中记录的输入摘要（功能名称、类型和
+    模板/生成器版本，见 read_stamp）与本次相同时记为跳过；不同或没有记录（输入已变化、
+    不是批量生成的文档）时保留原文件并记入 outdated，需要 force 才会重新生成。
+    
+    返回: 统计信息 {"docs", "generated", "skipped", "outdated": [(名称, 输出路径)],
+                   "failed": [(名称, 错误信息)], "seconds"}
+    """
+    stream = stream or sys.stderr
+    output_dir = output_dir or '.'
+    start = time.perf_counter()
+    features = read_feature_list(manifest_path)
+    workers = workers or os.cpu_count() or 1
+    failed = []
+    tasks = []
+    generated = []
+    skipped = 0
+    outdated = []
+    
+    for feature in features:
+        name = feature['name']
+        func_type = feature.get('type', '')
+        output_path = os.path.abspath(os.path.join(output_dir, feature.get('output') or default_output_name(name)))
+        if func_type not in FUNC_TYPES:
+            failed.append((name, f"未知的功能类型: {func_type!r}（可选 {'/'.join(FUNC_TYPES)}）"))
+            continue
+        if not force and os.path.exists(output_path):
+            if read_stamp(output_path) == _input_stamp(name, func_type):
+                skipped += 1
+            else:
+                outdated.append((name, output_path))
+                stream.write(f"⚠️ {name}: {output_path} 已存在且与本次输入不一致，未覆盖（--force 重新生成）\n")
+            continue
+        tasks.append((name, func_type, output_path))
+    
+    def report(result):
+        name, output_path, error = result
+        if error:
+            failed.append((name, error))
+            stream.write(f"❌ {name}: {error}\n")
+        else:
+            generated.append(output_path)
+            stream.write(f"✅ {output_path}\n")
+        stream.flush()
+    
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            report(_generate_task(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            futures = [executor.submit(_generate_task, *task) for task in tasks]
+            for future in as_completed(futures):
+                report(future.result())
+    
+    return {
+        "docs": len(features),
+        "generated": len(generated),
+        "skipped": skipped,
+        "outdated": outdated,
+        "failed": failed,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
     """主函数"""
     parser = argparse.ArgumentParser(description='游戏功能设计文档生成器')
-    parser.add_argument('--name', required=True, help='功能名称')
-    parser.add_argument('--type', required=True, 
-                        choices=['system', 'building', 'activity', 'other'],
+    parser.add_argument('--name', help='功能名称')
+    parser.add_argument('--type', choices=FUNC_TYPES,
                         help='功能类型：system(系统玩法)/building(建筑)/activity(活动)/other(其他)')
     parser.add_argument('--output', help='输出文件路径（可选）')
+    parser.add_argument('--manifest', help='批量生成：功能清单文件（CSV/JSON/xlsx，列为 name、type，可选 output）')
+    parser.add_argument('--output-dir', help='批量生成的输出目录（默认当前目录）')
+    parser.add_argument('--workers', type=int, default=None, help='批量生成的工作进程数（默认CPU核数）')
+    parser.add_argument('--force', action='store_true', help='批量生成时覆盖已存在的文档，全部重新生成')
+    
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    if not args.manifest and (not args.name or not args.type):
+        parser.error('需要 --name 和 --type，或使用 --manifest 批量生成')
     
-    args = parser.parse_args()
+    with profiling.session(args.profile, "generate_doc"):
+        if args.manifest:
+            stats = generate_batch(args.manifest, args.output_dir, workers=args.workers, force=args.force)
+            seconds = max(stats["seconds"], 1e-9)
+            print(f"✅ 批量生成完成：清单 {stats['docs']} 项，生成 {stats['generated']} 个，"
+                  f"跳过未变化 {stats['skipped']} 个，已存在未覆盖 {len(stats['outdated'])} 个，"
+                  f"失败 {len(stats['failed'])} 个，"
+                  f"耗时 {stats['seconds']:.2f} 秒，{stats['generated'] / seconds:.1f} 文档/秒", file=sys.stderr)
+            for name, error in stats["failed"]:
+                print(f"  ❌ {name}: {error}", file=sys.stderr)
+            return 1 if stats["failed"] else 0
     
-    # 创建生成器并生成文档
-    generator = GameDocGenerator(args.name, args.type, args.output)
-    generator.generate()
+        # 创建生成器并生成文档
+        generator = GameDocGenerator(args.name, args.type, args.output)
+        generator.generate()
     
-    print(f"\n📄 文档生成完成！")
-    print(f"📁 文件位置：{os.path.abspath(generator.output_path)}")
-    print(f"\n💡 提示：请打开文档并根据实际需求填充各章节内容。")
+        print(f"\n📄 文档生成完成！")
+        print(f"📁 文件位置：{os.path.abspath(generator.output_path)}")
+        print(f"\n💡 提示：请打开文档并根据实际需求填充各章节内容。")
+        return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析结果磁盘缓存
+
+按“文件内容哈希 + 解析参数 + 解析器版本”缓存 read_docx / read_docx_enhanced / read_xlsx
+的结构化结果。结果以 pickle + zlib 压缩的二进制格式保存，缓存总大小超过上限时按最近
+使用时间（LRU）淘汰。
+
+缓存目录默认为 ~/.cache/game_design_doc，可通过环境变量 GDD_CACHE_DIR 修改；
+大小上限默认 256MB，可通过环境变量 GDD_CACHE_MAX_MB 修改。上限包括解析结果（parse/）、
+按路径保存的清单（manifests/）和文件哈希记录（digests/），这些都可以重新生成；
+cached_bytes 保存的模板（按版本命名，体积很小）和各索引数据库不计入上限。
+
+每次写入不会都扫描缓存目录：每个进程在第一次写入时扫描一次得到总大小，之后只累加
+本进程写入的字节数，估计值超过上限时（以及每 RESCAN_INTERVAL 次写入，以计入其他进程
+的写入）才重新扫描并淘汰到上限的 EVICT_TARGET，批量解析时的扫描次数与文件数无关。
+"""
+
+import os
+import json
+import zlib
+import pickle
+import hashlib
+import tempfile
+
+import profiling
+
+# 缓存模式：use 命中则直接返回；refresh 忽略旧结果重新解析并写入；off 不读不写
+CACHE_MODES = ("use", "refresh", "off")
+
+DEFAULT_MAX_MB = 256
+
+# 参与LRU淘汰的子目录
+EVICTABLE_DIRS = ("parse", "manifests", "digests")
+
+# 淘汰时删除到上限的这一比例，留出余量，避免之后每次写入都重新扫描
+EVICT_TARGET = 0.9
+
+# 每个进程每写入这么多次重新扫描一次，计入其他进程写入的大小
+RESCAN_INTERVAL = 256
+
+# 缓存根目录 -> [本进程估计的缓存总大小, 写入次数]
+_usage = {}
+
+
+def cache_root():
+    """缓存根目录"""
+    root = os.environ.get("GDD_CACHE_DIR")
+    if not root:
+        root = os.path.join(os.path.expanduser("~"), ".cache", "game_design_doc")
+    return root
+
+
+def _max_bytes():
+    try:
+        return int(float(os.environ.get("GDD_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def _atomic_write(path, data):
+    """先写临时文件再替换，避免并发读到半个文件"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_digest(file_path):
+    """
+    计算文件内容的 SHA-256
+
+    按文件路径记录 (大小, 修改时间, 哈希)，文件未变化时直接复用，不再重新读取整个文件。
+    """
+    st = os.stat(file_path)
+    abs_path = os.path.abspath(file_path)
+    memo_path = os.path.join(cache_root(), "digests",
+                             hashlib.sha1(abs_path.encode("utf-8")).hexdigest() + ".json")
+    try:
+        with open(memo_path, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+        if memo["size"] == st.st_size and memo["mtime_ns"] == st.st_mtime_ns:
+            return memo["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    try:
+        memo = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        data = json.dumps(memo).encode("utf-8")
+        _atomic_write(memo_path, data)
+        _account(len(data))
+    except OSError:
+        pass
+    return digest
+
+
+def cache_key(kind, file_path, params):
+    """由解析类型、文件内容哈希和解析参数生成缓存键"""
+    payload = json.dumps([kind, file_digest(file_path), params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(cache_root(), "parse", key[:2], key + ".bin")
+
+
+def load(key):
+    """读取缓存结果，不存在或已损坏时返回None"""
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f, profiling.phase("cache_load"):
+            result = pickle.loads(zlib.decompress(f.read()))
+    except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    try:
+        os.utime(path)  # 记录最近使用时间，供LRU淘汰
+    except OSError:
+        pass
+    return result
+
+
+def store(key, result):
+    """写入缓存结果，并在超出大小上限时淘汰最久未使用的条目"""
+    with profiling.phase("cache_store"):
+        data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        try:
+            _atomic_write(_entry_path(key), data)
+            _account(len(data))
+        except OSError:
+            pass
+
+
+def _account(size):
+    """记录本进程写入的字节数，估计的总大小超过上限或到了重新扫描的间隔时淘汰"""
+    max_bytes = _max_bytes()
+    usage = _usage.setdefault(cache_root(), [None, 0])
+    usage[1] += 1
+    if usage[0] is not None and usage[1] % RESCAN_INTERVAL:
+        usage[0] += size
+        if usage[0] <= max_bytes:
+            return
+    usage[0] = evict(max_bytes)
+
+
+def evict(max_bytes, target=None):
+    """
+    扫描缓存目录，总大小超过 max_bytes 时按最近使用时间淘汰条目，直到不超过 target
+    （默认为 max_bytes 的 EVICT_TARGET）；返回淘汰后的总大小
+    """
+    if target is None:
+        target = int(max_bytes * EVICT_TARGET)
+    entries = []
+    total = 0
+    for sub in EVICTABLE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(cache_root(), sub)):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+    if total <= max_bytes:
+        return total
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= target:
+            break
+    return total
+
+
+def _manifest_path(kind, file_path):
+    name = hashlib.sha1(f"{kind}:{os.path.abspath(file_path)}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_root(), "manifests", name + ".bin")
+
+
+def load_manifest(kind, file_path):
+    """
+    读取按文件路径保存的清单（如增量解析的块摘要），不存在或已损坏时返回None
+
+    与解析结果不同，清单按路径而不是内容哈希保存，文件修改后仍能取到上一次的清单。
+    """
+    path = _manifest_path(kind, file_path)
+    try:
+        with open(path, "rb") as f:
+            manifest = pickle.loads(zlib.decompress(f.read()))
+    except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    try:
+        os.utime(path)  # 记录最近使用时间，供LRU淘汰
+    except OSError:
+        pass
+    return manifest
+
+
+def store_manifest(kind, file_path, manifest):
+    """保存文件路径对应的清单，覆盖上一次的内容"""
+    data = zlib.compress(pickle.dumps(manifest, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    try:
+        _atomic_write(_manifest_path(kind, file_path), data)
+        _account(len(data))
+    except OSError:
+        pass
+
+
+def cached_bytes(kind, name, build):
+    """
+    读取按名称缓存的字节数据（如预先构建的文档模板），不存在时调用 build() 生成并写入
+
+    名称中应包含版本号，内容变化时换用新名称；这类条目不参与LRU淘汰，也不计入大小上限。
+    缓存目录不可写时直接返回 build() 的结果。
+    """
+    path = os.path.join(cache_root(), kind, name)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    data = build()
+    try:
+        _atomic_write(path, data)
+    except OSError:
+        pass
+    return data
+
+
+def cached_call(kind, file_path, params, compute, mode="use"):
+    """
+    带缓存地执行解析函数
+
+    参数:
+        kind: 解析类型（如 "read_docx"），与 params 一起区分不同的解析结果
+        file_path: 被解析的文件路径
+        params: 影响解析结果的参数字典（需包含解析器版本）
+        compute: 无参函数，返回解析结果；结果包含 "error" 时不写入缓存
+        mode: use / refresh / off
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"未知的缓存模式: {mode}")
+    if mode == "off":
+        return compute()
+
+    try:
+        key = cache_key(kind, file_path, params)
+    except OSError:
+        # 文件不存在等情况交给解析函数报告错误
+        return compute()
+
+    if mode == "use":
+        result = load(key)
+        if result is not None:
+            result["file"] = file_path
+            return result
+
+    result = compute()
+    if "error" not in result:
+        store(key, result)
+    return result
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档转换流水线：读取 → 转换 → 写入
+
+把 Word 文档（或 Markdown）按统一的内部样式重新生成：读取阶段逐块解析源文档，
+转换阶段把内容项变为 Markdown 块（与 convert_md_v2.iter_blocks 相同的结构），
+写入阶段逐块写入新文档。各阶段是用迭代器串起来的生成器，中间不写临时文件，
+也不会在内存中拼出完整的 Markdown 文本；结束时报告每个阶段的处理量和耗时。
+
+用法:
+    python pipeline.py <输入.docx|.md> <输出.docx|.md> [--engine docx|stream]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+from read_docx import ENGINES, iter_docx_blocks, read_paragraph, read_table
+from convert_md_v2 import LIST_STYLES, MarkdownToDocx, iter_blocks
+
+HEADING_STYLE = re.compile(r'^Heading (\d)$')
+
+# 列表段落样式 -> (是否有序, 嵌套层级)
+LIST_STYLE_LEVELS = {name: (ordered, depth)
+                     for ordered, names in LIST_STYLES.items() for depth, name in enumerate(names)}
+
+
+class Stage:
+    """
+    流水线的一个阶段：包装一个迭代器，统计产出的项数和耗时
+
+    seconds 为从该阶段取出全部项所花的时间（包含上游阶段）；own_seconds 扣除上游，
+    只计该阶段自身的处理时间。
+    """
+
+    def __init__(self, name, items, upstream=None):
+        self.name = name
+        self.items = items
+        self.upstream = upstream
+        self.count = 0
+        self.seconds = 0.0
+
+    def __iter__(self):
+        iterator = iter(self.items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            yield item
+
+    @property
+    def own_seconds(self):
+        return self.seconds - (self.upstream.seconds if self.upstream else 0.0)
+
+
+def read_items(file_path, engine="docx"):
+    """
+    读取阶段：按文档顺序生成 ("paragraph", 样式名, 文本) 或 ("table", 行列表)
+
+    表格读取全部行；图片不会带入新文档。
+    """
+    for kind, element, style_name, images_in_para in iter_docx_blocks(file_path, engine):
+        if kind == "p":
+            style_name, text, _ = read_paragraph(element, style_name, images_in_para)
+            yield "paragraph", style_name, text
+        else:
+            yield "table", read_table(element, 0, None)["data"]
+
+
+def to_blocks(items):
+    """
+    转换阶段：把读取到的内容项变为 Markdown 块
+
+    标题样式变为对应级别的标题，列表样式保留有序/无序和嵌套层级，空段落丢弃；
+    源文档中的文字原样保留（"plain"），不把其中的 * 当作行内样式。
+    """
+    for item in items:
+        if item[0] == "table":
+            if item[1]:
+                yield {"type": "table", "rows": item[1], "plain": True}
+            continue
+        _, style_name, text = item
+        if not text:
+            continue
+        match = HEADING_STYLE.match(style_name)
+        if match:
+            yield {"type": "heading", "level": min(max(int(match.group(1)), 1), 6), "text": text}
+        elif style_name in LIST_STYLE_LEVELS:
+            ordered, depth = LIST_STYLE_LEVELS[style_name]
+            yield {"type": "list", "ordered": ordered, "depth": depth, "text": text, "plain": True}
+        else:
+            yield {"type": "paragraph", "text": text, "plain": True}
+
+
+def _table_cell(text):
+    return text.replace('\n', ' ').replace('|', '\\|')
+
+
+def markdown_lines(blocks):
+    """把 Markdown 块逐行序列化为 Markdown 文本（每次生成一行，不含换行符）；块之间空一行，连续的列表项除外"""
+    previous = None
+    for block in blocks:
+        kind = block["type"]
+        if previous is not None and not (kind == previous == "list"):
+            yield ""
+        previous = kind
+        if kind == "heading":
+            yield f"{'#' * block['level']} {block['text']}"
+        elif kind == "list":
+            marker = "1." if block["ordered"] else "-"
+            yield f"{'  ' * block['depth']}{marker} {block['text']}"
+        elif kind == "code":
+            yield f"```{block.get('lang', '')}"
+            yield from block["lines"]
+            yield "```"
+        elif kind == "table":
+            rows = block["rows"]
+            yield "| " + " | ".join(_table_cell(c) for c in rows[0]) + " |"
+            yield "| " + " | ".join(["---"] * len(rows[0])) + " |"
+            for row in rows[1:]:
+                yield "| " + " | ".join(_table_cell(c) for c in row) + " |"
+        else:
+            yield block["text"]
+
+
+def run_pipeline(input_file, output_file, engine="docx"):
+    """
+    把 input_file（.docx 或 .md）按内部样式转换为 output_file（.docx 或 .md）
+
+    返回: 各阶段统计 [{"stage", "items", "seconds"}]，seconds 为该阶段自身耗时
+    """
+    source = None
+    if input_file.lower().endswith('.md'):
+        source = open(input_file, 'r', encoding='utf-8')
+        read = Stage("read", source)
+        transform = Stage("transform", iter_blocks(read), read)
+    else:
+        if engine not in ENGINES:
+            raise ValueError(f"未知的解析引擎: {engine}")
+        read = Stage("read", read_items(input_file, engine))
+        transform = Stage("transform", to_blocks(read), read)
+
+    try:
+        start = time.perf_counter()
+        if output_file.lower().endswith('.md'):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for line in markdown_lines(transform):
+                    f.write(line + '\n')
+            save_seconds = 0.0
+        else:
+            converter = MarkdownToDocx(None, output_file)
+            for block in transform:
+                converter.render_block(block)
+            save_start = time.perf_counter()
+            converter.doc.save(output_file)
+            save_seconds = time.perf_counter() - save_start
+        write_seconds = time.perf_counter() - start - transform.seconds - save_seconds
+    finally:
+        if source is not None:
+            source.close()
+
+    return [
+        {"stage": "read", "items": read.count, "seconds": read.own_seconds},
+        {"stage": "transform", "items": transform.count, "seconds": transform.own_seconds},
+        {"stage": "write", "items": transform.count, "seconds": write_seconds},
+        {"stage": "save", "items": 1, "seconds": save_seconds},
+    ]
+
+
+def format_stats(stats):
+    lines = []
+    for stat in stats:
+        seconds = stat["seconds"]
+        rate = f"{stat['items'] / seconds:.0f} 项/秒" if seconds > 0 else "-"
+        lines.append(f"  {stat['stage']:<10} {stat['items']:>8} 项  {seconds:8.3f} 秒  {rate}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='读取 → 转换 → 写入，按内部样式重新生成文档')
+    parser.add_argument('input', help='输入文件（.docx 或 .md）')
+    parser.add_argument('output', help='输出文件（.docx 或 .md）')
+    parser.add_argument('--engine', choices=ENGINES, default='docx', help='读取Word文档的解析引擎（默认docx）')
+    args = parser.parse_args(argv)
+
+    try:
+        stats = run_pipeline(args.input, args.output, engine=args.engine)
+    except Exception as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {args.input} → {os.path.abspath(args.output)}", file=sys.stderr)
+    print(format_stats(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阶段耗时与内存统计（各脚本的 --profile）
+
+在代码中标记阶段和元素计数：
+    import profiling
+
+    with profiling.phase("load_document"):
+        doc = Document(file_path)
+    for block in profiling.iterate("parse_xml", blocks):   # 每次取下一项的耗时计入该阶段
+        profiling.count("paragraph")
+
+阶段可以嵌套，按调用时的嵌套关系记录为树（如 read_docx/blocks/parse_xml），每个阶段统计
+调用次数、累计耗时（包含下级阶段）和阶段内 tracemalloc 跟踪到的峰值内存增量。
+
+未启用时 phase() 返回共享的空上下文管理器，iterate() 原样返回迭代器，count() 直接返回，
+开销只有一次模块变量判断。命令行中用 session() 包裹整个执行过程：
+    with profiling.session(args.profile, "read_docx"):
+        ...
+
+统计只覆盖当前进程；批量模式的工作进程不在统计范围内。内存跟踪（tracemalloc）会使
+Python 代码整体变慢数倍，只关心耗时时可设置环境变量 GDD_PROFILE_MEMORY=0 关闭。
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+# 当前的统计，未启用时为None
+_active = None
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Profile:
+    """一次执行的统计：阶段（按嵌套路径）与元素计数"""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = {}        # 路径元组 -> [调用次数, 累计秒数, 峰值内存增量字节]，按首次进入的顺序
+        self.counts = Counter()
+        self.stack = []         # 进行中的阶段：[路径, 开始时间, 进入时已跟踪内存, 期间峰值]
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.peak = 0           # 整个过程中 tracemalloc 跟踪到的峰值（各阶段会重置 tracemalloc 的峰值）
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        else:
+            self.trace_memory = False
+
+    def enter(self, name):
+        path = (self.stack[-1][0] if self.stack else ()) + (name,)
+        if path not in self.phases:
+            self.phases[path] = [0, 0.0, 0]
+        current = 0
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            if self.stack:
+                # 下面会重置峰值，先把上级阶段到目前为止的峰值记下来
+                self.stack[-1][3] = max(self.stack[-1][3], peak)
+            tracemalloc.reset_peak()
+        self.stack.append([path, time.perf_counter(), current, current])
+
+    def exit(self):
+        path, start, current, peak = self.stack.pop()
+        seconds = time.perf_counter() - start
+        growth = 0
+        if self.trace_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            growth = peak - current
+            self.peak = max(self.peak, peak)
+            if self.stack:
+                self.stack[-1][3] = max(self.stack[-1][3], peak)
+        stats = self.phases[path]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], growth)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        if self.trace_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    def to_dict(self):
+        return {
+            "seconds": round(self.seconds, 6) if self.seconds is not None else None,
+            "peak_traced_kb": self.peak // 1024 if self.trace_memory else None,
+            "phases": [{
+                "phase": "/".join(path),
+                "calls": calls,
+                "seconds": round(seconds, 6),
+                "peak_traced_kb": growth // 1024 if self.trace_memory else None,
+            } for path, (calls, seconds, growth) in self.phases.items()],
+            "counts": dict(self.counts),
+        }
+
+
+class _Phase:
+    __slots__ = ("profile", "name")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.exit()
+        return False
+
+
+def enabled():
+    return _active is not None
+
+
+def phase(name):
+    """阶段上下文管理器；未启用时返回共享的空对象"""
+    if _active is None:
+        return _NULL_PHASE
+    return _Phase(_active, name)
+
+
+def count(name, n=1):
+    """元素计数（段落、表格、行等）"""
+    if _active is not None:
+        _active.counts[name] += n
+
+
+def iterate(name, iterable):
+    """逐项计时的迭代器：每次取下一项的耗时计入阶段 name；未启用时原样返回 iterable"""
+    if _active is None:
+        return iterable
+    return _timed_iter(name, iterable)
+
+
+def _timed_iter(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class _TimedReader:
+    """文件对象代理：read() 的耗时计入阶段（用于统计压缩包成员的解压时间）"""
+
+    def __init__(self, name, fileobj):
+        self._name = name
+        self._fileobj = fileobj
+
+    def read(self, *args):
+        with phase(self._name):
+            return self._fileobj.read(*args)
+
+    def __getattr__(self, attr):
+        return getattr(self._fileobj, attr)
+
+
+def reader(name, fileobj):
+    """read() 计时的文件对象；未启用时原样返回 fileobj"""
+    if _active is None:
+        return fileobj
+    return _TimedReader(name, fileobj)
+
+
+def start(trace_memory=True):
+    """开始统计（已在统计时返回当前的统计）"""
+    global _active
+    if _active is None:
+        _active = Profile(trace_memory)
+    return _active
+
+
+def stop():
+    """结束统计并返回结果"""
+    global _active
+    profile, _active = _active, None
+    if profile is not None:
+        while profile.stack:
+            profile.exit()
+        profile.finish()
+    return profile
+
+
+def format_report(profile, format_type="text"):
+    """格式化统计结果：text 为按嵌套缩进的阶段表，json 见 Profile.to_dict"""
+    data = profile.to_dict()
+    if format_type == "json":
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    total = max(profile.seconds or 0.0, 1e-9)
+    # 中文标题每个字占两列，格式宽度相应减少
+    lines = [f"{'阶段':<36}{'次数':>6}{'耗时(秒)':>10}{'占比':>7}{'峰值内存(KB)':>10}"]
+    for path, (calls, seconds, growth) in profile.phases.items():
+        name = "  " * (len(path) - 1) + path[-1]
+        memory = f"{growth // 1024}" if profile.trace_memory else "-"
+        lines.append(f"{name:<38}{calls:>8}{seconds:>12.4f}{seconds / total:>9.1%}{memory:>14}")
+    lines.append(f"总耗时 {profile.seconds:.4f} 秒" +
+                 (f"，tracemalloc 峰值 {profile.peak // 1024} KB" if profile.trace_memory else ""))
+    if profile.counts:
+        lines.append("元素计数: " + "，".join(f"{name} {n}" for name, n in profile.counts.most_common()))
+    return "\n".join(lines)
+
+
+@contextmanager
+def session(format_type, name, stream=None):
+    """
+    命令行的统计范围：format_type 为 text/json 时启用，结束时把报告写到 stream（默认标准错误）；
+    为 None 时不做任何事。name 为最外层阶段名（通常为脚本名）。
+    """
+    if not format_type:
+        yield None
+        return
+    profile = start(trace_memory=os.environ.get("GDD_PROFILE_MEMORY") != "0")
+    try:
+        with phase(name):
+            yield profile
+    finally:
+        stop()
+        (stream or sys.stderr).write(format_report(profile, format_type) + "\n")
+
+
+def add_argument(parser):
+    """为命令行添加 --profile（文本报告）和 --profile-json（JSON）参数，结果保存在 args.profile"""
+    parser.add_argument('--profile', action='store_const', const='text', default=None,
+                        help='在标准错误输出各阶段的耗时、调用次数、峰值内存和元素计数')
+    parser.add_argument('--profile-json', action='store_const', const='json', dest='profile',
+                        help='同 --profile，以JSON格式输出')
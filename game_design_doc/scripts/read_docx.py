@@ -5,60 +5,706 @@
 import sys
 import json
 import os
+import glob
+import time
+import io
+import struct
+import hashlib
+import tempfile
+import argparse
+import zipfile
+import posixpath
+import difflib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from lxml import etree
 from docx import Document
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
-from docx.table import Table
 from docx.text.paragraph import Paragraph
 from docx.oxml import parse_xml
 from docx.oxml.ns import qn
+from docx.styles import BabelFish
+import parse_cache
+import profiling
 
-def extract_images(doc, output_dir=None):
-    """提取文档中的所有图片"""
-    images = []
+# 流式引擎使用的标签名（Clark记法），避免在循环中反复拼接
+W_BODY = qn('w:body')
+W_P = qn('w:p')
+W_TBL = qn('w:tbl')
+W_TR = qn('w:tr')
+W_TC = qn('w:tc')
+W_TC_PR = qn('w:tcPr')
+W_GRID_SPAN = qn('w:gridSpan')
+W_VMERGE = qn('w:vMerge')
+W_R = qn('w:r')
+W_T = qn('w:t')
+W_TAB = qn('w:tab')
+W_PTAB = qn('w:ptab')
+W_BR = qn('w:br')
+W_CR = qn('w:cr')
+W_NO_BREAK_HYPHEN = qn('w:noBreakHyphen')
+W_HYPERLINK = qn('w:hyperlink')
+W_VAL = qn('w:val')
+WP_INLINE = qn('wp:inline')
+WP_ANCHOR = qn('wp:anchor')
+A_BLIP = qn('a:blip')
+R_EMBED = qn('r:embed')
+
+# 嵌入式（wp:inline）和浮动（wp:anchor）图片中的 a:blip，预编译后整篇文档只遍历一次
+IMAGE_BLIP_XPATH = etree.XPath(
+    './/wp:inline//a:blip | .//wp:anchor//a:blip',
+    namespaces={
+        'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing',
+        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    })
+
+# 可选引擎：docx 使用 python-docx 对象模型；stream 直接流式解析 word/document.xml
+ENGINES = ("docx", "stream")
+
+# 解析逻辑变化导致输出不同时递增，使旧的缓存结果失效
+PARSER_VERSION = 3
+
+# 图片按块流式读取，单块大小；读取尺寸时最多检查的文件头字节数
+IMAGE_CHUNK_SIZE = 1024 * 1024
+IMAGE_HEAD_BYTES = 256 * 1024
+# 图片元数据字段，同一图片被多个关系引用时直接复用
+IMAGE_META_KEYS = ("sha256", "size", "width", "height", "stored_path", "saved_path")
+
+def _image_dimensions(head):
+    """从图片文件头解析宽高（支持PNG/GIF/BMP/JPEG），无法识别时返回 (None, None)"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and len(head) >= 24:
+        return struct.unpack('>II', head[16:24])
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        return struct.unpack('<HH', head[6:10])
+    if head.startswith(b'BM') and len(head) >= 26:
+        width, height = struct.unpack('<ii', head[18:26])
+        return width, abs(height)
+    if head.startswith(b'\xff\xd8'):
+        pos = 2
+        while pos + 9 < len(head):
+            if head[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = head[pos + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                pos += 1 if marker == 0xFF else 2
+                continue
+            seg_len = struct.unpack('>H', head[pos + 2:pos + 4])[0]
+            # SOF0-SOF15（不含 DHT/JPG/DAC）携带图片尺寸
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', head[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + seg_len
+    return None, None
+
+def _scan_image(src, out=None):
+    """分块读取图片数据流，计算SHA-256并可选写入 out，返回 (哈希, 字节数, 文件头)"""
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    while True:
+        chunk = src.read(IMAGE_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+        if len(head) < IMAGE_HEAD_BYTES:
+            head += chunk[:IMAGE_HEAD_BYTES - len(head)]
+        if out is not None:
+            out.write(chunk)
+    return digest.hexdigest(), size, head
+
+def _link_image(stored_path, image_path):
+    """在输出目录中以原文件名硬链接到内容寻址存储中的文件，失败时返回False"""
+    try:
+        if os.path.exists(image_path):
+            if os.path.samefile(stored_path, image_path):
+                return True
+            os.remove(image_path)
+        os.link(stored_path, image_path)
+        return True
+    except OSError:
+        return False
+
+def _save_image(open_src, image_data, output_dir, store_dir, metadata_only):
+    """
+    读取一张图片的元数据，并按需写入内容寻址存储
+
+    open_src 每次调用返回一个新的可读数据流。先只计算哈希；存储中已有相同内容时
+    不再写入，直接建立硬链接（无法建立时在结果中引用存储路径）。
+    """
+    with open_src() as src:
+        digest, size, head = _scan_image(src)
+    width, height = _image_dimensions(head)
+    image_data.update({"sha256": digest, "size": size, "width": width, "height": height})
+    if metadata_only or not output_dir:
+        return image_data
+
+    stored_path = os.path.join(store_dir, f"{digest}.{image_data['type'].lower()}")
+    if not os.path.exists(stored_path):
+        fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out, open_src() as src:
+                _scan_image(src, out)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, stored_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    image_path = os.path.join(output_dir, image_data["filename"])
+    image_data["stored_path"] = stored_path
+    image_data["saved_path"] = image_path if _link_image(stored_path, image_path) else stored_path
+    return image_data
+
+def _prepare_image_dirs(output_dir, store_dir, metadata_only):
+    """创建图片输出目录与内容寻址存储目录（默认为输出目录下的 .store）"""
+    if metadata_only or not output_dir:
+        return None
+    store_dir = store_dir or os.path.join(output_dir, ".store")
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+
+def extract_images(doc, output_dir=None, store_dir=None, metadata_only=False, image_ids=None):
+    """
+    提取文档中的所有图片
     
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    参数:
+        doc: python-docx 文档对象
+        output_dir: 图片保存目录（默认None，不保存）
+        store_dir: 内容寻址存储目录，图片按SHA-256命名，相同内容只保存一次；
+                   output_dir 中的原文件名是指向它的硬链接。默认为 output_dir/.store，
+                   批量处理多个文档时传入同一个目录即可跨文档去重
+        metadata_only: 只输出大小、尺寸和哈希，不写出图片
+        image_ids: 只提取关系ID在其中的图片（默认None，全部提取）
+    """
+    images = []
+    store_dir = _prepare_image_dirs(output_dir, store_dir, metadata_only)
+    seen = {}  # 同一图片部件被多个关系引用时只处理一次
     
     # 遍历文档中的所有关系（包括图片）
     for rel in doc.part.rels.values():
-        if "image" in rel.target_ref:
+        if "image" in rel.target_ref and (image_ids is None or rel.rId in image_ids):
             image_data = {
                 "id": rel.rId,
                 "filename": os.path.basename(rel.target_ref),
                 "type": rel.target_ref.split('.')[-1]
             }
             
-            # 如果指定了输出目录，保存图片
-            if output_dir:
-                image_path = os.path.join(output_dir, image_data["filename"])
-                with open(image_path, 'wb') as f:
-                    f.write(rel.target_part.blob)
-                image_data["saved_path"] = image_path
+            # 如果指定了输出目录或需要元数据，读取图片数据
+            if (output_dir or metadata_only) and not rel.is_external:
+                part = rel.target_part
+                if part.partname in seen:
+                    image_data.update(seen[part.partname])
+                else:
+                    _save_image(lambda: io.BytesIO(part.blob), image_data, output_dir, store_dir, metadata_only)
+                    seen[part.partname] = {k: image_data[k] for k in IMAGE_META_KEYS if k in image_data}
             
             images.append(image_data)
     
     return images
 
+def _owning_block(blip, body_tag=W_BODY):
+    """返回 blip 所在的 body 直接子元素（段落或表格），以及它是否位于图片绘图对象中"""
+    in_drawing = False
+    node = blip
+    parent = node.getparent()
+    while parent is not None:
+        if node.tag == WP_INLINE or node.tag == WP_ANCHOR:
+            in_drawing = True
+        if parent.tag == body_tag:
+            return node, in_drawing
+        node, parent = parent, parent.getparent()
+    return None, in_drawing
+
+def build_image_index(body):
+    """
+    单次遍历文档 body，建立 {body子元素: [图片关系ID, ...]} 索引
+    
+    同时覆盖嵌入式（wp:inline）和浮动（wp:anchor）图片；之后查询某个段落的图片只需一次字典查找。
+    """
+    index = {}
+    for blip in IMAGE_BLIP_XPATH(body):
+        embed_id = blip.get(R_EMBED)
+        if not embed_id:
+            continue
+        owner, _ = _owning_block(blip, body.tag)
+        if owner is not None:
+            index.setdefault(owner, []).append(embed_id)
+    return index
+
 def find_images_in_paragraph(para):
-    """查找段落中的图片"""
-    images_in_para = []
+    """查找段落中的图片（包括嵌入式和浮动图片）"""
+    return [blip.get(R_EMBED) for blip in IMAGE_BLIP_XPATH(para._p) if blip.get(R_EMBED)]
+
+def _paragraph_item(style_name, text, images_in_para):
+    """根据段落样式、文本和图片生成内容项，空段落返回None"""
+    # 判断是否为标题
+    if style_name.startswith('Heading'):
+        content_item = {
+            "type": "heading",
+            "level": style_name,
+            "text": text if text else "[空标题]"
+        }
+        if images_in_para:
+            content_item["has_images"] = True
+            content_item["image_ids"] = images_in_para
+        return content_item
+    elif text or images_in_para:  # 只添加有文本或有图片的段落
+        content_item = {
+            "type": "paragraph",
+            "text": text if text else "[段落仅含图片]"
+        }
+        if images_in_para:
+            content_item["has_images"] = True
+            content_item["image_ids"] = images_in_para
+            content_item["text"] = text if text else f"[图片段落，包含{len(images_in_para)}张图片]"
+        return content_item
+    return None
+
+# 表格默认读取的行数
+TABLE_ROW_LIMIT = 30
+
+def _table_item(row_count, col_count, rows, offset=0, limit=TABLE_ROW_LIMIT, header=None):
+    """
+    根据表格行列数和读取到的行生成表格内容项
     
-    # 查找drawing元素（图片通常在这里）
-    for run in para.runs:
-        for drawing in run.element.findall('.//wp:inline', 
-                                          {'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'}):
-            # 查找图片的blip元素
-            blip = drawing.find('.//a:blip', 
-                               {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-            if blip is not None:
-                embed_id = blip.get(qn('r:embed'))
-                if embed_id:
-                    images_in_para.append(embed_id)
+    offset > 0（分页读取后续行）时附加 row_offset 和表头行 header，便于单独展示这一页。
+    """
+    table_data = {
+        "type": "table",
+        "rows": row_count,
+        "cols": col_count,
+        "data": rows
+    }
+    if offset:
+        table_data["row_offset"] = offset
+        table_data["header"] = header or []
+        if rows:
+            table_data["note"] = f"表格共{row_count}行，显示第{offset + 1}-{offset + len(rows)}行"
+        else:
+            table_data["note"] = f"表格共{row_count}行，第{offset + 1}行起没有数据"
+    elif limit is not None and row_count > limit:
+        table_data["note"] = f"表格共{row_count}行，仅显示前{limit}行"
+    return table_data
+
+def _run_text(r):
+    """与 python-docx 的 Run.text 一致：w:t 原文，w:tab/w:ptab 为制表符，换行类元素为换行"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            # 仅文本换行（默认类型）转为换行，分页/分栏符为空
+            if child.get(qn('w:type'), 'textWrapping') == 'textWrapping':
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+def _paragraph_text(p):
+    """与 python-docx 的 Paragraph.text 一致：拼接直接子级 w:r 与 w:hyperlink 中的文本"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child if r.tag == W_R)
+    return "".join(parts)
+
+def _paragraph_style_id(p):
+    """读取段落的 w:pPr/w:pStyle 样式ID，没有时返回None"""
+    pPr = p.find(qn('w:pPr'))
+    if pPr is None:
+        return None
+    pStyle = pPr.find(qn('w:pStyle'))
+    if pStyle is None:
+        return None
+    return pStyle.get(W_VAL)
+
+def _cell_text(tc):
+    """与 python-docx 的 _Cell.text 一致：单元格直接子段落文本以换行连接"""
+    return "\n".join(_paragraph_text(p) for p in tc if p.tag == W_P)
+
+def _tc_merge(tc):
+    """读取单元格的合并属性：(跨列数 gridSpan, 是否为纵向合并的后续单元格)"""
+    span = 1
+    is_continue = False
+    for tcPr in tc.iterchildren(W_TC_PR):
+        # tcPr 只有少量子元素，直接遍历比多次 find 更快
+        for prop in tcPr:
+            if prop.tag == W_GRID_SPAN:
+                span = int(prop.get(W_VAL))
+            elif prop.tag == W_VMERGE:
+                is_continue = prop.get(W_VAL, 'continue') == 'continue'
+        break
+    return span, is_continue
+
+def _grid_before(tr):
+    trPr = tr.find(qn('w:trPr'))
+    if trPr is None:
+        return 0
+    before = trPr.find(qn('w:gridBefore'))
+    return 0 if before is None else int(before.get(W_VAL))
+
+def iter_table_rows(tbl, offset=0, limit=None):
+    """
+    逐行生成表格的单元格文本，直接遍历 w:tr/w:tc，不构建 python-docx 的行/单元格对象
+    
+    合并单元格的展开方式与 python-docx 的 row.cells 相同：横向合并（gridSpan）的单元格重复对应次数，
+    纵向合并（vMerge）的后续单元格沿用起始单元格的内容。合并关系在一次线性遍历中解析，
+    offset 之前的行只记录合并关系、不读取文本；limit 为None时读取到表格末尾。
+    """
+    end = None if limit is None else offset + limit
+    above = {}  # 网格列偏移 -> 上一行该位置的起始单元格 [tc, 跨列数, 文本缓存]
+    for row_idx, tr in enumerate(tbl.iterchildren(W_TR)):
+        if end is not None and row_idx >= end:
+            return
+        current = {}
+        cells = []
+        grid_offset = _grid_before(tr)
+        for tc in tr.iterchildren(W_TC):
+            span, is_continue = _tc_merge(tc)
+            if is_continue and grid_offset in above:
+                origin = above[grid_offset]
+            else:
+                origin = [tc, span, None]
+            current[grid_offset] = origin
+            cells.append(origin)
+            grid_offset += span
+        above = current
+        
+        if row_idx >= offset:
+            row_data = []
+            for origin in cells:
+                if origin[2] is None:
+                    origin[2] = _cell_text(origin[0]).strip()
+                row_data.extend([origin[2]] * origin[1])
+            yield row_data
+
+def _read_table_element(tbl, offset=0, limit=TABLE_ROW_LIMIT):
+    """读取表格元素为内容项，只取第 offset 行起的 limit 行（limit 为None时不限）"""
+    row_count = sum(1 for _ in tbl.iterchildren(W_TR))
+    grid = tbl.find(qn('w:tblGrid'))
+    col_count = 0 if grid is None else len(grid.findall(qn('w:gridCol')))
+    
+    rows = list(iter_table_rows(tbl, offset, limit))
+    header = next(iter_table_rows(tbl, 0, 1), []) if offset else None
+    profiling.count("table_row", len(rows))
+    return _table_item(row_count, col_count, rows, offset, limit, header)
+
+def _load_paragraph_styles(zf):
+    """从 word/styles.xml 读取段落样式ID到界面样式名的映射，以及默认段落样式名"""
+    styles = {}
+    default_name = None
+    try:
+        root = etree.fromstring(zf.read('word/styles.xml'))
+    except KeyError:
+        return styles, default_name
+
+    for style in root.iterfind(qn('w:style')):
+        if style.get(qn('w:type')) != 'paragraph':
+            continue
+        name_el = style.find(qn('w:name'))
+        name = None if name_el is None else BabelFish.internal2ui(name_el.get(W_VAL))
+        styles[style.get(qn('w:styleId'))] = name
+        if style.get(qn('w:default')) in ('1', 'true', 'on') and default_name is None:
+            default_name = name
+    return styles, default_name
+
+def _load_document_rels(zf):
+    """读取 word/_rels/document.xml.rels 中的关系，按文件中的顺序返回"""
+    try:
+        root = etree.fromstring(zf.read('word/_rels/document.xml.rels'))
+    except KeyError:
+        return []
+    return [rel for rel in root if rel.get('Id')]
+
+def extract_images_from_zip(zf, output_dir=None, store_dir=None, metadata_only=False, image_ids=None):
+    """
+    流式引擎版本的图片提取，直接读取压缩包中的关系与媒体文件
     
-    return images_in_para
+    图片数据从压缩包成员分块流式写出，不会整体读入内存；参数含义同 extract_images。
+    """
+    images = []
+    store_dir = _prepare_image_dirs(output_dir, store_dir, metadata_only)
+    seen = {}
 
-def read_docx(file_path, max_paragraphs=300, max_tables=50, extract_images_flag=True, image_output_dir=None):
+    for rel in _load_document_rels(zf):
+        target_ref = rel.get('Target', '')
+        if "image" in target_ref and (image_ids is None or rel.get('Id') in image_ids):
+            image_data = {
+                "id": rel.get('Id'),
+                "filename": os.path.basename(target_ref),
+                "type": target_ref.split('.')[-1]
+            }
+
+            if (output_dir or metadata_only) and rel.get('TargetMode') != 'External':
+                member = posixpath.normpath(posixpath.join('word', target_ref)).lstrip('/')
+                if member in seen:
+                    image_data.update(seen[member])
+                else:
+                    _save_image(lambda: zf.open(member), image_data, output_dir, store_dir, metadata_only)
+                    seen[member] = {k: image_data[k] for k in IMAGE_META_KEYS if k in image_data}
+
+            images.append(image_data)
+
+    return images
+
+def iter_body_elements(zf, image_index=None):
+    """
+    使用 lxml iterparse 流式遍历 word/document.xml 中 body 下的段落和表格
+
+    每个元素在调用方处理完（生成器恢复）后立即清除，内存占用与文档长度无关；
+    调用方提前停止迭代时，剩余的XML不会再被解析。
+
+    传入 image_index 字典时，在同一次解析中把图片关系ID登记到所属的 body 子元素下
+    （与 build_image_index 的结果相同），调用方处理该元素时直接查询即可。
+    """
+    tags = (W_P, W_TBL) if image_index is None else (W_P, W_TBL, A_BLIP)
+    with zf.open('word/document.xml') as xml_file:
+        for _, elem in etree.iterparse(profiling.reader("unzip", xml_file), events=('end',), tag=tags):
+            if elem.tag == A_BLIP:
+                embed_id = elem.get(R_EMBED)
+                owner, in_drawing = _owning_block(elem)
+                if embed_id and in_drawing and owner is not None:
+                    image_index.setdefault(owner, []).append(embed_id)
+                continue
+            parent = elem.getparent()
+            if parent is None or parent.tag != W_BODY:
+                continue  # 表格单元格等内部的段落随外层表格一起处理
+            yield elem
+            if image_index is not None:
+                image_index.pop(elem, None)
+            elem.clear()
+            # 删除已处理的前序兄弟节点（包括 w:sdt 等未被处理的元素）
+            while elem.getprevious() is not None:
+                del parent[0]
+
+def iter_docx_blocks(file_path, engine="docx", doc=None):
+    """
+    按文档顺序生成 body 下的块：(类型, 元素, 段落样式名, 段落图片ID列表)
+    
+    类型为 "p"（段落）或 "tbl"（表格），表格的样式名为None。
+    docx 引擎使用 python-docx 解析样式（可传入已打开的 doc）；stream 引擎流式解析压缩包中的XML，
+    调用方停止迭代时解析随即停止。
+    """
+    if engine == "stream":
+        with zipfile.ZipFile(file_path) as zf:
+            with profiling.phase("load_styles"):
+                styles, default_style = _load_paragraph_styles(zf)
+            image_index = {}
+            for element in iter_body_elements(zf, image_index):
+                if element.tag == W_P:
+                    style_id = _paragraph_style_id(element)
+                    style_name = styles.get(style_id, default_style) if style_id else default_style
+                    yield "p", element, style_name or "", image_index.get(element, [])
+                else:
+                    yield "tbl", element, None, []
+    elif engine == "docx":
+        doc = doc if doc is not None else Document(file_path)
+        with profiling.phase("image_index"):
+            image_index = build_image_index(doc.element.body)
+        # 段落样式名只取决于 pStyle，按样式ID缓存，避免每段都查找默认样式
+        style_names = {}
+        for element in doc.element.body:
+            if isinstance(element, CT_P):
+                style_id = _paragraph_style_id(element)
+                if style_id not in style_names:
+                    with profiling.phase("style_lookup"):
+                        style_names[style_id] = Paragraph(element, doc).style.name
+                yield "p", element, style_names[style_id], image_index.get(element, [])
+            elif isinstance(element, CT_Tbl):
+                yield "tbl", element, None, []
+    else:
+        raise ValueError(f"未知的解析引擎: {engine}")
+
+def read_document_images(file_path, engine="docx", doc=None, output_dir=None, store_dir=None, metadata_only=False,
+                         image_ids=None):
+    """按解析引擎提取图片：docx 引擎使用已打开的文档，stream 引擎直接读取压缩包；image_ids 见 extract_images"""
+    with profiling.phase("images"):
+        if engine == "docx":
+            images = extract_images(doc if doc is not None else Document(file_path), output_dir, store_dir,
+                                    metadata_only, image_ids)
+        else:
+            with zipfile.ZipFile(file_path) as zf:
+                images = extract_images_from_zip(zf, output_dir, store_dir, metadata_only, image_ids)
+    profiling.count("image", len(images))
+    return images
+
+# 增量解析清单在缓存目录中的类别名
+MANIFEST_KIND = "docx_blocks"
+
+def _zip_members(file_path):
+    """压缩包各成员的 (CRC, 大小)，只读取目录，不解压"""
+    with zipfile.ZipFile(file_path) as zf:
+        return {info.filename: (info.CRC, info.file_size) for info in zf.infolist()}
+
+def _block_digest(element):
+    return hashlib.blake2b(etree.tostring(element), digest_size=16).digest()
+
+class BlockManifest:
+    """
+    增量解析清单：记录每个 body 块（段落/表格）XML 的摘要及其解析结果，以及压缩包各成员的 CRC
+    
+    所有成员（包括 document.xml）的 CRC 都与上次相同、且上次读完了整个文档时，直接按上次的块列表
+    重放（见 iter_blocks），不再解压和解析XML；只有 document.xml 变化时，摘要与上次相同的块复用上次的
+    结果，但每个块仍要序列化并计算摘要，纯文字文档与完整解析的耗时相当；其他成员（样式、关系、图片等）
+    变化时全部重新解析。清单按文件路径保存在解析缓存目录中（见 parse_cache.store_manifest），
+    并保留上次的块列表供 diff 使用。
+    """
+    
+    def __init__(self, file_path, engine, table_offset=0, table_limit=TABLE_ROW_LIMIT):
+        self.file_path = file_path
+        self.table_offset = table_offset
+        self.table_limit = table_limit
+        self.params = {
+            "version": PARSER_VERSION,
+            "engine": engine,
+            "table_offset": table_offset,
+            "table_limit": table_limit,
+        }
+        self.members = _zip_members(file_path)
+        
+        previous = parse_cache.load_manifest(MANIFEST_KIND, file_path)
+        if previous is not None and previous.get("params") != self.params:
+            previous = None
+        self.previous = previous
+        self.reusable = previous is not None and self._parts(previous["members"]) == self._parts(self.members)
+        # 文档完全没有变化，上次的块列表可以原样重放
+        self.unchanged = (self.reusable and previous.get("complete", False)
+                          and previous["members"].get('word/document.xml') == self.members.get('word/document.xml'))
+        self.known = {digest: value for digest, _, value in previous["blocks"]} if self.reusable else {}
+        self.blocks = []
+        self.complete = False
+        self.image_list = None
+        self.reused = 0
+        self.parsed = 0
+    
+    @staticmethod
+    def _parts(members):
+        return {name: crc for name, crc in members.items() if name != 'word/document.xml'}
+    
+    def iter_blocks(self, file_path, engine, doc=None):
+        """
+        与 iter_docx_blocks 相同的块序列；文档未变化时重放上次的块，元素位置为块摘要（bytes），
+        传给 paragraph/table 时直接按摘要取上次的结果
+        """
+        if not self.unchanged:
+            yield from iter_docx_blocks(file_path, engine, doc)
+            return
+        for digest, kind, value in self.previous["blocks"]:
+            if kind == "p":
+                yield "p", digest, value[0], value[2]
+            else:
+                yield "tbl", digest, None, []
+    
+    def _block(self, kind, element, compute):
+        digest = element if isinstance(element, bytes) else _block_digest(element)
+        value = self.known.get(digest)
+        if value is None:
+            value = compute()
+            self.parsed += 1
+        else:
+            self.reused += 1
+        self.blocks.append((digest, kind, value))
+        return value
+    
+    def paragraph(self, element, style_name, images_in_para):
+        """段落的 (样式名, 文本, 图片ID列表)"""
+        return self._block("p", element,
+                           lambda: (style_name, _paragraph_text(element).strip(), images_in_para))
+    
+    def table(self, element):
+        """表格内容项（见 _read_table_element）"""
+        return self._block("tbl", element,
+                           lambda: _read_table_element(element, self.table_offset, self.table_limit))
+    
+    def images(self, metadata_only, compute):
+        """图片列表：除 document.xml 外没有成员变化时复用上次的结果"""
+        previous = self.previous.get("images") if self.reusable else None
+        if previous is not None and previous[0] == metadata_only:
+            self.image_list = previous
+        else:
+            self.image_list = (metadata_only, compute())
+        return self.image_list[1]
+    
+    def save(self, complete=False):
+        """保存清单；complete 表示本次读完了整个文档（没有因段落/表格上限提前停止）"""
+        self.complete = complete
+        images = self.image_list
+        if images is None and self.reusable:
+            images = self.previous.get("images")
+        parse_cache.store_manifest(MANIFEST_KIND, self.file_path, {
+            "params": self.params,
+            "members": self.members,
+            "blocks": self.blocks,
+            "complete": complete,
+            "images": images,
+        })
+    
+    def diff(self):
+        """
+        与上次的块列表比较，返回新增、删除、修改的内容项
+        
+        index 为内容项在本次（删除项为上次）content 中的位置；不产生内容项的空段落不参与比较。
+        上次的清单没有读完整个文档时 baseline_complete 为False，其后的内容都会记为新增。
+        """
+        old = _block_items(self.previous["blocks"]) if self.previous else []
+        new = _block_items(self.blocks)
+        result = {"baseline": self.previous is not None,
+                  "baseline_complete": self.previous is None or self.previous.get("complete", False),
+                  "complete": self.complete,
+                  "added": [], "removed": [], "changed": [], "unchanged": 0}
+        matcher = difflib.SequenceMatcher(None, [d for d, _ in old], [d for d, _ in new], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                result["unchanged"] += i2 - i1
+                continue
+            paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+            for k in range(paired):
+                result["changed"].append({"index": j1 + k, "before": old[i1 + k][1], "after": new[j1 + k][1]})
+            for i in range(i1 + paired, i2):
+                result["removed"].append({"index": i, "item": old[i][1]})
+            for j in range(j1 + paired, j2):
+                result["added"].append({"index": j, "item": new[j][1]})
+        return result
+
+def _block_items(blocks):
+    """把清单中的块转换为 read_docx 的内容项 [(摘要, 内容项)]，跳过空段落"""
+    items = []
+    for digest, kind, value in blocks:
+        item = _paragraph_item(*value) if kind == "p" else value
+        if item:
+            items.append((digest, item))
+    return items
+
+def read_paragraph(element, style_name, images_in_para, manifest=None):
+    """段落的 (样式名, 文本, 图片ID列表)；传入增量清单时复用未修改段落的结果"""
+    profiling.count("paragraph")
+    with profiling.phase("paragraph"):
+        if manifest is None:
+            return style_name, _paragraph_text(element).strip(), images_in_para
+        return manifest.paragraph(element, style_name, images_in_para)
+
+def read_table(element, offset=0, limit=TABLE_ROW_LIMIT, manifest=None):
+    """表格内容项；传入增量清单时复用未修改表格的结果（分页参数以清单为准）"""
+    profiling.count("table")
+    with profiling.phase("table"):
+        if manifest is None:
+            return _read_table_element(element, offset, limit)
+        return manifest.table(element)
+
+def read_docx(file_path, max_paragraphs=300, max_tables=50, extract_images_flag=True, image_output_dir=None,
+              engine="docx", cache="off", image_store_dir=None, image_metadata_only=False,
+              table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, incremental=False):
     """
     读取Word文档并输出为结构化格式
     
@@ -68,14 +714,63 @@ def read_docx(file_path, max_paragraphs=300, max_tables=50, extract_images_flag=
         max_tables: 最大读取表格数（默认50）
         extract_images_flag: 是否提取图片（默认True）
         image_output_dir: 图片保存目录（默认None，不保存）
+        engine: 解析引擎，docx（python-docx，默认）或 stream（lxml流式解析，
+                超过 max_paragraphs/max_tables 时立即停止解析）
+        cache: 解析缓存模式 use/refresh/off（默认off，见 parse_cache）；
+               指定 image_output_dir 时需要实际写出图片，不使用缓存
+        image_store_dir: 图片内容寻址存储目录（默认 image_output_dir/.store，见 extract_images）
+        image_metadata_only: 只输出图片的大小、尺寸和哈希，不写出图片
+        table_index: 只读取第几个表格（从1开始），content 中只包含该表格，读到后立即停止解析
+        table_offset: 每个表格从第几行开始读取（从0开始，默认0）
+        table_limit: 每个表格最多读取的行数（默认30，None表示不限）
+        incremental: 增量解析，只重新解析上次读取后修改过的段落和表格（见 BlockManifest）；
+                     table_index 模式下不使用
     """
+    def compute():
+        manifest = None
+        if incremental and table_index is None:
+            manifest = BlockManifest(file_path, engine, table_offset, table_limit)
+        return _read_docx(file_path, max_paragraphs, max_tables, extract_images_flag, image_output_dir, engine,
+                          image_store_dir, image_metadata_only, table_index, table_offset, table_limit,
+                          manifest)
+    
+    if image_output_dir:
+        return compute()
+    params = {
+        "version": PARSER_VERSION,
+        "engine": engine,
+        "max_paragraphs": max_paragraphs,
+        "max_tables": max_tables,
+        "extract_images": extract_images_flag,
+        "image_metadata_only": image_metadata_only,
+        "table_index": table_index,
+        "table_offset": table_offset,
+        "table_limit": table_limit,
+    }
+    return parse_cache.cached_call("read_docx", file_path, params, compute, mode=cache)
+
+def _read_docx(file_path, max_paragraphs, max_tables, extract_images_flag, image_output_dir, engine,
+               image_store_dir=None, image_metadata_only=False,
+               table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, manifest=None):
+    """read_docx 的实际解析过程（不经过缓存）；manifest 为增量解析清单（可选），解析完成后保存"""
     try:
-        doc = Document(file_path)
+        if engine not in ENGINES:
+            raise ValueError(f"未知的解析引擎: {engine}")
+        doc = None
+        if engine == "docx" and not (manifest is not None and manifest.unchanged):
+            with profiling.phase("load_document"):
+                doc = Document(file_path)
         
         # 提取所有图片
         all_images = []
         if extract_images_flag:
-            all_images = extract_images(doc, image_output_dir)
+            def extract():
+                return read_document_images(file_path, engine, doc, image_output_dir,
+                                            image_store_dir, image_metadata_only)
+            if manifest is not None and not image_output_dir:
+                all_images = manifest.images(image_metadata_only, extract)
+            else:
+                all_images = extract()
         
         result = {
             "file": file_path,
@@ -86,75 +781,58 @@ def read_docx(file_path, max_paragraphs=300, max_tables=50, extract_images_flag=
         
         para_count = 0
         table_count = 0
+        complete = True
         
-        for element in doc.element.body:
+        blocks = iter_docx_blocks(file_path, engine, doc) if manifest is None else manifest.iter_blocks(
+            file_path, engine, doc)
+        for kind, element, style_name, images_in_para in profiling.iterate("blocks", blocks):
+            # 只读取指定表格：跳过其他内容，读到后停止
+            if table_index is not None:
+                if kind == "tbl":
+                    table_count += 1
+                    if table_count == table_index:
+                        result["content"].append(_read_table_element(element, table_offset, table_limit))
+                        break
+                continue
+            
             # 读取段落
-            if isinstance(element, CT_P):
-                if para_count >= max_paragraphs:
+            if kind == "p":
+                if max_paragraphs is not None and para_count >= max_paragraphs:
                     result["content"].append({
                         "type": "note",
                         "text": f"... 已省略剩余段落（超过{max_paragraphs}个）"
                     })
+                    complete = False
                     break
                 
-                para = Paragraph(element, doc)
-                text = para.text.strip()
-                
-                # 检查段落中是否有图片
-                images_in_para = find_images_in_paragraph(para)
-                
-                # 判断是否为标题
-                if para.style.name.startswith('Heading'):
-                    content_item = {
-                        "type": "heading",
-                        "level": para.style.name,
-                        "text": text if text else "[空标题]"
-                    }
-                    if images_in_para:
-                        content_item["has_images"] = True
-                        content_item["image_ids"] = images_in_para
-                    result["content"].append(content_item)
-                elif text or images_in_para:  # 只添加有文本或有图片的段落
-                    content_item = {
-                        "type": "paragraph",
-                        "text": text if text else "[段落仅含图片]"
-                    }
-                    if images_in_para:
-                        content_item["has_images"] = True
-                        content_item["image_ids"] = images_in_para
-                        content_item["text"] = text if text else f"[图片段落，包含{len(images_in_para)}张图片]"
+                content_item = _paragraph_item(*read_paragraph(element, style_name, images_in_para, manifest))
+                if content_item:
                     result["content"].append(content_item)
                 
                 para_count += 1
             
             # 读取表格
-            elif isinstance(element, CT_Tbl):
-                if table_count >= max_tables:
+            else:
+                if max_tables is not None and table_count >= max_tables:
                     result["content"].append({
                         "type": "note",
                         "text": f"... 已省略剩余表格（超过{max_tables}个）"
                     })
+                    complete = False
                     break
                 
-                table = Table(element, doc)
-                table_data = {
-                    "type": "table",
-                    "rows": len(table.rows),
-                    "cols": len(table.columns),
-                    "data": []
-                }
-                
-                # 读取表格内容（最多30行）
-                for row_idx, row in enumerate(table.rows[:30]):
-                    row_data = [cell.text.strip() for cell in row.cells]
-                    table_data["data"].append(row_data)
-                
-                if len(table.rows) > 30:
-                    table_data["note"] = f"表格共{len(table.rows)}行，仅显示前30行"
-                
-                result["content"].append(table_data)
+                result["content"].append(read_table(element, table_offset, table_limit, manifest))
                 table_count += 1
         
+        if manifest is not None:
+            manifest.save(complete)
+        
+        if table_index is not None and not result["content"]:
+            result["content"].append({
+                "type": "note",
+                "text": f"未找到第{table_index}个表格（文档共{table_count}个表格）"
+            })
+        
         return result
         
     except Exception as e:
@@ -163,6 +841,64 @@ def read_docx(file_path, max_paragraphs=300, max_tables=50, extract_images_flag=
             "file": file_path
         }
 
+def diff_docx(file_path, max_paragraphs=None, max_tables=None, engine="docx",
+              table_offset=0, table_limit=TABLE_ROW_LIMIT):
+    """
+    与上次增量解析（read_docx 的 incremental 或上次 diff）时的文档比较，只返回变化的内容
+    
+    默认比较全部段落和表格；指定 max_paragraphs/max_tables 时只比较上限以内的部分，complete 为False。
+    返回 {"file", "baseline", "baseline_complete", "complete", "added", "removed", "changed", "unchanged"}：
+    baseline 为False表示没有可比较的上次结果（此时全部内容都记为新增）；baseline_complete 为False表示
+    上次只读取了文档的前一部分（受段落/表格上限限制），其后的内容都会记为新增；
+    比较后清单更新为当前版本，下次 diff 与本次比较。其余参数含义同 read_docx。
+    """
+    try:
+        manifest = BlockManifest(file_path, engine, table_offset, table_limit)
+    except Exception as e:
+        return {"error": str(e), "file": file_path}
+    data = _read_docx(file_path, max_paragraphs, max_tables, False, None, engine,
+                      table_offset=table_offset, table_limit=table_limit, manifest=manifest)
+    if "error" in data:
+        return data
+    return dict({"file": file_path}, **manifest.diff())
+
+def _diff_item_text(item):
+    if item["type"] == "table":
+        return f"表格 {item['rows']}行 × {item['cols']}列"
+    label = item["level"] if item["type"] == "heading" else item["type"]
+    return f"[{label}] {item['text']}"
+
+def format_diff(data, format_type="markdown"):
+    """格式化 diff_docx 的结果"""
+    if "error" in data:
+        return f"错误: {data['error']}"
+    if format_type == "json":
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    
+    output = [f"# Word文档变化: {os.path.basename(data['file'])}\n"]
+    if not data["baseline"]:
+        output.append("*没有上次的解析记录，全部内容记为新增*\n")
+    elif not data["baseline_complete"]:
+        output.append("*⚠️ 上次解析受段落/表格上限限制只读取了文档的前一部分，其后的内容记为新增*\n")
+    if not data["complete"]:
+        output.append("*⚠️ 本次只比较了段落/表格上限以内的内容，之后的修改不会列出*\n")
+    output.append(f"新增 {len(data['added'])}，删除 {len(data['removed'])}，"
+                  f"修改 {len(data['changed'])}，未变化 {data['unchanged']}\n")
+    for title, key in (("新增", "added"), ("删除", "removed")):
+        if data[key]:
+            output.append(f"## {title}\n")
+            for entry in data[key]:
+                output.append(f"- #{entry['index']} {_diff_item_text(entry['item'])}")
+            output.append("")
+    if data["changed"]:
+        output.append("## 修改\n")
+        for entry in data["changed"]:
+            output.append(f"- #{entry['index']}")
+            output.append(f"  - 原: {_diff_item_text(entry['before'])}")
+            output.append(f"  - 新: {_diff_item_text(entry['after'])}")
+        output.append("")
+    return "\n".join(output)
+
 def format_output(data, format_type="markdown"):
     """
     格式化输出
@@ -212,14 +948,16 @@ def format_output(data, format_type="markdown"):
             elif item["type"] == "table":
                 output.append(f"\n**表格** ({item['rows']}行 × {item['cols']}列):\n")
                 
-                if len(item["data"]) > 0:
+                # 分页读取时使用单独保存的表头，data 全部为数据行
+                rows = [item["header"]] + item["data"] if "header" in item else item["data"]
+                if len(rows) > 0:
                     # 表头
-                    header = item["data"][0]
+                    header = rows[0]
                     output.append("| " + " | ".join(header) + " |")
                     output.append("| " + " | ".join(["---"] * len(header)) + " |")
                     
                     # 数据行
-                    for row in item["data"][1:]:
+                    for row in rows[1:]:
                         output.append("| " + " | ".join(row) + " |")
                 
                 if "note" in item:
@@ -230,15 +968,153 @@ def format_output(data, format_type="markdown"):
         
         return "\n".join(output)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("用法: python read_docx.py <word文件路径> [输出格式:json|markdown] [图片保存目录]")
-        sys.exit(1)
+def collect_docx_files(pattern):
+    """把目录（递归查找）或通配符展开为排序后的 .docx 文件列表，跳过 Word 临时文件"""
+    if os.path.isdir(pattern):
+        paths = glob.glob(os.path.join(pattern, '**', '*.docx'), recursive=True)
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(p for p in paths
+                  if p.lower().endswith('.docx') and not os.path.basename(p).startswith('~$')
+                  and os.path.isfile(p))
+
+def _batch_record(file_path, format_type, options, image_output_dir=None):
+    """批量模式的单个文件任务：读取并格式化为一行JSON记录，在工作进程中执行"""
+    start = time.perf_counter()
+    data = read_docx(file_path, image_output_dir=image_output_dir, **options)
+    if "error" in data:
+        record = data
+    elif format_type == "json":
+        record = data
+    else:
+        record = {"file": file_path, format_type: format_output(data, format_type)}
+    line = json.dumps(record, ensure_ascii=False)
+    return line, "error" not in data, time.perf_counter() - start
+
+def read_docx_batch(pattern, format_type="json", workers=None, ordered=True, stream=None, image_dir=None, **options):
+    """
+    批量读取目录或通配符匹配的所有Word文档，每个文档输出一行JSON（JSON Lines）
+    
+    参数:
+        pattern: 目录（递归查找 .docx）或通配符，如 "docs/**/*.docx"
+        format_type: json 时每行是 read_docx 的结果；markdown 时每行为 {"file", "markdown"}
+        workers: 工作进程数（默认CPU核数；为1时在当前进程中顺序执行）
+        ordered: True 按文件路径顺序输出；False 按完成顺序输出
+        stream: 输出流（默认stdout）
+        image_dir: 图片保存根目录（可选）。每个文档的图片保存到其下以文档相对路径命名的子目录，
+                   所有文档共用 image_dir/.store 内容寻址存储，重复图片只保存一次
+        options: 传给 read_docx 的其他参数（engine、cache 等）
+    
+    返回: 统计信息 {"files", "failed", "seconds", "bytes"}
+    """
+    stream = stream or sys.stdout
+    files = collect_docx_files(pattern)
+    workers = workers or os.cpu_count() or 1
+    total_bytes = sum(os.path.getsize(p) for p in files)
+    failed = 0
+    start = time.perf_counter()
+    
+    image_dirs = [None] * len(files)
+    if image_dir and files:
+        # 以目录（或所有匹配文件的公共上级目录）为基准，保留文档的相对路径
+        if os.path.isdir(pattern):
+            base = os.path.abspath(pattern)
+        else:
+            base = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in files])
+        image_dirs = [os.path.join(image_dir, os.path.splitext(os.path.relpath(os.path.abspath(p), base))[0])
+                      for p in files]
+        options = dict(options, image_store_dir=os.path.join(image_dir, ".store"))
+    
+    def emit(line, ok):
+        stream.write(line + "\n")
+        stream.flush()
+        return 0 if ok else 1
     
-    file_path = sys.argv[1]
-    format_type = sys.argv[2] if len(sys.argv) > 2 else "markdown"
-    image_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    if workers == 1 or len(files) <= 1:
+        for path, path_image_dir in zip(files, image_dirs):
+            line, ok, _ = _batch_record(path, format_type, options, path_image_dir)
+            failed += emit(line, ok)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            futures = [executor.submit(_batch_record, path, format_type, options, path_image_dir)
+                       for path, path_image_dir in zip(files, image_dirs)]
+            for future in (futures if ordered else as_completed(futures)):
+                line, ok, _ = future.result()
+                failed += emit(line, ok)
+    
+    return {
+        "files": len(files),
+        "failed": failed,
+        "seconds": time.perf_counter() - start,
+        "bytes": total_bytes,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='读取Word文档内容，包括图片提取')
+    parser.add_argument('file', help='Word文件路径（--batch 时为目录或通配符）')
+    parser.add_argument('format', nargs='?', default='markdown', help='输出格式: json|markdown（默认markdown）')
+    parser.add_argument('image_dir', nargs='?', default=None, help='图片保存目录（可选）')
+    parser.add_argument('--engine', choices=ENGINES, default='docx',
+                        help='解析引擎：docx（python-docx，默认）或 stream（lxml流式解析，大文档更快）')
+    parser.add_argument('--cache', choices=parse_cache.CACHE_MODES, default='use',
+                        help='解析缓存：use（命中则直接返回，默认）/refresh（重新解析并更新缓存）/off（不使用缓存）')
+    parser.add_argument('--image-store', default=None,
+                        help='图片内容寻址存储目录，相同图片只保存一次（默认为图片保存目录下的 .store）')
+    parser.add_argument('--image-metadata', action='store_true',
+                        help='只输出图片的大小、尺寸和哈希，不写出图片')
+    parser.add_argument('--table', type=int, default=None, dest='table_index',
+                        help='只读取第N个表格（从1开始），读到后立即停止解析')
+    parser.add_argument('--table-offset', type=int, default=0, help='表格从第几行开始读取（从0开始，默认0）')
+    parser.add_argument('--table-limit', type=int, default=TABLE_ROW_LIMIT,
+                        help=f'每个表格最多读取的行数（默认{TABLE_ROW_LIMIT}，0表示不限）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量解析：只重新解析上次读取后修改过的段落和表格，其余复用上次结果')
+    parser.add_argument('--diff', action='store_true',
+                        help='只输出与上次增量解析（或上次 --diff）相比新增、删除、修改的段落和表格（默认比较全部内容）')
+    parser.add_argument('--max-paragraphs', type=int, default=None,
+                        help='--diff 时最多比较的段落数（默认不限，超出时结果标记为不完整）')
+    parser.add_argument('--max-tables', type=int, default=None,
+                        help='--diff 时最多比较的表格数（默认不限，超出时结果标记为不完整）')
+    parser.add_argument('--batch', action='store_true',
+                        help='批量模式：读取目录或通配符匹配的所有文档，每个文档输出一行JSON')
+    parser.add_argument('--workers', type=int, default=None, help='批量模式的工作进程数（默认CPU核数）')
+    parser.add_argument('--unordered', action='store_true', help='批量模式按完成顺序输出（默认按文件顺序）')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    table_options = {
+        "table_index": args.table_index,
+        "table_offset": args.table_offset,
+        "table_limit": args.table_limit or None,
+    }
     
-    data = read_docx(file_path, extract_images_flag=True, image_output_dir=image_dir)
-    output = format_output(data, format_type)
-    print(output)
+    with profiling.session(args.profile, "read_docx"):
+        if args.batch:
+            if args.image_store:
+                parser.error('批量模式固定使用 <图片保存目录>/.store 作为共享存储')
+            stats = read_docx_batch(args.file, args.format, workers=args.workers, ordered=not args.unordered,
+                                    image_dir=args.image_dir, engine=args.engine, cache=args.cache,
+                                    image_metadata_only=args.image_metadata, incremental=args.incremental,
+                                    **table_options)
+            seconds = max(stats["seconds"], 1e-9)
+            print(f"✅ 批量读取完成：{stats['files']} 个文件，失败 {stats['failed']} 个，"
+                  f"耗时 {stats['seconds']:.2f} 秒，{stats['files'] / seconds:.1f} 文件/秒，"
+                  f"{stats['bytes'] / 1024 / 1024 / seconds:.1f} MB/秒", file=sys.stderr)
+            return
+        
+        if args.diff:
+            data = diff_docx(args.file, args.max_paragraphs, args.max_tables, engine=args.engine,
+                             table_offset=args.table_offset, table_limit=table_options["table_limit"])
+            with profiling.phase("format_output"):
+                output = format_diff(data, args.format)
+            print(output)
+            return
+        
+        data = read_docx(args.file, extract_images_flag=True, image_output_dir=args.image_dir, engine=args.engine,
+                         cache=args.cache, image_store_dir=args.image_store, image_metadata_only=args.image_metadata,
+                         incremental=args.incremental, **table_options)
+        with profiling.phase("format_output"):
+            output = format_output(data, args.format)
+        print(output)
+
+if __name__ == "__main__":
+    main()
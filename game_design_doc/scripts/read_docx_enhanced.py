@@ -2,65 +2,248 @@
 # -*- coding: utf-8 -*-
 """读取和解析Word文档内容，包括图片提取和上下文关联"""
 
+import re
 import sys
 import json
 import os
 import io
+import zipfile
+import argparse
+from collections import deque
 from docx import Document
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import Table
-from docx.text.paragraph import Paragraph
-from docx.oxml.ns import qn
+from read_docx import (ENGINES, TABLE_ROW_LIMIT, W_P, BlockManifest, iter_body_elements, iter_docx_blocks,
+                       read_document_images, read_paragraph, read_table, _load_paragraph_styles,
+                       _paragraph_style_id, _paragraph_text, _read_table_element, _zip_members)
+import parse_cache
+import profiling
+from content_model import ContentItem, Heading, Paragraph, Table
+
+# 解析逻辑或缓存的结果格式变化时递增，使旧的缓存结果失效
+PARSER_VERSION = 4
+
+# 标题大纲在缓存目录中的类别名；大纲结构变化时递增 OUTLINE_VERSION
+OUTLINE_KIND = "docx_outline"
+OUTLINE_VERSION = 1
+
+HEADING_LEVEL = re.compile(r'(\d+)$')
+SECTION_NUMBER = re.compile(r'^\d+(\.\d+)*$')
 
 # 设置标准输出为UTF-8编码
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-def extract_images(doc, output_dir=None):
-    """提取文档中的所有图片"""
-    images = []
-    
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+def _paragraph_content_item(style_name, text, images_in_para, index):
+    """段落转换为内容项（见 content_model），空段落返回None"""
+    if style_name.startswith('Heading'):
+        return Heading(style_name, text if text else "[空标题]", images_in_para, index)
+    if text or images_in_para:
+        return Paragraph(text if text else "[仅含图片的段落]", images_in_para, index)
+    return None
+
+def _iter_items(file_path, max_paragraphs, max_tables, engine, doc=None,
+                table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, manifest=None, block_range=None):
+    """
+    按文档顺序逐个生成内容项（尚未附加上下文）；manifest 为增量解析清单，遍历结束后保存
+
+    block_range 为 (起, 止)，只读取 body 块序号在 [起, 止) 内的段落和表格，读到止处即停止解析。
+    """
+    para_count = 0
+    table_count = 0
+    index = 0
+    complete = True
     
-    for rel in doc.part.rels.values():
-        if "image" in rel.target_ref:
-            image_data = {
-                "id": rel.rId,
-                "filename": os.path.basename(rel.target_ref),
-                "type": rel.target_ref.split('.')[-1]
-            }
+    blocks = iter_docx_blocks(file_path, engine, doc) if manifest is None else manifest.iter_blocks(
+        file_path, engine, doc)
+    for block_no, (kind, element, style_name, images_in_para) in enumerate(profiling.iterate("blocks", blocks)):
+        if block_range is not None:
+            if block_no < block_range[0]:
+                continue
+            if block_no >= block_range[1]:
+                break
+        
+        # 只读取指定表格：跳过其他内容，读到后停止
+        if table_index is not None:
+            if kind == "tbl":
+                table_count += 1
+                if table_count == table_index:
+                    yield Table.from_dict(_read_table_element(element, table_offset, table_limit), index)
+                    break
+            continue
+        
+        if kind == "p":
+            if para_count >= max_paragraphs:
+                complete = False
+                break
             
-            if output_dir:
-                image_path = os.path.join(output_dir, image_data["filename"])
-                with open(image_path, 'wb') as f:
-                    f.write(rel.target_part.blob)
-                image_data["saved_path"] = image_path
+            item = _paragraph_content_item(*read_paragraph(element, style_name, images_in_para, manifest), index)
+            if item is not None:
+                index += 1
+                yield item
             
-            images.append(image_data)
+            para_count += 1
+        
+        else:
+            if table_count >= max_tables:
+                complete = False
+                break
+            
+            yield Table.from_dict(read_table(element, table_offset, table_limit, manifest), index)
+            index += 1
+            table_count += 1
     
-    return images
+    if manifest is not None:
+        manifest.save(complete)
 
-def find_images_in_paragraph(para):
-    """查找段落中的图片ID"""
-    images_in_para = []
+def _with_context(items, context_before, context_after):
+    """
+    为包含图片的内容项附加上下文，单次遍历完成
+
+    使用长度为 context_before 的环形缓冲区保存已输出的内容项，
+    并预读 context_after 个内容项作为后文，内存占用与文档长度无关。
+    上下文只引用相邻标题/段落的上下文条目，不复制文字（见 content_model.Paragraph.set_context）。
+    """
+    history = deque(maxlen=context_before)
+    pending = deque()
+    
+    def emit(item):
+        if item.has_images:
+            with profiling.phase("context"):
+                item.set_context([ctx for ctx in history if isinstance(ctx, Paragraph)],
+                                 [pending[i] for i in range(min(context_after, len(pending)))
+                                  if isinstance(pending[i], Paragraph)])
+        if context_before:
+            history.append(item)
+        return item
+    
+    for item in items:
+        pending.append(item)
+        if len(pending) > context_after:
+            yield emit(pending.popleft())
+    
+    while pending:
+        yield emit(pending.popleft())
+
+def _iter_content(file_path, max_paragraphs=500, max_tables=50,
+                  context_before=2, context_after=2, engine="docx", doc=None,
+                  table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, manifest=None,
+                  block_range=None):
+    """iter_docx_enhanced 的内部版本：生成 content_model 的内容项，输出时才转换为字典"""
+    items = _iter_items(file_path, max_paragraphs, max_tables, engine, doc,
+                        table_index, table_offset, table_limit, manifest, block_range)
+    yield from _with_context(items, context_before, context_after)
+
+def iter_docx_enhanced(file_path, max_paragraphs=500, max_tables=50,
+                       context_before=2, context_after=2, engine="docx", doc=None,
+                       table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, manifest=None,
+                       block_range=None):
+    """
+    逐个生成文档内容项（含图片上下文）的生成器
     
-    for run in para.runs:
-        for drawing in run.element.findall('.//wp:inline', 
-                                          {'wp': 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'}):
-            blip = drawing.find('.//a:blip', 
-                               {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-            if blip is not None:
-                embed_id = blip.get(qn('r:embed'))
-                if embed_id:
-                    images_in_para.append(embed_id)
+    参数同 read_docx_enhanced；doc 为已打开的 python-docx 文档（可选，仅 docx 引擎使用）；
+    manifest 为增量解析清单（read_docx.BlockManifest，可选），完整遍历后保存；
+    block_range 为只读取的 body 块范围 (起, 止)（见 scan_outline 中章节的 start/end）。
+    内存占用只与上下文窗口大小有关，适合配合 write_output 边解析边输出。
+    """
+    for item in _iter_content(file_path, max_paragraphs, max_tables, context_before, context_after, engine, doc,
+                              table_index, table_offset, table_limit, manifest, block_range):
+        yield item.to_dict()
+
+def _heading_level(style_name):
+    """标题样式名中的级别数字（Heading 2 -> 2），没有数字时为1"""
+    match = HEADING_LEVEL.search(style_name)
+    return int(match.group(1)) if match else 1
+
+def scan_outline(file_path):
+    """
+    预扫描文档的标题大纲：流式遍历 body 块，只读取段落样式，标题段落才提取文字
     
-    return images_in_para
+    返回: 按文档顺序排列的标题列表，每项为
+        {"number": 章节编号（如 "3.2"）, "level": 标题级别, "text": 标题文字,
+         "start": 起始块序号, "end": 结束块序号, "images": 章节内的图片关系ID}
+    块序号为段落和表格在 body 中的顺序（与 iter_docx_blocks 一致），章节范围 [start, end)
+    从标题本身开始，到下一个同级或更高级标题之前结束，包含所有下级章节。
+    """
+    outline = []
+    open_sections = []  # 尚未结束的章节，由外到内
+    counters = []
+    block_no = -1
+    with zipfile.ZipFile(file_path) as zf, profiling.phase("scan_outline"):
+        styles, default_style = _load_paragraph_styles(zf)
+        image_index = {}
+        for block_no, element in enumerate(iter_body_elements(zf, image_index)):
+            if element.tag == W_P:
+                style_id = _paragraph_style_id(element)
+                style_name = (styles.get(style_id, default_style) if style_id else default_style) or ""
+                if style_name.startswith('Heading'):
+                    level = _heading_level(style_name)
+                    while open_sections and open_sections[-1]["level"] >= level:
+                        open_sections.pop()["end"] = block_no
+                    depth = len(open_sections)
+                    del counters[depth + 1:]
+                    if len(counters) == depth:
+                        counters.append(0)
+                    counters[depth] += 1
+                    section = {
+                        "number": ".".join(str(n) for n in counters),
+                        "level": level,
+                        "text": _paragraph_text(element).strip() or "[空标题]",
+                        "start": block_no,
+                        "end": None,
+                        "images": [],
+                    }
+                    outline.append(section)
+                    open_sections.append(section)
+            images = image_index.get(element)
+            if images:
+                for section in open_sections:
+                    section["images"].extend(images)
+    for section in open_sections:
+        section["end"] = block_no + 1
+    return outline
+
+def load_outline(file_path, cache="use"):
+    """
+    文档的标题大纲（见 scan_outline）
+    
+    大纲按文件路径保存在解析缓存目录中（见 parse_cache.store_manifest），压缩包各成员的CRC
+    都未变化时直接复用，不再扫描文档；cache 为 refresh 时重新扫描，off 时不读不写。
+    """
+    members = _zip_members(file_path)
+    if cache == "use":
+        saved = parse_cache.load_manifest(OUTLINE_KIND, file_path)
+        if saved is not None and saved.get("version") == OUTLINE_VERSION and saved.get("members") == members:
+            return saved["outline"]
+    outline = scan_outline(file_path)
+    if cache != "off":
+        parse_cache.store_manifest(OUTLINE_KIND, file_path,
+                                   {"version": OUTLINE_VERSION, "members": members, "outline": outline})
+    return outline
+
+def find_section(outline, query):
+    """
+    在大纲中查找章节：按编号（如 3 或 3.2）、标题全文、标题包含的文字依次匹配，
+    返回第一个匹配的章节，找不到时返回None
+    """
+    query = query.strip()
+    if SECTION_NUMBER.match(query):
+        for section in outline:
+            if section["number"] == query:
+                return section
+    for section in outline:
+        if section["text"] == query:
+            return section
+    for section in outline:
+        if query in section["text"]:
+            return section
+    return None
 
 def read_docx_enhanced(file_path, max_paragraphs=500, max_tables=50, 
                       context_before=2, context_after=2, 
-                      extract_images_flag=True, image_output_dir=None):
+                      extract_images_flag=True, image_output_dir=None,
+                      engine="docx", lazy=False, cache="off",
+                      image_store_dir=None, image_metadata_only=False,
+                      table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, incremental=False,
+                      section=None):
     """
     增强版Word文档读取，提取图片及其上下文
     
@@ -72,110 +255,129 @@ def read_docx_enhanced(file_path, max_paragraphs=500, max_tables=50,
         context_after: 图片后的上下文段落数
         extract_images_flag: 是否提取图片
         image_output_dir: 图片保存目录
+        engine: 解析引擎，docx（默认）或 stream（lxml流式解析）
+        lazy: 为True时 content 为生成器（见 iter_docx_enhanced），按需解析
+        cache: 解析缓存模式 use/refresh/off（默认off，见 parse_cache）；
+               指定 image_output_dir 时不使用缓存。lazy 模式下生成器完整遍历后才写入缓存
+        image_store_dir: 图片内容寻址存储目录（默认 image_output_dir/.store，见 read_docx.extract_images）
+        image_metadata_only: 只输出图片的大小、尺寸和哈希，不写出图片
+        table_index: 只读取第几个表格（从1开始），读到后立即停止解析
+        table_offset: 每个表格从第几行开始读取（从0开始，默认0）
+        table_limit: 每个表格最多读取的行数（默认30，None表示不限）
+        incremental: 增量解析，只重新解析上次读取后修改过的段落和表格（与 read_docx 共用清单，
+                     见 read_docx.BlockManifest）；table_index 和 section 模式下不使用
+        section: 只读取指定章节（编号如 "3.2" 或标题文字，见 find_section）及其下级章节，
+                 章节结束后停止解析，只提取章节内的图片；章节范围来自标题大纲（见 load_outline）
+    
+    返回 {"file", "total_images", "images", "content"}，content 中每项为字典（lazy 时逐项生成字典）；
+    出错时返回 {"error", "file"}
     """
+    return _dict_content(_read_docx_enhanced(
+        file_path, max_paragraphs, max_tables, context_before, context_after, extract_images_flag, image_output_dir,
+        engine, lazy, cache, image_store_dir, image_metadata_only, table_index, table_offset, table_limit,
+        incremental, section))
+
+def _dict_content(data):
+    """把结果中的内容项转换为字典（生成器则逐项转换），不修改缓存中的原结果"""
+    if "content" not in data:
+        return data
+    if isinstance(data["content"], list):
+        return dict(data, content=[item.to_dict() for item in data["content"]])
+    return dict(data, content=(item.to_dict() for item in data["content"]))
+
+def _read_docx_enhanced(file_path, max_paragraphs=500, max_tables=50,
+                        context_before=2, context_after=2,
+                        extract_images_flag=True, image_output_dir=None,
+                        engine="docx", lazy=False, cache="off",
+                        image_store_dir=None, image_metadata_only=False,
+                        table_index=None, table_offset=0, table_limit=TABLE_ROW_LIMIT, incremental=False,
+                        section=None):
+    """
+    read_docx_enhanced 的实际解析过程：content 中为 content_model 的内容项（解析缓存中也保存内容项），
+    命令行输出时直接格式化，不先转换为字典
+    """
+    if cache not in parse_cache.CACHE_MODES:
+        raise ValueError(f"未知的缓存模式: {cache}")
+    key = None
+    if cache != "off" and not image_output_dir:
+        params = {
+            "version": PARSER_VERSION,
+            "engine": engine,
+            "max_paragraphs": max_paragraphs,
+            "max_tables": max_tables,
+            "context_before": context_before,
+            "context_after": context_after,
+            "extract_images": extract_images_flag,
+            "image_metadata_only": image_metadata_only,
+            "table_index": table_index,
+            "table_offset": table_offset,
+            "table_limit": table_limit,
+            "section": section,
+        }
+        try:
+            key = parse_cache.cache_key("read_docx_enhanced", file_path, params)
+        except OSError:
+            key = None
+        if key and cache == "use":
+            result = parse_cache.load(key)
+            if result is not None:
+                result["file"] = file_path
+                return result
+    
     try:
-        doc = Document(file_path)
+        if engine not in ENGINES:
+            raise ValueError(f"未知的解析引擎: {engine}")
         
-        # 提取所有图片
-        all_images = []
-        if extract_images_flag:
-            all_images = extract_images(doc, image_output_dir)
+        selected = None
+        block_range = None
+        image_ids = None
+        if section is not None:
+            selected = find_section(load_outline(file_path, cache), section)
+            if selected is None:
+                raise ValueError(f"未找到章节: {section}")
+            block_range = (selected["start"], selected["end"])
+            image_ids = set(selected["images"])
         
-        # 第一遍：收集所有内容
-        all_content = []
-        para_count = 0
-        table_count = 0
+        manifest = None
+        if incremental and table_index is None and section is None:
+            manifest = BlockManifest(file_path, engine, table_offset, table_limit)
         
-        for element in doc.element.body:
-            if isinstance(element, CT_P):
-                if para_count >= max_paragraphs:
-                    break
-                    
-                para = Paragraph(element, doc)
-                text = para.text.strip()
-                images_in_para = find_images_in_paragraph(para)
-                
-                if para.style.name.startswith('Heading'):
-                    all_content.append({
-                        "type": "heading",
-                        "level": para.style.name,
-                        "text": text if text else "[空标题]",
-                        "has_images": len(images_in_para) > 0,
-                        "image_ids": images_in_para,
-                        "index": len(all_content)
-                    })
-                elif text or images_in_para:
-                    all_content.append({
-                        "type": "paragraph",
-                        "text": text if text else "[仅含图片的段落]",
-                        "has_images": len(images_in_para) > 0,
-                        "image_ids": images_in_para,
-                        "index": len(all_content)
-                    })
-                
-                para_count += 1
-            
-            elif isinstance(element, CT_Tbl):
-                if table_count >= max_tables:
-                    break
-                
-                table = Table(element, doc)
-                table_data = {
-                    "type": "table",
-                    "rows": len(table.rows),
-                    "cols": len(table.columns),
-                    "data": [],
-                    "index": len(all_content)
-                }
-                
-                for row_idx, row in enumerate(table.rows[:30]):
-                    row_data = [cell.text.strip() for cell in row.cells]
-                    table_data["data"].append(row_data)
-                
-                if len(table.rows) > 30:
-                    table_data["note"] = f"表格共{len(table.rows)}行，仅显示前30行"
-                
-                all_content.append(table_data)
-                table_count += 1
+        # 文档未变化时按清单重放，不需要打开文档
+        doc = None
+        if engine == "docx" and not (manifest is not None and manifest.unchanged):
+            with profiling.phase("load_document"):
+                doc = Document(file_path)
         
-        # 第二遍：为包含图片的段落添加上下文
-        for item in all_content:
-            if item.get("has_images"):
-                idx = item["index"]
-                
-                # 提取前面的上下文
-                context_before_items = []
-                start_idx = max(0, idx - context_before)
-                for i in range(start_idx, idx):
-                    ctx_item = all_content[i]
-                    if ctx_item["type"] in ["heading", "paragraph"]:
-                        context_before_items.append({
-                            "type": ctx_item["type"],
-                            "text": ctx_item["text"],
-                            "level": ctx_item.get("level")
-                        })
-                
-                # 提取后面的上下文
-                context_after_items = []
-                end_idx = min(len(all_content), idx + context_after + 1)
-                for i in range(idx + 1, end_idx):
-                    ctx_item = all_content[i]
-                    if ctx_item["type"] in ["heading", "paragraph"]:
-                        context_after_items.append({
-                            "type": ctx_item["type"],
-                            "text": ctx_item["text"],
-                            "level": ctx_item.get("level")
-                        })
-                
-                item["context_before"] = context_before_items
-                item["context_after"] = context_after_items
+        # 提取所有图片（指定章节时只提取章节内的图片）
+        all_images = []
+        if extract_images_flag:
+            def extract():
+                return read_document_images(file_path, engine, doc, image_output_dir,
+                                            image_store_dir, image_metadata_only, image_ids)
+            if manifest is not None and not image_output_dir:
+                all_images = manifest.images(image_metadata_only, extract)
+            else:
+                all_images = extract()
+        
+        content = _iter_content(file_path, max_paragraphs, max_tables,
+                                context_before, context_after, engine=engine, doc=doc,
+                                table_index=table_index, table_offset=table_offset, table_limit=table_limit,
+                                manifest=manifest, block_range=block_range)
         
         result = {
             "file": file_path,
             "total_images": len(all_images),
             "images": all_images,
-            "content": all_content
         }
+        if selected is not None:
+            result["section"] = {key: selected[key] for key in ("number", "level", "text")}
+        result["content"] = content if lazy else list(content)
+        
+        if key:
+            if lazy:
+                result["content"] = _store_when_exhausted(key, result, content)
+            else:
+                parse_cache.store(key, result)
         
         return result
         
@@ -185,97 +387,238 @@ def read_docx_enhanced(file_path, max_paragraphs=500, max_tables=50,
             "file": file_path
         }
 
-def format_output(data, format_type="markdown", show_context=True):
-    """格式化输出"""
-    if "error" in data:
-        return f"错误: {data['error']}"
+def _indent_json(value, indent):
+    """序列化为缩进JSON，并把续行整体右移 indent 个空格（用于嵌套在外层对象中）"""
+    return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + " " * indent)
+
+def _iter_json(data):
+    """逐块生成与 json.dumps(data, indent=2) 完全相同的文本，content 可以是生成器"""
+    keys = list(data)
+    yield "{"
+    for key_idx, key in enumerate(keys):
+        yield f"\n  {json.dumps(key, ensure_ascii=False)}: "
+        if key == "content":
+            empty = True
+            for item in data[key]:
+                if isinstance(item, ContentItem):
+                    item = item.to_dict()
+                yield ("[\n    " if empty else ",\n    ") + _indent_json(item, 4)
+                empty = False
+            yield "[]" if empty else "\n  ]"
+        else:
+            yield _indent_json(data[key], 2)
+        if key_idx < len(keys) - 1:
+            yield ","
+    yield "\n}"
+
+def _iter_markdown(data, show_context=True):
+    """逐行生成Markdown输出，content 可以是生成器"""
+    output = deque()
+    output.append(f"# Word文档完整分析: {os.path.basename(data['file'])}\n")
+    if "section" in data:
+        output.append(f"> 章节: {data['section']['number']} {data['section']['text']}\n")
     
-    if format_type == "json":
-        return json.dumps(data, ensure_ascii=False, indent=2)
+    # 图片信息摘要
+    if data["total_images"] > 0:
+        output.append(f"## 📷 文档包含 {data['total_images']} 张图片\n")
+        for idx, img in enumerate(data["images"], 1):
+            output.append(f"{idx}. {img['filename']} (ID: {img['id']}, 类型: {img['type']})")
+            if "saved_path" in img:
+                output.append(f"   - 保存位置: {img['saved_path']}")
+        output.append("\n---\n")
     
-    elif format_type == "markdown":
-        output = [f"# Word文档完整分析: {os.path.basename(data['file'])}\n"]
-        
-        # 图片信息摘要
-        if data["total_images"] > 0:
-            output.append(f"## 📷 文档包含 {data['total_images']} 张图片\n")
-            for idx, img in enumerate(data["images"], 1):
-                output.append(f"{idx}. {img['filename']} (ID: {img['id']}, 类型: {img['type']})")
-                if "saved_path" in img:
-                    output.append(f"   - 保存位置: {img['saved_path']}")
-            output.append("\n---\n")
+    # 文档内容
+    output.append("## 📄 文档内容\n")
+    
+    for item in data["content"]:
+        # 输出上一项积累的行
+        while output:
+            yield output.popleft()
+        if isinstance(item, ContentItem):
+            item = item.to_dict()
         
-        # 文档内容
-        output.append("## 📄 文档内容\n")
+        if item["type"] == "heading":
+            level = int(item["level"][-1]) if item["level"][-1].isdigit() else 2
+            output.append(f"\n{'#' * (level + 1)} {item['text']}")
+            if item.get("has_images"):
+                output.append(f" 📷[含{len(item.get('image_ids', []))}张图片]")
+            output.append("\n")
+            
+            # 如果标题包含图片，显示上下文
+            if show_context and item.get("has_images"):
+                output.append("**图片上下文：**\n")
+                if item.get("context_after"):
+                    for ctx in item["context_after"]:
+                        output.append(f"- {ctx['text']}\n")
         
-        for item in data["content"]:
-            if item["type"] == "heading":
-                level = int(item["level"][-1]) if item["level"][-1].isdigit() else 2
-                output.append(f"\n{'#' * (level + 1)} {item['text']}")
-                if item.get("has_images"):
-                    output.append(f" 📷[含{len(item.get('image_ids', []))}张图片]")
-                output.append("\n")
+        elif item["type"] == "paragraph":
+            if item.get("has_images"):
+                output.append(f"\n📷 **[图片段落]**\n")
                 
-                # 如果标题包含图片，显示上下文
-                if show_context and item.get("has_images"):
-                    output.append("**图片上下文：**\n")
-                    if item.get("context_after"):
-                        for ctx in item["context_after"]:
-                            output.append(f"- {ctx['text']}\n")
-            
-            elif item["type"] == "paragraph":
-                if item.get("has_images"):
-                    output.append(f"\n📷 **[图片段落]**\n")
-                    
-                    # 显示图片的上下文
-                    if show_context:
-                        if item.get("context_before"):
-                            output.append("**图片前的说明：**\n")
-                            for ctx in item["context_before"]:
-                                if ctx["type"] == "heading":
-                                    output.append(f"### {ctx['text']}\n")
-                                else:
-                                    output.append(f"{ctx['text']}\n")
-                        
-                        output.append(f"\n**图片段落内容：** {item['text']}\n")
-                        
-                        if item.get("context_after"):
-                            output.append("\n**图片后的说明：**\n")
-                            for ctx in item["context_after"]:
-                                if ctx["type"] == "heading":
-                                    output.append(f"### {ctx['text']}\n")
-                                else:
-                                    output.append(f"{ctx['text']}\n")
+                # 显示图片的上下文
+                if show_context:
+                    if item.get("context_before"):
+                        output.append("**图片前的说明：**\n")
+                        for ctx in item["context_before"]:
+                            if ctx["type"] == "heading":
+                                output.append(f"### {ctx['text']}\n")
+                            else:
+                                output.append(f"{ctx['text']}\n")
                     
-                    output.append("\n" + "-" * 60 + "\n")
-                elif item["text"]:
-                    output.append(f"{item['text']}\n")
-            
-            elif item["type"] == "table":
-                output.append(f"\n**表格** ({item['rows']}行 × {item['cols']}列):\n")
-                
-                if len(item["data"]) > 0:
-                    header = item["data"][0]
-                    output.append("| " + " | ".join(header) + " |")
-                    output.append("| " + " | ".join(["---"] * len(header)) + " |")
+                    output.append(f"\n**图片段落内容：** {item['text']}\n")
                     
-                    for row in item["data"][1:]:
-                        output.append("| " + " | ".join(row) + " |")
+                    if item.get("context_after"):
+                        output.append("\n**图片后的说明：**\n")
+                        for ctx in item["context_after"]:
+                            if ctx["type"] == "heading":
+                                output.append(f"### {ctx['text']}\n")
+                            else:
+                                output.append(f"{ctx['text']}\n")
                 
-                if "note" in item:
-                    output.append(f"\n*{item['note']}*\n")
+                output.append("\n" + "-" * 60 + "\n")
+            elif item["text"]:
+                output.append(f"{item['text']}\n")
         
-        return "\n".join(output)
+        elif item["type"] == "table":
+            output.append(f"\n**表格** ({item['rows']}行 × {item['cols']}列):\n")
+            
+            rows = [item["header"]] + item["data"] if "header" in item else item["data"]
+            if len(rows) > 0:
+                header = rows[0]
+                output.append("| " + " | ".join(header) + " |")
+                output.append("| " + " | ".join(["---"] * len(header)) + " |")
+                
+                for row in rows[1:]:
+                    output.append("| " + " | ".join(row) + " |")
+            
+            if "note" in item:
+                output.append(f"\n*{item['note']}*\n")
+    
+    yield from output
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("用法: python read_docx_enhanced.py <word文件路径> [输出格式:json|markdown] [图片保存目录]")
-        sys.exit(1)
+def _store_when_exhausted(key, result, content):
+    """逐项转发生成器内容，完整遍历后把结果写入缓存"""
+    items = []
+    for item in content:
+        items.append(item)
+        yield item
+    parse_cache.store(key, dict(result, content=items))
+
+def format_outline(file_path, outline, format_type="markdown"):
+    """格式化标题大纲：markdown 为按层级缩进的编号列表，json 含每个章节的块范围和图片数"""
+    if format_type == "json":
+        return json.dumps({
+            "file": file_path,
+            "outline": [{
+                "number": s["number"],
+                "level": s["level"],
+                "text": s["text"],
+                "start": s["start"],
+                "end": s["end"],
+                "image_count": len(s["images"]),
+            } for s in outline]
+        }, ensure_ascii=False, indent=2)
+    
+    lines = [f"# 文档大纲: {os.path.basename(file_path)}\n"]
+    if not outline:
+        lines.append("（文档中没有标题）")
+    for s in outline:
+        line = f"{'  ' * s['number'].count('.')}- {s['number']} {s['text']}"
+        if s["images"]:
+            line += f" 📷{len(s['images'])}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_output(data, format_type="markdown", show_context=True):
+    """格式化输出"""
+    if "error" in data:
+        return f"错误: {data['error']}"
+    
+    if format_type == "json":
+        if isinstance(data["content"], list):
+            # 内容项在输出时才转换为字典（见 content_model），整体序列化比逐项序列化快
+            content = [item.to_dict() if isinstance(item, ContentItem) else item for item in data["content"]]
+            return json.dumps(dict(data, content=content), ensure_ascii=False, indent=2)
+        return "".join(_iter_json(data))
+    
+    elif format_type == "markdown":
+        return "\n".join(_iter_markdown(data, show_context))
+
+def write_output(data, format_type="markdown", show_context=True, stream=None):
+    """
+    增量写出格式化结果，输出内容与 print(format_output(...)) 相同
+    
+    data["content"] 为生成器时（read_docx_enhanced(lazy=True)），每解析出一项即写出一项，
+    前面的章节无需等待整个文档解析完成。
+    """
+    stream = stream or sys.stdout
+    if "error" in data:
+        stream.write(f"错误: {data['error']}\n")
+        return
     
-    file_path = sys.argv[1]
-    format_type = sys.argv[2] if len(sys.argv) > 2 else "markdown"
-    image_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    try:
+        if format_type == "json":
+            for chunk in _iter_json(data):
+                stream.write(chunk)
+            stream.write("\n")
+        elif format_type == "markdown":
+            for line in _iter_markdown(data, show_context):
+                stream.write(line + "\n")
+                stream.flush()
+        else:
+            stream.write("None\n")
+    except BrokenPipeError:
+        raise
+    except Exception as e:
+        stream.write(f"\n错误: {e}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='增强版Word文档读取，提取图片及其上下文')
+    parser.add_argument('file', help='Word文件路径')
+    parser.add_argument('format', nargs='?', default='markdown', help='输出格式: json|markdown（默认markdown）')
+    parser.add_argument('image_dir', nargs='?', default=None, help='图片保存目录（可选）')
+    parser.add_argument('--engine', choices=ENGINES, default='docx',
+                        help='解析引擎：docx（python-docx，默认）或 stream（lxml流式解析）')
+    parser.add_argument('--cache', choices=parse_cache.CACHE_MODES, default='use',
+                        help='解析缓存：use（命中则直接返回，默认）/refresh（重新解析并更新缓存）/off（不使用缓存）')
+    parser.add_argument('--image-store', default=None,
+                        help='图片内容寻址存储目录，相同图片只保存一次（默认为图片保存目录下的 .store）')
+    parser.add_argument('--image-metadata', action='store_true',
+                        help='只输出图片的大小、尺寸和哈希，不写出图片')
+    parser.add_argument('--table', type=int, default=None, dest='table_index',
+                        help='只读取第N个表格（从1开始），读到后立即停止解析')
+    parser.add_argument('--table-offset', type=int, default=0, help='表格从第几行开始读取（从0开始，默认0）')
+    parser.add_argument('--table-limit', type=int, default=TABLE_ROW_LIMIT,
+                        help=f'每个表格最多读取的行数（默认{TABLE_ROW_LIMIT}，0表示不限）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量解析：只重新解析上次读取后修改过的段落和表格，其余复用上次结果')
+    parser.add_argument('--outline', action='store_true',
+                        help='只输出标题大纲（章节编号和标题），不读取正文')
+    parser.add_argument('--section', default=None,
+                        help='只读取指定章节及其下级章节：章节编号（如 3 或 3.2，见 --outline）或标题文字')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
     
-    data = read_docx_enhanced(file_path, extract_images_flag=True, image_output_dir=image_dir)
-    output = format_output(data, format_type, show_context=True)
-    print(output)
+    with profiling.session(args.profile, "read_docx_enhanced"):
+        if args.outline:
+            try:
+                outline = load_outline(args.file, args.cache)
+            except Exception as e:
+                print(f"错误: {e}")
+                return
+            print(format_outline(args.file, outline, args.format))
+            return
+        
+        # 边解析边输出，长文档的前几个章节可以更早到达下游
+        data = _read_docx_enhanced(args.file, extract_images_flag=True, image_output_dir=args.image_dir,
+                                   engine=args.engine, lazy=True, cache=args.cache,
+                                   image_store_dir=args.image_store, image_metadata_only=args.image_metadata,
+                                   table_index=args.table_index, table_offset=args.table_offset,
+                                   table_limit=args.table_limit or None, incremental=args.incremental,
+                                   section=args.section)
+        # 按需解析：各块的解析耗时计入 write_output 下的 blocks
+        with profiling.phase("write_output"):
+            write_output(data, args.format, show_context=True)
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,66 @@
 # -*- coding: utf-8 -*-
 """读取和解析Excel文件内容"""
 
+import os
 import sys
 import json
+import math
+import time
+import zipfile
+import argparse
+import posixpath
+from array import array
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, chain
+from lxml import etree
 from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, CALENDAR_MAC_1904
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+import parse_cache
+import profiling
 
-def read_excel(file_path, max_rows=100, max_cols=20):
+# NumPy 为可选依赖：未安装时列式读取使用标准库 array 保存数值列
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 解析逻辑变化导致输出不同时递增，使旧的缓存结果失效
+PARSER_VERSION = 1
+
+# 解析引擎：openpyxl（只读模式）或 stream（直接流式解析工作表XML）
+ENGINES = ("openpyxl", "stream")
+
+SHEET_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+X_SHEET = f"{{{SHEET_MAIN_NS}}}sheet"
+X_WORKBOOK_PR = f"{{{SHEET_MAIN_NS}}}workbookPr"
+X_SI = f"{{{SHEET_MAIN_NS}}}si"
+X_T = f"{{{SHEET_MAIN_NS}}}t"
+X_R = f"{{{SHEET_MAIN_NS}}}r"
+X_IS = f"{{{SHEET_MAIN_NS}}}is"
+X_V = f"{{{SHEET_MAIN_NS}}}v"
+X_C = f"{{{SHEET_MAIN_NS}}}c"
+X_RPH = f"{{{SHEET_MAIN_NS}}}rPh"
+X_ROW = f"{{{SHEET_MAIN_NS}}}row"
+X_DIMENSION = f"{{{SHEET_MAIN_NS}}}dimension"
+X_SHEET_DATA = f"{{{SHEET_MAIN_NS}}}sheetData"
+X_NUM_FMT = f"{{{SHEET_MAIN_NS}}}numFmt"
+X_CELL_XFS = f"{{{SHEET_MAIN_NS}}}cellXfs"
+X_XF = f"{{{SHEET_MAIN_NS}}}xf"
+R_ID = f"{{{REL_NS}}}id"
+PKG_RELATIONSHIP = f"{{{PKG_REL_NS}}}Relationship"
+DIGITS = "0123456789"
+
+# stream 引擎每次送入解析器的字节数（只读前几行时，过大的块会多解析很多用不到的行）
+STREAM_CHUNK_BYTES = 16 * 1024
+
+def read_excel(file_path, max_rows=100, max_cols=20, cache="off", engine="openpyxl",
+               sheets=None, workers=1, timings=None):
     """
     读取Excel文件并输出为JSON格式
     
@@ -15,53 +69,661 @@ def read_excel(file_path, max_rows=100, max_cols=20):
         file_path: Excel文件路径
         max_rows: 最大读取行数（默认100）
         max_cols: 最大读取列数（默认20）
+        cache: 解析缓存模式 use/refresh/off（默认off，见 parse_cache）
+        engine: 解析引擎，openpyxl（默认）或 stream（直接流式解析XML，
+                不创建单元格对象，输出与 openpyxl 相同）
+        sheets: 要读取的工作表名或通配符列表，如 ["item_*", "skill"]（默认全部）
+        workers: 工作进程数（默认1，在当前进程中顺序读取；0 表示CPU核数）。
+                 多进程时各进程独立打开文件读取一部分工作表，结果按工作簿顺序合并
+        timings: 可选的列表，每读取一个工作表追加 (工作表名, 耗时秒数)；命中缓存时不追加
+    """
+    params = {
+        "version": PARSER_VERSION,
+        "engine": engine,
+        "max_rows": max_rows,
+        "max_cols": max_cols,
+        "sheets": list(sheets) if sheets else None,
+    }
+    return parse_cache.cached_call("read_excel", file_path, params,
+                                   lambda: _read_excel(file_path, max_rows, max_cols, engine,
+                                                       sheets, workers, timings), mode=cache)
+
+def select_sheets(sheet_names, patterns=None):
     """
+    按名称或通配符（fnmatch，区分大小写）从工作表列表中选择，保持工作簿中的顺序
+    
+    某个名称/通配符没有匹配任何工作表时抛出 ValueError。
+    """
+    if not patterns:
+        return list(sheet_names)
+    selected = set()
+    for pattern in patterns:
+        matched = [name for name in sheet_names if name == pattern or fnmatchcase(name, pattern)]
+        if not matched:
+            raise ValueError(f"未找到匹配的工作表: {pattern}（可选: {', '.join(sheet_names)}）")
+        selected.update(matched)
+    return [name for name in sheet_names if name in selected]
+
+def _read_excel(file_path, max_rows, max_cols, engine="openpyxl", sheets=None, workers=1, timings=None):
+    """read_excel 的实际解析过程（不经过缓存）"""
     try:
-        workbook = load_workbook(file_path, read_only=True, data_only=True)
-        result = {
+        if engine not in ENGINES:
+            raise ValueError(f"未知的解析引擎: {engine}")
+        timings = timings if timings is not None else []
+        
+        workers = workers if workers is not None and workers > 0 else (os.cpu_count() or 1)
+        if workers > 1:
+            with zipfile.ZipFile(file_path) as zf:
+                names = select_sheets([name for name, _ in _workbook_sheets(zf)[0]], sheets)
+            if len(names) > 1:
+                return {
+                    "file": file_path,
+                    "sheets": _read_sheets_parallel(file_path, names, max_rows, max_cols, engine,
+                                                    workers, timings)
+                }
+        
+        reader = _read_sheets_stream if engine == "stream" else _read_sheets_openpyxl
+        return {
             "file": file_path,
-            "sheets": []
+            "sheets": reader(file_path, sheets, max_rows, max_cols, timings)
         }
         
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
+    except Exception as e:
+        return {
+            "error": str(e),
+            "file": file_path
+        }
+
+def _read_sheets_openpyxl(file_path, sheets, max_rows, max_cols, timings):
+    """openpyxl 引擎：顺序读取选中的工作表"""
+    with profiling.phase("load_workbook"):
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        result = []
+        for sheet_name in select_sheets(workbook.sheetnames, sheets):
+            start = time.perf_counter()
+            profiling.count("sheet")
+            with profiling.phase("sheet"):
+                sheet = workbook[sheet_name]
             
-            # 获取实际使用的行列范围
-            max_row = min(sheet.max_row, max_rows)
-            max_col = min(sheet.max_column, max_cols)
+                # 获取实际使用的行列范围；文件中没有记录范围（如 write_only 生成的文件）时扫描整个工作表
+                if sheet.max_row is None or sheet.max_column is None:
+                    sheet.calculate_dimension(force=True)
+                max_row = min(sheet.max_row, max_rows)
+                max_col = min(sheet.max_column, max_cols)
             
-            sheet_data = {
-                "name": sheet_name,
-                "rows": max_row,
-                "cols": max_col,
-                "data": []
-            }
+                sheet_data = {
+                    "name": sheet_name,
+                    "rows": max_row,
+                    "cols": max_col,
+                    "data": []
+                }
             
-            # 读取数据
-            for row_idx, row in enumerate(sheet.iter_rows(max_row=max_row, max_col=max_col), 1):
-                row_data = []
-                for cell in row:
-                    value = cell.value
-                    # 转换为字符串，处理None值
-                    if value is None:
-                        row_data.append("")
-                    else:
-                        row_data.append(str(value))
+                # 读取数据
+                for row_idx, row in enumerate(sheet.iter_rows(max_row=max_row, max_col=max_col), 1):
+                    row_data = []
+                    for cell in row:
+                        value = cell.value
+                        # 转换为字符串，处理None值
+                        if value is None:
+                            row_data.append("")
+                        else:
+                            row_data.append(str(value))
                 
-                sheet_data["data"].append({
-                    "row": row_idx,
-                    "values": row_data
-                })
+                    sheet_data["data"].append({
+                        "row": row_idx,
+                        "values": row_data
+                    })
             
-            result["sheets"].append(sheet_data)
-        
+                profiling.count("row", len(sheet_data["data"]))
+                result.append(sheet_data)
+            timings.append((sheet_name, time.perf_counter() - start))
         return result
+    finally:
+        workbook.close()
+
+def _read_sheet_group(file_path, sheets, max_rows, max_cols, engine):
+    """工作进程中执行：独立打开文件读取一组工作表，返回 (工作表数据列表, 耗时列表)"""
+    timings = []
+    reader = _read_sheets_stream if engine == "stream" else _read_sheets_openpyxl
+    return reader(file_path, sheets, max_rows, max_cols, timings), timings
+
+def _read_sheets_parallel(file_path, names, max_rows, max_cols, engine, workers, timings):
+    """
+    把工作表轮流分给各工作进程（每个进程只打开一次文件、解析一次共享字符串），
+    结果按工作簿中的顺序合并
+    """
+    workers = min(workers, len(names))
+    groups = [names[i::workers] for i in range(workers)]
+    by_name = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_read_sheet_group, file_path, group, max_rows, max_cols, engine)
+                   for group in groups]
+        for future in futures:
+            sheet_list, group_timings = future.result()
+            seconds = dict(group_timings)
+            for sheet in sheet_list:
+                by_name[sheet["name"]] = (sheet, seconds[sheet["name"]])
+    
+    result = []
+    for name in names:
+        sheet_data, seconds = by_name[name]
+        result.append(sheet_data)
+        timings.append((name, seconds))
+    return result
+
+def _rels_targets(zf, part):
+    """读取部件的关系文件，返回 [(关系ID, 类型, 压缩包内路径)]"""
+    folder, name = posixpath.split(part)
+    try:
+        root = etree.fromstring(zf.read(posixpath.join(folder, "_rels", name + ".rels")))
+    except KeyError:
+        return []
+    targets = []
+    for rel in root.iter(PKG_RELATIONSHIP):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        targets.append((rel.get("Id"), rel.get("Type", ""), target))
+    return targets
+
+def _text_content(node):
+    """富文本/纯文本字符串节点（si、is）的文本：直接的 t 加上各个 r 中的 t，忽略注音"""
+    parts = []
+    for child in node:
+        if child.tag == X_T:
+            if child.text:
+                parts.append(child.text)
+        elif child.tag == X_R:
+            t = child.find(X_T)
+            if t is not None and t.text:
+                parts.append(t.text)
+    return "".join(parts)
+
+def _load_shared_strings(zf, path):
+    """一次性解析共享字符串表为列表"""
+    strings = []
+    if path is None or path not in zf.namelist():
+        return strings
+    with zf.open(path) as src:
+        for _, node in etree.iterparse(src, events=("end",), tag=X_SI, huge_tree=True):
+            strings.append(_text_content(node).replace("x005F_", ""))
+            node.clear()
+            while node.getprevious() is not None:
+                del node.getparent()[0]
+    return strings
+
+def _load_date_styles(zf, path):
+    """返回数字格式为日期、时长的单元格样式序号集合"""
+    date_styles, timedelta_styles = set(), set()
+    if path is None or path not in zf.namelist():
+        return date_styles, timedelta_styles
+    root = etree.fromstring(zf.read(path))
+    custom = {int(fmt.get("numFmtId")): fmt.get("formatCode") for fmt in root.iter(X_NUM_FMT)}
+    cell_xfs = root.find(X_CELL_XFS)
+    for idx, xf in enumerate(cell_xfs.iterfind(X_XF) if cell_xfs is not None else ()):
+        fmt_id = int(xf.get("numFmtId", 0))
+        fmt = custom[fmt_id] if fmt_id in custom else BUILTIN_FORMATS.get(fmt_id)
+        if is_date_format(fmt):
+            date_styles.add(idx)
+        if is_timedelta_format(fmt):
+            timedelta_styles.add(idx)
+    return date_styles, timedelta_styles
+
+def _workbook_sheets(zf):
+    """
+    读取 workbook.xml，返回 (工作表 [(名称, 路径)]（按工作簿中的顺序，跳过图表工作表）,
+    工作簿关系列表, 是否使用1904日期基准)
+    """
+    workbook_path = "xl/workbook.xml"
+    for _, rel_type, target in _rels_targets(zf, ""):
+        if rel_type.endswith("/officeDocument"):
+            workbook_path = target
+    
+    rels = _rels_targets(zf, workbook_path)
+    root = etree.fromstring(zf.read(workbook_path))
+    
+    workbook_pr = root.find(X_WORKBOOK_PR)
+    date1904 = workbook_pr is not None and workbook_pr.get("date1904") in ("1", "true")
+    
+    by_id = {rel_id: (rel_type, target) for rel_id, rel_type, target in rels}
+    names = set(zf.namelist())
+    sheets = []
+    for sheet in root.iter(X_SHEET):
+        rel_type, target = by_id.get(sheet.get(R_ID), ("", None))
+        if target not in names or "chartsheet" in rel_type:
+            continue
+        sheets.append((sheet.get("name"), target))
+    return sheets, rels, date1904
+
+def _open_stream_workbook(zf):
+    """读取工作簿结构：工作表名与路径、共享字符串、日期样式和日期基准"""
+    sheets, rels, date1904 = _workbook_sheets(zf)
+    
+    def part(suffix):
+        return next((target for _, rel_type, target in rels if rel_type.endswith(suffix)), None)
+    
+    with profiling.phase("styles"):
+        date_styles, timedelta_styles = _load_date_styles(zf, part("/styles"))
+    with profiling.phase("shared_strings"):
+        strings = _load_shared_strings(zf, part("/sharedStrings"))
+    return {
+        "sheets": sheets,
+        "strings": strings,
+        "date_styles": date_styles,
+        "timedelta_styles": timedelta_styles,
+        "epoch": CALENDAR_MAC_1904 if date1904 else WINDOWS_EPOCH,
+    }
+
+def _sheet_dimension(zf, path):
+    """读取工作表声明的范围 (min_col, min_row, max_col, max_row)，未声明时返回None"""
+    parser = etree.XMLPullParser(events=("start",))
+    with zf.open(path) as src:
+        # dimension 位于 sheetData 之前，通常在文件开头几百字节内
+        for chunk in iter(lambda: src.read(4096), b""):
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if element.tag == X_DIMENSION:
+                    return range_boundaries(element.get("ref"))
+                if element.tag == X_SHEET_DATA:
+                    return None
+    return None
+
+def _scan_dimension(zf, path, book):
+    """工作表未声明范围时，扫描全部单元格（不转换值）得到实际使用的行列数"""
+    target = _SheetTarget(book, max_col=0)
+    max_row = 0
+    for row_idx, _ in _feed_sheet(zf, path, target):
+        if target.col_counter:
+            max_row = row_idx
+    return 1, 1, target.max_column, max_row
+
+def _cast_number(value):
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+def _convert_value(data_type, value, style, book):
+    """按单元格类型（t 属性）与样式把 XML 中的值转换为 Python 值，规则与 openpyxl 一致"""
+    if data_type is None or data_type == "n":
+        value = _cast_number(value)
+        style_id = int(style) if style else 0
+        if style_id in book["date_styles"]:
+            try:
+                return from_excel(value, book["epoch"], timedelta=style_id in book["timedelta_styles"])
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        return value
+    if data_type == "s":
+        return book["strings"][int(value)]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "d":
+        return from_ISO8601(value)
+    return value
+
+class _SheetTarget:
+    """
+    lxml 解析器的 SAX 式回调目标：不构建元素树，直接在开始/结束标签回调中
+    收集每行单元格，完成的行放入 rows 等待取走
+    
+    max_col 之后的单元格只计数、不收集文本也不转换值。
+    """
+    
+    def __init__(self, book, max_col=None):
+        self.book = book
+        self.max_col = max_col
+        self.rows = []
+        self.row_counter = 0
+        self.col_counter = 0
+        self.cells = []
+        self.cell = None      # 当前单元格 (列号, 类型, 样式)，跳过的单元格为None
+        self.parts = None     # 正在收集的文本片段
+        self.in_phonetic = False
+        self.max_column = 0   # 已解析行中最后一个单元格的最大列号
+    
+    def start(self, tag, attrib):
+        if tag == X_C:
+            coordinate = attrib.get("r")
+            if coordinate:
+                self.col_counter = column_index_from_string(coordinate.rstrip(DIGITS))
+            else:
+                self.col_counter += 1
+            if self.max_col is not None and self.col_counter > self.max_col:
+                self.cell = None
+            else:
+                self.cell = (self.col_counter, attrib.get("t"), attrib.get("s"))
+                self.value = None
+        elif self.cell is None:
+            if tag == X_ROW:
+                r = attrib.get("r")
+                self.row_counter = int(float(r)) if r else self.row_counter + 1
+                self.col_counter = 0
+                self.cells = []
+        elif tag == X_V:
+            self.parts = []
+        elif tag == X_IS:
+            self.value = []
+        elif tag == X_RPH:
+            self.in_phonetic = True
+        elif tag == X_T and not self.in_phonetic and self.value is not None:
+            self.parts = []
+    
+    def data(self, text):
+        if self.parts is not None:
+            self.parts.append(text)
+    
+    def end(self, tag):
+        if tag == X_C:
+            cell = self.cell
+            if cell is not None:
+                value = self.value
+                if cell[1] == "inlineStr":
+                    value = "".join(value) if value is not None else None
+                elif value:
+                    value = _convert_value(cell[1], value, cell[2], self.book)
+                else:
+                    value = None
+                self.cells.append((cell[0], value))
+                self.cell = None
+        elif tag == X_ROW:
+            self.rows.append((self.row_counter, self.cells))
+            self.max_column = max(self.max_column, self.col_counter)
+        elif self.parts is not None:
+            if tag == X_V:
+                if self.cell[1] != "inlineStr":
+                    self.value = "".join(self.parts)
+            elif tag == X_T:
+                self.value.append("".join(self.parts))
+            self.parts = None
+        elif tag == X_RPH:
+            self.in_phonetic = False
+    
+    def close(self):
+        return None
+
+def _iter_sheet_xml(zf, path, book, max_col=None):
+    """流式解析工作表XML，逐行生成 (行号, [(列号, 值), ...])，只在内存中保留当前数据块的行"""
+    return _feed_sheet(zf, path, _SheetTarget(book, max_col))
+
+def _feed_sheet(zf, path, target):
+    parser = etree.XMLParser(target=target, huge_tree=True)
+    with zf.open(path) as member:
+        src = profiling.reader("unzip", member)
+        for chunk in iter(lambda: src.read(STREAM_CHUNK_BYTES), b""):
+            parser.feed(chunk)
+            if target.rows:
+                yield from target.rows
+                target.rows = []
+    parser.close()
+    yield from target.rows
+
+def iter_stream_rows(zf, path, book, max_row, max_col):
+    """
+    按 openpyxl 只读模式 iter_rows(max_row, max_col) 的规则生成每行的值元组
+    
+    缺失的行补为空行，行内缺失的单元格补为None。
+    """
+    empty_row = (None,) * max_col
+    counter = 1
+    idx = 1
+    for idx, cells in _iter_sheet_xml(zf, path, book, max_col):
+        if idx > max_row:
+            break
+        for _ in range(counter, idx):
+            counter += 1
+            yield empty_row
+        if counter <= idx:
+            values = [None] * max_col
+            for column, value in cells:
+                if 1 <= column <= max_col:
+                    values[column - 1] = value
+            counter += 1
+            yield tuple(values)
+    
+    if max_row < idx:
+        for _ in range(counter, max_row + 1):
+            yield empty_row
+
+def _read_sheets_stream(file_path, sheets, max_rows, max_cols, timings):
+    """
+    stream 引擎：不经过 openpyxl 的单元格对象，共享字符串只解析一次，
+    工作表XML用 iterparse 流式读取，读满 max_rows 行即停止
+    
+    工作表未声明范围（dimension）时扫描一遍得到实际范围（openpyxl 此时会报错）。
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        with profiling.phase("workbook"):
+            book = _open_stream_workbook(zf)
+        paths = dict(book["sheets"])
+        result = []
         
-    except Exception as e:
-        return {
-            "error": str(e),
-            "file": file_path
-        }
+        for sheet_name in select_sheets([name for name, _ in book["sheets"]], sheets):
+            start = time.perf_counter()
+            profiling.count("sheet")
+            with profiling.phase("sheet"):
+                path = paths[sheet_name]
+                with profiling.phase("dimension"):
+                    dimension = _sheet_dimension(zf, path) or _scan_dimension(zf, path, book)
+                max_row = min(dimension[3], max_rows)
+                max_col = min(dimension[2], max_cols)
+            
+                sheet_data = {
+                    "name": sheet_name,
+                    "rows": max_row,
+                    "cols": max_col,
+                    "data": []
+                }
+                for row_idx, row in enumerate(iter_stream_rows(zf, path, book, max_row, max_col), 1):
+                    sheet_data["data"].append({
+                        "row": row_idx,
+                        "values": ["" if value is None else str(value) for value in row]
+                    })
+                profiling.count("row", len(sheet_data["data"]))
+                result.append(sheet_data)
+            timings.append((sheet_name, time.perf_counter() - start))
+        
+        return result
+
+# 列式读取每次从工作表读取的行数
+DEFAULT_CHUNK_SIZE = 10000
+
+class Column:
+    """
+    工作表中的一列，按类型保存在紧凑的缓冲区中
+    
+    kind 为 "number"（全部为数值，缓冲区为 NumPy float64/int64 数组，无NumPy时为 array）、
+    "text"（文本，缓冲区为驻留字符串的数组）或 "empty"（全部为空）。
+    数值列中的空单元格为 NaN，文本列中的空单元格为空字符串。
+    """
+    __slots__ = ("name", "kind", "values", "null_count")
+    
+    def __init__(self, name, kind, values, null_count):
+        self.name = name
+        self.kind = kind
+        self.values = values
+        self.null_count = null_count
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def to_list(self):
+        return list(self.values)
+    
+    def summary(self):
+        """列的摘要信息：类型、行数、空值数，数值列附带最小/最大值"""
+        info = {"name": self.name, "kind": self.kind, "rows": len(self), "nulls": self.null_count}
+        if self.kind == "number" and len(self) > self.null_count:
+            values = [v for v in self.values if not math.isnan(v)] if np is None else self.values
+            if np is None:
+                info["min"], info["max"] = min(values), max(values)
+            else:
+                info["min"], info["max"] = np.nanmin(values).item(), np.nanmax(values).item()
+        return info
+
+class SheetColumns:
+    """一个工作表的列式数据：name 为表名，rows 为数据行数，columns 为 Column 列表"""
+    __slots__ = ("name", "rows", "columns")
+    
+    def __init__(self, name, rows, columns):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+    
+    def __getitem__(self, name):
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise KeyError(name)
+    
+    def summary(self):
+        return {"name": self.name, "rows": self.rows, "columns": [c.summary() for c in self.columns]}
+
+def _is_number(value):
+    # bool 是 int 的子类，按文本处理，与 read_excel 的 str() 输出保持一致
+    return type(value) in (int, float)
+
+def _number_buffer(values, all_int):
+    """数值列表转为类型化缓冲区；全部为整数且无空值时使用整数类型"""
+    if np is not None:
+        return np.array(values, dtype=np.int64 if all_int else np.float64)
+    return array('q' if all_int else 'd', values)
+
+def _text_buffer(values):
+    if np is not None:
+        return np.array(values, dtype=object)
+    return values
+
+def _number_to_text(buffer):
+    """数值缓冲区转为文本（同一列后续出现文本时使用）"""
+    texts = []
+    for value in buffer.tolist():
+        if isinstance(value, float) and math.isnan(value):
+            texts.append("")
+        else:
+            texts.append(sys.intern(str(value)))
+    return texts
+
+def _build_column(name, values):
+    """根据一个分块中某列的原始值推断类型并构建 Column"""
+    non_null = [v for v in values if v is not None]
+    null_count = len(values) - len(non_null)
+    if not non_null:
+        return Column(name, "empty", _text_buffer([""] * len(values)), null_count)
+    if all(_is_number(v) for v in non_null):
+        all_int = null_count == 0 and all(type(v) is int for v in non_null)
+        nan = float("nan")
+        numbers = values if all_int else [nan if v is None else float(v) for v in values]
+        return Column(name, "number", _number_buffer(numbers, all_int), null_count)
+    texts = ["" if v is None else sys.intern(str(v)) for v in values]
+    return Column(name, "text", _text_buffer(texts), null_count)
+
+def _is_int_buffer(buffer):
+    return buffer.dtype.kind == "i" if np is not None else buffer.typecode == 'q'
+
+def _concat_columns(name, parts):
+    """合并同一列的多个分块；类型不一致时统一为文本，整数与小数混合时统一为小数"""
+    parts = [p for p in parts if len(p)]
+    null_count = sum(p.null_count for p in parts)
+    kinds = {p.kind for p in parts}
+    
+    if not parts or kinds == {"empty"}:
+        return Column(name, "empty", _text_buffer([""] * sum(len(p) for p in parts)), null_count)
+    
+    if kinds <= {"number", "empty"}:
+        all_int = all(p.kind == "number" and _is_int_buffer(p.values) for p in parts)
+        buffers = [p.values if p.kind == "number" else _number_buffer([float("nan")] * len(p), False)
+                   for p in parts]
+        if np is not None:
+            values = np.concatenate(buffers).astype(np.int64 if all_int else np.float64)
+        else:
+            values = array('q' if all_int else 'd')
+            for buffer in buffers:
+                values.extend(buffer if all_int or buffer.typecode == 'd' else array('d', buffer))
+        return Column(name, "number", values, null_count)
+    
+    texts = []
+    for p in parts:
+        texts.extend(_number_to_text(p.values) if p.kind == "number" else list(p.values))
+    return Column(name, "text", _text_buffer(texts), null_count)
+
+def _column_names(header_row, width):
+    names = []
+    for idx in range(width):
+        value = header_row[idx] if header_row and idx < len(header_row) else None
+        names.append(str(value) if value is not None else get_column_letter(idx + 1))
+    return names
+
+def _iter_chunks(sheet, chunk_size, header, max_cols):
+    """从已打开的工作表按块读取，每块生成一个 Column 列表"""
+    rows = sheet.iter_rows(values_only=True, max_col=max_cols)
+    first = next(rows, None)
+    if first is None:
+        return
+    names = _column_names(first if header else None, len(first))
+    if not header:
+        rows = chain([first], rows)
+    width = len(names)
+    
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        columns = [[] for _ in range(width)]
+        for row in chunk:
+            row_len = len(row)
+            for idx in range(width):
+                columns[idx].append(row[idx] if idx < row_len else None)
+        yield [_build_column(name, values) for name, values in zip(names, columns)]
+
+def iter_sheet_chunks(file_path, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE, header=True, max_cols=None):
+    """
+    按固定行数分块读取工作表，每次生成一个 Column 列表（每列一个，顺序与表中相同）
+    
+    参数:
+        file_path: Excel文件路径
+        sheet_name: 工作表名（默认第一个工作表）
+        chunk_size: 每块的行数
+        header: 第一行是否为表头（列名）；否则使用列字母 A/B/C...
+        max_cols: 最大读取列数（默认不限）
+    
+    每块处理完即可丢弃，内存占用只与 chunk_size 有关。
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook[workbook.sheetnames[0]]
+        yield from _iter_chunks(sheet, chunk_size, header, max_cols)
+    finally:
+        workbook.close()
+
+def read_excel_columnar(file_path, sheets=None, chunk_size=DEFAULT_CHUNK_SIZE, header=True, max_cols=None):
+    """
+    列式读取整个工作表（不限行数），返回 {"file", "sheets": [SheetColumns, ...]}
+    
+    数据按 chunk_size 分块读取并写入类型化的列缓冲区，数值列不再逐个转换为字符串，
+    适合几万行的数值配置表。sheets 为要读取的工作表名或通配符列表（默认全部，见 select_sheets）。
+    """
+    with profiling.phase("load_workbook"):
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        result = {"file": file_path, "sheets": []}
+        for sheet_name in select_sheets(workbook.sheetnames, sheets):
+            parts = []
+            profiling.count("sheet")
+            for chunk in profiling.iterate("chunk", _iter_chunks(workbook[sheet_name], chunk_size, header, max_cols)):
+                if not parts:
+                    parts = [[] for _ in chunk]
+                for column_parts, column in zip(parts, chunk):
+                    column_parts.append(column)
+            columns = [_concat_columns(column_parts[0].name, column_parts) for column_parts in parts]
+            result["sheets"].append(SheetColumns(sheet_name, len(columns[0]) if columns else 0, columns))
+        return result
+    finally:
+        workbook.close()
 
 def format_output(data, format_type="json"):
     """
@@ -100,14 +762,82 @@ def format_output(data, format_type="json"):
         
         return "\n".join(output)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("用法: python read_xlsx.py <excel文件路径> [输出格式:json|markdown]")
-        sys.exit(1)
+def format_columnar_output(data, format_type="markdown"):
+    """格式化列式读取结果（每列的概要信息）"""
+    if "error" in data:
+        return json.dumps(data, ensure_ascii=False, indent=2)
     
-    file_path = sys.argv[1]
-    format_type = sys.argv[2] if len(sys.argv) > 2 else "markdown"
+    sheets = [sheet.summary() for sheet in data["sheets"]]
+    if format_type == "json":
+        return json.dumps({"file": data["file"], "sheets": sheets}, ensure_ascii=False, indent=2)
     
-    data = read_excel(file_path)
-    output = format_output(data, format_type)
-    print(output)
+    lines = [f"# Excel列概要: {data['file']}", ""]
+    for sheet in sheets:
+        lines.append(f"## 工作表: {sheet['name']}（{sheet['rows']}行）")
+        lines.append("")
+        if not sheet["columns"]:
+            lines.append("（空工作表）")
+            lines.append("")
+            continue
+        lines.append("| 列 | 类型 | 空值 | 最小值 | 最大值 |")
+        lines.append("| --- | --- | --- | --- | --- |")
+        for column in sheet["columns"]:
+            lines.append(f"| {column['name']} | {column['kind']} | {column['nulls']} | "
+                         f"{column.get('min', '')} | {column.get('max', '')} |")
+        lines.append("")
+    return "\n".join(lines)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['index']:
+        # 子命令：配置表字段/主键索引，见 config_index.py
+        import config_index
+        return config_index.main(argv[1:])
+    
+    parser = argparse.ArgumentParser(description='读取Excel文件内容',
+                                     epilog='配置表索引: read_xlsx.py index {build,field,id,sheet} ...')
+    parser.add_argument('file', help='Excel文件路径')
+    parser.add_argument('format', nargs='?', default='markdown', help='输出格式: json|markdown（默认markdown）')
+    parser.add_argument('--cache', choices=parse_cache.CACHE_MODES, default='use',
+                        help='解析缓存：use（命中则直接返回，默认）/refresh（重新解析并更新缓存）/off（不使用缓存）')
+    parser.add_argument('--engine', choices=ENGINES, default='openpyxl',
+                        help='解析引擎：openpyxl（默认）或 stream（流式解析XML，大表更快）')
+    parser.add_argument('--sheets', nargs='+', metavar='NAME',
+                        help='只读取指定的工作表，可使用通配符，如 --sheets "item_*" skill')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行读取工作表的进程数（默认1；0 表示CPU核数）')
+    parser.add_argument('--timing', action='store_true', help='在标准错误输出每个工作表的读取耗时')
+    parser.add_argument('--columnar', action='store_true',
+                        help='列式读取全部行，只输出每列的类型、空值数与数值范围')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'列式读取时每块的行数（默认{DEFAULT_CHUNK_SIZE}）')
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    
+    with profiling.session(args.profile, "read_xlsx"):
+        if args.columnar:
+            try:
+                data = read_excel_columnar(args.file, sheets=args.sheets, chunk_size=args.chunk_size)
+            except Exception as e:
+                data = {"error": str(e), "file": args.file}
+            with profiling.phase("format_output"):
+                output = format_columnar_output(data, args.format)
+            print(output)
+            return
+    
+        timings = []
+        start = time.perf_counter()
+        data = read_excel(args.file, cache=args.cache, engine=args.engine, sheets=args.sheets,
+                          workers=args.workers, timings=timings)
+        with profiling.phase("format_output"):
+            output = format_output(data, args.format)
+        print(output)
+    
+        if args.timing:
+            for sheet_name, seconds in timings:
+                print(f"{sheet_name}: {seconds:.3f}s", file=sys.stderr)
+            note = "" if timings or "error" in data else "（命中缓存）"
+            print(f"总耗时: {time.perf_counter() - start:.3f}s{note}", file=sys.stderr)
+
+if __name__ == "__main__":
+    sys.exit(main())
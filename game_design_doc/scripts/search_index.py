@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+设计文档全文检索索引
+
+扫描目录下的所有 .docx 设计文档和 .xlsx 配置表，把标题、段落、表格行和工作表行写入
+SQLite FTS5 全文索引，用于快速查找“哪个已有文档写过类似的规则”。每条记录带有文件、
+所在章节（标题路径或工作表名）和位置，查询结果按相关度（bm25）排序并附带摘要。
+
+中文没有空格分词，写入索引前把连续的汉字/假名/谚文切分为相邻两字的词（unicode61 分词器），
+查询词按同样方式转换为短语匹配；只有一个字的查询按前缀匹配，因此任意长度的查询都能命中。
+
+索引按文件的大小、修改时间和内容哈希增量更新（与 config_index 相同）：未变化的文件不会
+重新读取，删除的文件会从索引中移除。每次查询前都会检查已索引目录的变化。
+
+索引文件默认保存在解析缓存目录下（见 parse_cache），可通过 --db 指定。
+
+用法:
+    python search_index.py build <目录>
+    python search_index.py query <关键词...> [--format json|markdown] [--type docx|xlsx] [--limit N]
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import sqlite3
+import zipfile
+import argparse
+import parse_cache
+
+# 索引结构或分词方式变化时递增，旧索引会被重建
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_path ON entries(path);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(terms, tokenize = 'unicode61');
+"""
+
+# 查询默认返回的最大结果数
+DEFAULT_LIMIT = 20
+
+# 摘要在第一个命中位置前后保留的字数
+SNIPPET_CHARS = 40
+
+# 需要按字切分的文字：中日韩统一表意文字（含扩展A与兼容区）、假名、谚文
+CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af'
+CJK_RUN = re.compile(f'[{CJK_CHARS}]+')
+CJK_RUN_AT_END = re.compile(f'[{CJK_CHARS}]+$')
+
+FILE_TYPES = {".docx": "docx", ".xlsx": "xlsx"}
+
+# 各文件类型产生的记录类型
+ENTRY_KINDS = {"docx": ("heading", "paragraph", "table"), "xlsx": ("row",)}
+
+
+def default_db_path():
+    return os.path.join(parse_cache.cache_root(), "search_index.sqlite")
+
+
+def connect(db_path=None):
+    """打开（必要时创建）索引数据库"""
+    db_path = db_path or default_db_path()
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        with conn:
+            for table in ("entries_fts", "entries", "files", "roots"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def _bigrams(run):
+    return " ".join(run[i:i + 2] for i in range(len(run) - 1))
+
+
+def segment(text):
+    """
+    把连续的中日韩文字切分为相邻两字的词，并在末尾加上最后一个字（“技能冷却” -> “技能 能冷 冷却 却”），
+    供 unicode61 分词器建索引；每个字都是某个词的开头，单字查询可以按前缀匹配
+    """
+    return CJK_RUN.sub(lambda m: f" {_bigrams(m.group())} {m.group()[-1]} ", text)
+
+
+def _phrase(word):
+    """
+    查询词对应的 FTS5 短语
+
+    与 segment 相同，但结尾的中文只取两字词（文档中这段文字可能更长，不一定以该字结尾）；
+    结尾只有一个字时按前缀匹配。
+    """
+    match = CJK_RUN_AT_END.search(word)
+    prefix = ""
+    if match is None:
+        terms = segment(word)
+    else:
+        run = match.group()
+        terms = segment(word[:match.start()]) + " " + (_bigrams(run) if len(run) > 1 else run)
+        prefix = "*" if len(run) == 1 else ""
+    return '"' + terms.replace('"', '""') + '"' + prefix
+
+
+def collect_files(root):
+    """递归查找目录下的 .docx 和 .xlsx 文件，跳过 Office 临时文件"""
+    paths = []
+    for ext in FILE_TYPES:
+        paths.extend(glob.glob(os.path.join(root, "**", "*" + ext), recursive=True))
+    return sorted(os.path.abspath(p) for p in paths
+                  if not os.path.basename(p).startswith("~$") and os.path.isfile(p))
+
+
+def _heading_level(style_name):
+    match = re.search(r'(\d+)$', style_name)
+    return int(match.group(1)) if match else 1
+
+
+def scan_docx(file_path):
+    """
+    读取一个 Word 文档的索引内容（使用 read_docx 的 stream 引擎）
+
+    逐个生成 (类型, 章节, 位置, 表格行, 文本)：类型为 heading/paragraph/table，章节为标题路径
+    （“一、概述 > 1.1 目的”），位置为段落/表格在 body 中的序号（与 read_docx_enhanced 的大纲相同），
+    表格每行一条记录，单元格以 " | " 连接，表格行为行号（从0开始）。
+    """
+    from read_docx import iter_docx_blocks, read_paragraph, read_table
+
+    headings = []  # [(级别, 标题)]，由外到内
+    for position, (kind, element, style_name, images_in_para) in enumerate(iter_docx_blocks(file_path, "stream")):
+        if kind == "p":
+            style_name, text, _ = read_paragraph(element, style_name, images_in_para)
+            if not text:
+                continue
+            if style_name.startswith('Heading'):
+                level = _heading_level(style_name)
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, text))
+                yield "heading", " > ".join(h[1] for h in headings), position, None, text
+            else:
+                yield "paragraph", " > ".join(h[1] for h in headings), position, None, text
+        else:
+            section = " > ".join(h[1] for h in headings)
+            for row, cells in enumerate(read_table(element, 0, None)["data"]):
+                text = " | ".join(c for c in cells if c)
+                if text:
+                    yield "table", section, position, row, text
+
+
+def scan_xlsx(file_path):
+    """
+    读取一个工作簿的索引内容（使用 read_xlsx 的 stream 引擎）
+
+    逐个生成 (类型, 章节, 位置, 表格行, 文本)：每个非空行一条 row 记录，章节为工作表名，
+    位置为 Excel 行号，单元格以 " | " 连接。
+    """
+    from read_xlsx import _open_stream_workbook, _iter_sheet_xml
+
+    with zipfile.ZipFile(file_path) as zf:
+        book = _open_stream_workbook(zf)
+        for name, path in book["sheets"]:
+            for row_idx, cells in _iter_sheet_xml(zf, path, book):
+                text = " | ".join(str(value).strip() for _, value in cells
+                                  if value is not None and str(value).strip())
+                if text:
+                    yield "row", name, row_idx, None, text
+
+
+def scan_file(file_path):
+    if file_path.lower().endswith(".xlsx"):
+        return scan_xlsx(file_path)
+    return scan_docx(file_path)
+
+
+def _delete_file(conn, file_path):
+    """删除单个文件的索引内容（调用方负责事务）"""
+    conn.execute("DELETE FROM entries_fts WHERE rowid IN (SELECT id FROM entries WHERE path = ?)", (file_path,))
+    conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+
+
+def _index_file(conn, root, file_path, st, digest):
+    """在一个事务中替换单个文件的索引内容"""
+    try:
+        entries, error = list(scan_file(file_path)), None
+    except Exception as e:
+        entries, error = [], str(e)
+
+    with conn:
+        _delete_file(conn, file_path)
+        conn.execute("INSERT INTO files (path, root, size, mtime_ns, sha256, error) VALUES (?, ?, ?, ?, ?, ?)",
+                     (file_path, root, st.st_size, st.st_mtime_ns, digest, error))
+        for kind, section, position, row, text in entries:
+            entry_id = conn.execute(
+                "INSERT INTO entries (path, kind, section, position, row, text) VALUES (?, ?, ?, ?, ?, ?)",
+                (file_path, kind, section, position, row, text)).lastrowid
+            conn.execute("INSERT INTO entries_fts (rowid, terms) VALUES (?, ?)", (entry_id, segment(text)))
+    return error
+
+
+def update_root(conn, root):
+    """
+    增量更新一个目录的索引
+
+    目录嵌套时（如先后索引 docs/ 和 docs/sub/），每个文件只属于包含它的最内层目录，
+    外层目录更新时跳过内层目录的文件，同一个文件不会被两个目录反复重新索引。
+
+    返回统计 {"root", "files", "indexed", "unchanged", "removed", "failed", "seconds"}
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise ValueError(f"目录不存在: {root}")
+
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO roots (path) VALUES (?)", (root,))
+    nested = [path for (path,) in conn.execute("SELECT path FROM roots") if _is_within(path, root)]
+
+    # 目录下已索引的文件，包括此前属于外层或内层目录的文件
+    prefix = os.path.join(root, "")
+    known = {path: (owner, size, mtime_ns, sha256) for path, owner, size, mtime_ns, sha256 in
+             conn.execute("SELECT path, root, size, mtime_ns, sha256 FROM files WHERE root = ? OR substr(path, 1, ?) = ?",
+                          (root, len(prefix), prefix))}
+    stats = {"root": root, "files": 0, "indexed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+    for file_path in collect_files(root):
+        if any(_is_within(file_path, path) for path in nested):
+            continue  # 由内层目录负责
+        stats["files"] += 1
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        old = known.pop(file_path, None)
+        if old and old[1] == st.st_size and old[2] == st.st_mtime_ns:
+            if old[0] != root:
+                # 此前属于外层目录的文件，内容未变，只改为属于本目录
+                with conn:
+                    conn.execute("UPDATE files SET root = ? WHERE path = ?", (root, file_path))
+            stats["unchanged"] += 1
+            continue
+
+        digest = parse_cache.file_digest(file_path)
+        if old and old[3] == digest:
+            # 只有修改时间变化（如重新保存），内容未变
+            with conn:
+                conn.execute("UPDATE files SET root = ?, size = ?, mtime_ns = ? WHERE path = ?",
+                             (root, st.st_size, st.st_mtime_ns, file_path))
+            stats["unchanged"] += 1
+            continue
+
+        if _index_file(conn, root, file_path, st, digest):
+            stats["failed"] += 1
+        stats["indexed"] += 1
+
+    # 内层目录的文件由内层目录自己检查是否已删除
+    removed = [path for path, (owner, *_) in known.items() if owner == root]
+    with conn:
+        for file_path in removed:
+            _delete_file(conn, file_path)
+    stats["removed"] = len(removed)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _is_within(path, root):
+    """path 是否位于目录 root 之下（不含 root 本身）"""
+    return path.startswith(os.path.join(root, ""))
+
+
+def refresh(conn):
+    """检查所有已索引目录的变化，返回各目录的更新统计"""
+    roots = [path for (path,) in conn.execute("SELECT path FROM roots")]
+    stats = []
+    for root in roots:
+        if os.path.isdir(root):
+            stats.append(update_root(conn, root))
+        else:
+            with conn:
+                for (file_path,) in conn.execute("SELECT path FROM files WHERE root = ?", (root,)).fetchall():
+                    _delete_file(conn, file_path)
+                conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+    return stats
+
+
+def query_words(query):
+    """查询中以空白分隔、含有文字的词"""
+    return [word for word in query.split() if re.search(r'\w', word)]
+
+
+def match_expression(words):
+    """把查询词转换为 FTS5 表达式：每个词为一个短语（见 _phrase），词之间为 AND"""
+    return " ".join(_phrase(word) for word in words)
+
+
+def snippet(text, words, chars=SNIPPET_CHARS):
+    """截取第一个命中词前后 chars 个字的摘要，命中词用 ** 标出"""
+    lower = text.lower()
+    hits = [(lower.find(word.lower()), word) for word in words]
+    hits = [(pos, word) for pos, word in hits if pos >= 0]
+    first = min(hits)[0] if hits else 0
+    start = max(first - chars, 0)
+    end = min(first + chars, len(text))
+    excerpt = text[start:end].replace("\n", " ")
+    matched = sorted({word for _, word in hits}, key=len, reverse=True)
+    if matched:
+        pattern = "|".join(re.escape(word) for word in matched)
+        excerpt = re.sub(f"({pattern})", r"**\1**", excerpt, flags=re.IGNORECASE).replace("****", "")
+    return ("…" if start > 0 else "") + excerpt + ("…" if end < len(text) else "")
+
+
+def search(conn, query, file_type=None, limit=DEFAULT_LIMIT):
+    """
+    全文检索，按相关度排序
+
+    参数:
+        query: 查询词，多个词以空格分隔（需全部命中）
+        file_type: 只查找 docx 或 xlsx 文件（默认全部）
+        limit: 最多返回的结果数
+
+    返回 [{"file", "kind", "section", "position", "row", "score", "snippet"}]，score 越小越相关
+    """
+    words = query_words(query)
+    if not words:
+        return []
+    expression = match_expression(words)
+    if file_type:
+        kinds = ENTRY_KINDS[file_type]
+        rows = conn.execute(f"""
+            SELECT e.path, e.kind, e.section, e.position, e.row, e.text, f.rank
+            FROM (SELECT rowid, rank FROM entries_fts WHERE entries_fts MATCH ?) f
+            JOIN entries e ON e.id = f.rowid
+            WHERE e.kind IN ({", ".join("?" * len(kinds))})
+            ORDER BY f.rank
+            LIMIT ?""", (expression, *kinds, limit))
+    else:
+        # 先在全文索引内排序取前 limit 条，再关联记录
+        rows = conn.execute("""
+            SELECT e.path, e.kind, e.section, e.position, e.row, e.text, f.rank
+            FROM (SELECT rowid, rank FROM entries_fts WHERE entries_fts MATCH ? ORDER BY rank LIMIT ?) f
+            JOIN entries e ON e.id = f.rowid
+            ORDER BY f.rank""", (expression, limit))
+    return [{"file": path, "kind": kind, "section": section, "position": position, "row": row,
+             "score": round(rank, 3), "snippet": snippet(text, words)}
+            for path, kind, section, position, row, text, rank in rows]
+
+
+def _location(result):
+    if result["kind"] == "row":
+        return f"第{result['position']}行"
+    if result["kind"] == "table":
+        return f"第{result['position']}块 表格第{result['row'] + 1}行"
+    return f"第{result['position']}块"
+
+
+def format_output(query, results, format_type="markdown", limit=DEFAULT_LIMIT, seconds=None):
+    """格式化查询结果"""
+    if format_type == "json":
+        return json.dumps({"query": query, "results": results}, ensure_ascii=False, indent=2)
+
+    lines = [f"# 文档检索: {query}", ""]
+    if not results:
+        lines.append("未找到匹配的结果")
+        return "\n".join(lines)
+
+    for idx, r in enumerate(results, 1):
+        section = f" · {r['section']}" if r["section"] else ""
+        lines.append(f"{idx}. **{os.path.basename(r['file'])}**{section}（{_location(r)}）")
+        lines.append(f"   {r['snippet']}")
+        lines.append(f"   `{r['file']}`")
+    if len(results) >= limit:
+        lines.append(f"\n（仅显示前{limit}条，可用 --limit 调整）")
+    if seconds is not None:
+        lines.append(f"\n（查询耗时 {seconds * 1000:.1f}ms）")
+    return "\n".join(lines)
+
+
+def _print_stats(stats):
+    for s in stats:
+        print(f"{s['root']}: {s['files']} 个文件，重新索引 {s['indexed']}，未变化 {s['unchanged']}，"
+              f"移除 {s['removed']}，失败 {s['failed']}，耗时 {s['seconds']:.2f}s", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="设计文档与配置表全文检索")
+    parser.add_argument("--db", help="索引文件路径（默认在解析缓存目录下）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="扫描目录建立/增量更新索引")
+    build.add_argument("directory", help="文档目录（递归查找 .docx 和 .xlsx）")
+
+    query = commands.add_parser("query", help="检索关键词，按相关度列出命中的段落和表格行")
+    query.add_argument("keywords", nargs="+", help="查询词，多个词需全部命中")
+    query.add_argument("--format", choices=("markdown", "json"), default="markdown", help="输出格式（默认markdown）")
+    query.add_argument("--type", choices=tuple(FILE_TYPES.values()), default=None, dest="file_type",
+                       help="只查找 Word 文档或 Excel 配置表")
+    query.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"最多返回的结果数（默认{DEFAULT_LIMIT}）")
+    query.add_argument("--no-refresh", action="store_true", help="查询前不检查文档的变化")
+
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        if args.command == "build":
+            try:
+                stats = update_root(conn, args.directory)
+            except ValueError as e:
+                print(f"错误: {e}")
+                return 1
+            _print_stats([stats])
+            return 0
+
+        if not args.no_refresh:
+            refresh(conn)
+        keyword = " ".join(args.keywords)
+        start = time.perf_counter()
+        results = search(conn, keyword, args.file_type, args.limit)
+        seconds = time.perf_counter() - start
+        print(format_output(keyword, results, args.format, args.limit, seconds))
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
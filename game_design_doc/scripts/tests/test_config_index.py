@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""config_index 嵌套目录的增量更新"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+openpyxl = pytest.importorskip("openpyxl")
+
+import config_index
+
+
+def _write_workbook(path, field):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["ID", field])
+    ws.append([1001, "x"])
+    wb.save(path)
+
+
+def _counts(stats):
+    return {os.path.basename(s["root"]): (s["files"], s["indexed"], s["unchanged"], s["removed"]) for s in stats}
+
+
+def test_nested_roots_do_not_reindex_shared_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    _write_workbook(tmp_path / "cfg" / "a.xlsx", "name")
+    _write_workbook(tmp_path / "cfg" / "items" / "b.xlsx", "price")
+    conn = config_index.connect(str(tmp_path / "index.sqlite"))
+
+    assert config_index.update_root(conn, str(tmp_path / "cfg"))["indexed"] == 2
+    # 内层目录接管已索引的文件，内容未变时不重新读取
+    stats = config_index.update_root(conn, str(tmp_path / "cfg" / "items"))
+    assert (stats["files"], stats["indexed"], stats["unchanged"]) == (1, 0, 1)
+
+    for _ in range(2):
+        assert _counts(config_index.refresh(conn)) == {"cfg": (1, 0, 1, 0), "items": (1, 0, 1, 0)}
+
+    os.remove(tmp_path / "cfg" / "items" / "b.xlsx")
+    assert _counts(config_index.refresh(conn)) == {"cfg": (1, 0, 1, 0), "items": (0, 0, 0, 1)}
+    assert [r["file"] for r in config_index.find_fields(conn, "price")] == []
+    assert [r["file"] for r in config_index.find_fields(conn, "name")] == [str(tmp_path / "cfg" / "a.xlsx")]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""convert_md_v2 批量转换的输出路径"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from convert_md_v2 import collect_markdown_files, convert_batch
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_same_named_inputs_from_different_directories(tmp_path):
+    _write(tmp_path / "c" / "a" / "x.md", "# 来自a\n")
+    _write(tmp_path / "c" / "b" / "x.md", "# 来自b\n")
+    inputs = [str(tmp_path / "c" / "a" / "*.md"), str(tmp_path / "c" / "b" / "*.md")]
+
+    files = collect_markdown_files(inputs)
+    assert sorted(rel for _, rel in files) == [os.path.join("a", "x.md"), os.path.join("b", "x.md")]
+
+    out = tmp_path / "out"
+    stats = convert_batch(inputs, str(out), workers=1, stream=io.StringIO())
+    assert stats["files"] == 2 and not stats["failed"]
+    assert Document(str(out / "a" / "x.docx")).paragraphs[0].text == "来自a"
+    assert Document(str(out / "b" / "x.docx")).paragraphs[0].text == "来自b"
+
+
+def test_single_file_keeps_file_name(tmp_path):
+    _write(tmp_path / "a" / "x.md", "正文\n")
+    assert collect_markdown_files([str(tmp_path / "a" / "x.md")]) == [(str(tmp_path / "a" / "x.md"), "x.md")]
+
+
+def test_conflicting_outputs_are_rejected(tmp_path):
+    _write(tmp_path / "c" / "a" / "x.md", "一\n")
+    _write(tmp_path / "d" / "a" / "x.md", "二\n")
+    with pytest.raises(ValueError):
+        collect_markdown_files([str(tmp_path / "c"), str(tmp_path / "d")])
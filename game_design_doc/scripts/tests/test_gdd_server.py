@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""gdd_server 工作进程异常退出后的恢复"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+import gdd_client
+from gdd_server import ScriptServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix 域套接字")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "gdd.sock")
+    monkeypatch.setenv("GDD_SERVER_SOCKET", path)
+    server = ScriptServer(path, 1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.pool.shutdown()
+
+
+def test_broken_pool_falls_back_and_recovers(server, tmp_path, capsys):
+    doc_path = str(tmp_path / "doc.docx")
+    doc = Document()
+    doc.add_paragraph("常驻服务")
+    doc.save(doc_path)
+    argv = [doc_path, "markdown", "--cache", "off"]
+
+    response = gdd_client.run_remote("read_docx", argv)
+    assert response["code"] == 0 and "常驻服务" in response["stdout"]
+
+    os.kill(server.pool.submit(os.getpid).result(), signal.SIGKILL)
+    # 当次请求交给客户端在本进程中执行，之后由重建的进程池处理
+    assert gdd_client.run_remote("read_docx", argv) is None
+    assert "工作进程异常退出" in capsys.readouterr().err
+    response = gdd_client.run_remote("read_docx", argv)
+    assert response["code"] == 0 and "常驻服务" in response["stdout"]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""generate_doc 批量生成的跳过与不覆盖规则"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+import generate_doc
+from generate_doc import generate_batch, read_stamp
+
+
+def _write_list(path, rows):
+    path.write_text("name,type\n" + "".join(f"{name},{func_type}\n" for name, func_type in rows), encoding="utf-8")
+
+
+def _batch(list_path, out, cache, monkeypatch, **kwargs):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(cache))
+    return generate_batch(str(list_path), str(out), workers=1, stream=io.StringIO(), **kwargs)
+
+
+def _last_paragraph(path):
+    return Document(path).paragraphs[-1].text
+
+
+def test_batch_skips_unchanged_and_never_overwrites(tmp_path, monkeypatch):
+    list_path = tmp_path / "features.csv"
+    out = tmp_path / "out"
+    _write_list(list_path, [("背包", "system"), ("商店", "building")])
+    stats = _batch(list_path, out, tmp_path / "cache1", monkeypatch)
+    assert stats["generated"] == 2 and not stats["failed"]
+    doc_path = str(out / generate_doc.default_output_name("背包"))
+    assert read_stamp(doc_path) == generate_doc._input_stamp("背包", "system")
+
+    # 手动填写后换一个缓存目录重新运行：生成记录在文档自身中，不会被覆盖
+    doc = Document(doc_path)
+    doc.add_paragraph("手写内容")
+    doc.save(doc_path)
+    stats = _batch(list_path, out, tmp_path / "cache2", monkeypatch)
+    assert (stats["generated"], stats["skipped"], stats["outdated"]) == (0, 2, [])
+    assert _last_paragraph(doc_path) == "手写内容"
+
+    # 输入变化时也只提示，不覆盖
+    _write_list(list_path, [("背包", "building"), ("商店", "building")])
+    stats = _batch(list_path, out, tmp_path / "cache2", monkeypatch)
+    assert (stats["generated"], stats["skipped"], stats["outdated"]) == (0, 1, [("背包", doc_path)])
+    assert _last_paragraph(doc_path) == "手写内容"
+
+    stats = _batch(list_path, out, tmp_path / "cache2", monkeypatch, force=True)
+    assert stats["generated"] == 2
+    assert _last_paragraph(doc_path) != "手写内容"
+    assert read_stamp(doc_path) == generate_doc._input_stamp("背包", "building")
+
+
+def test_existing_document_without_stamp_is_kept(tmp_path, monkeypatch):
+    list_path = tmp_path / "features.csv"
+    out = tmp_path / "out"
+    out.mkdir()
+    _write_list(list_path, [("背包", "system")])
+    doc_path = str(out / generate_doc.default_output_name("背包"))
+    doc = Document()
+    doc.add_paragraph("已有文档")
+    doc.save(doc_path)
+
+    stats = _batch(list_path, out, tmp_path / "cache", monkeypatch)
+    assert stats["generated"] == 0 and len(stats["outdated"]) == 1
+    assert _last_paragraph(doc_path) == "已有文档"
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""parse_cache 的命中、失效与淘汰"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parse_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(parse_cache, "_usage", {})
+    return tmp_path / "cache"
+
+
+class Counter:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return dict(self.result)
+
+
+def test_hit_and_invalidation_on_content_change(tmp_path):
+    path = tmp_path / "doc.bin"
+    path.write_bytes(b"v1")
+    compute = Counter({"file": str(path), "value": 1})
+
+    assert parse_cache.cached_call("kind", str(path), {"version": 1}, compute)["value"] == 1
+    assert parse_cache.cached_call("kind", str(path), {"version": 1}, compute)["value"] == 1
+    assert compute.calls == 1
+
+    # 参数不同、模式为 refresh/off 时都重新计算
+    parse_cache.cached_call("kind", str(path), {"version": 2}, compute)
+    parse_cache.cached_call("kind", str(path), {"version": 1}, compute, mode="refresh")
+    parse_cache.cached_call("kind", str(path), {"version": 1}, compute, mode="off")
+    assert compute.calls == 4
+
+    path.write_bytes(b"v2 changed")
+    parse_cache.cached_call("kind", str(path), {"version": 1}, compute)
+    assert compute.calls == 5
+
+
+def test_errors_are_not_cached(tmp_path):
+    path = tmp_path / "doc.bin"
+    path.write_bytes(b"data")
+    compute = Counter({"file": str(path), "error": "解析失败"})
+    parse_cache.cached_call("kind", str(path), {}, compute)
+    parse_cache.cached_call("kind", str(path), {}, compute)
+    assert compute.calls == 2
+
+
+def test_hit_reports_the_requested_path(tmp_path):
+    first, second = tmp_path / "a.bin", tmp_path / "b.bin"
+    first.write_bytes(b"same")
+    second.write_bytes(b"same")
+    parse_cache.cached_call("kind", str(first), {}, Counter({"file": str(first)}))
+    assert parse_cache.cached_call("kind", str(second), {}, Counter({"file": "x"}))["file"] == str(second)
+
+
+def _cache_size(root):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+
+def test_eviction_keeps_total_under_limit_without_scanning_every_store(cache_dir, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_MAX_MB", "0.25")
+    scans = []
+    evict = parse_cache.evict
+    monkeypatch.setattr(parse_cache, "evict", lambda *args: scans.append(1) or evict(*args))
+
+    for i in range(200):
+        parse_cache.store(f"{i:064x}", {"data": os.urandom(4096)})
+
+    assert _cache_size(cache_dir / "parse") <= 0.25 * 1024 * 1024
+    assert len(scans) < 50
+    assert parse_cache.load(f"{199:064x}") is not None
+    assert parse_cache.load(f"{0:064x}") is None
+
+
+def test_manifests_count_toward_limit_but_templates_do_not(cache_dir, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_MAX_MB", "0.05")
+    template = parse_cache.cached_bytes("templates", "t-v1.bin", lambda: os.urandom(100 * 1024))
+    for i in range(40):
+        parse_cache.store_manifest("kind", f"/docs/{i}.docx", {"blob": os.urandom(4096)})
+
+    assert _cache_size(cache_dir / "manifests") <= 0.05 * 1024 * 1024
+    assert parse_cache.load_manifest("kind", "/docs/0.docx") is None
+    assert parse_cache.cached_bytes("templates", "t-v1.bin", lambda: b"") == template
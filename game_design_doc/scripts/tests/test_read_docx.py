@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""read_docx 的 stream 引擎与 docx 引擎结果一致"""
+
+import os
+import struct
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from read_docx import read_docx
+from read_docx_enhanced import read_docx_enhanced
+
+
+def _png(width=2, height=2):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    raw = b"".join(b"\x00" + b"\xff\x00\x00" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+@pytest.fixture
+def doc_path(tmp_path):
+    image = tmp_path / "dot.png"
+    image.write_bytes(_png())
+    doc = Document()
+    doc.add_heading("功能设计", level=0)
+    doc.add_heading("一、规则说明", level=1)
+    doc.add_paragraph("每日可领取一次奖励")
+    doc.add_paragraph("")
+    doc.add_paragraph("列表项", style="List Bullet")
+    doc.add_picture(str(image))
+    doc.add_paragraph("图片说明")
+    table = doc.add_table(rows=4, cols=3)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"{r}-{c}"
+    table.cell(0, 0).merge(table.cell(0, 1))   # 横向合并
+    table.cell(1, 2).merge(table.cell(3, 2))   # 纵向合并
+    doc.add_heading("二、配置表", level=2)
+    for i in range(5):
+        doc.add_paragraph(f"段落{i}")
+    doc.add_table(rows=2, cols=2).cell(1, 1).text = "第二个表"
+    path = str(tmp_path / "doc.docx")
+    doc.save(path)
+    return path
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"max_paragraphs": 4, "max_tables": 1},
+    {"table_index": 2},
+    {"table_offset": 1, "table_limit": 2},
+    {"image_metadata_only": True},
+])
+def test_stream_engine_matches_docx_engine(doc_path, options):
+    docx_result = read_docx(doc_path, engine="docx", **options)
+    assert "error" not in docx_result
+    assert read_docx(doc_path, engine="stream", **options) == docx_result
+
+
+def test_stream_engine_reads_images_and_merged_cells(doc_path):
+    data = read_docx(doc_path, engine="stream")
+    assert data["total_images"] == 1
+    assert [item["text"] for item in data["content"] if item.get("has_images")] == ["[图片段落，包含1张图片]"]
+    first_table = next(item for item in data["content"] if item["type"] == "table")
+    assert first_table["rows"] == 4
+    assert first_table["data"][0][:2] == ["0-0\n0-1", "0-0\n0-1"]
+    assert [row[2] for row in first_table["data"][1:]] == ["1-2\n2-2\n3-2"] * 3
+
+
+@pytest.mark.parametrize("options", [{}, {"context_before": 3, "context_after": 1}, {"section": "1"}])
+def test_enhanced_stream_engine_matches_docx_engine(doc_path, options, monkeypatch, tmp_path):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    docx_result = read_docx_enhanced(doc_path, engine="docx", **options)
+    assert "error" not in docx_result
+    assert read_docx_enhanced(doc_path, engine="stream", **options) == docx_result
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""read_docx 批量模式的输出"""
+
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from read_docx import read_docx, read_docx_batch
+
+
+def _write_doc(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(path)
+
+
+def test_batch_matches_single_reads_in_path_order(tmp_path):
+    for name in ("b.docx", "a.docx", "sub/c.docx"):
+        _write_doc(tmp_path / "docs" / name, f"内容 {name}")
+    (tmp_path / "docs" / "~$a.docx").write_bytes(b"")      # Word 临时文件
+    (tmp_path / "docs" / "broken.docx").write_bytes(b"not a zip")
+
+    for workers in (1, 2):
+        out = io.StringIO()
+        stats = read_docx_batch(str(tmp_path / "docs"), "json", workers=workers, stream=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert (stats["files"], stats["failed"]) == (4, 1)
+        assert [os.path.relpath(r["file"], tmp_path / "docs") for r in records] == \
+            ["a.docx", "b.docx", "broken.docx", os.path.join("sub", "c.docx")]
+        assert "error" in records[2]
+        assert records[0] == json.loads(json.dumps(read_docx(records[0]["file"]), ensure_ascii=False))
+
+
+def test_batch_markdown_records(tmp_path):
+    _write_doc(tmp_path / "docs" / "a.docx", "段落内容")
+    out = io.StringIO()
+    read_docx_batch(str(tmp_path / "docs" / "*.docx"), "markdown", workers=1, stream=out)
+    record = json.loads(out.getvalue())
+    assert set(record) == {"file", "markdown"} and "段落内容" in record["markdown"]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""read_docx 增量解析与 --diff"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+import read_docx
+from read_docx import BlockManifest, diff_docx, main
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _write_doc(path, paragraphs, tables=0, edited_table=None):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    for i in range(tables):
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = f"表{i}"
+        table.cell(0, 1).text = "已修改" if i == edited_table else "值"
+    doc.save(path)
+
+
+@pytest.mark.parametrize("engine", read_docx.ENGINES)
+def test_diff_reports_edits_past_read_caps(tmp_path, engine):
+    path = str(tmp_path / "doc.docx")
+    paragraphs = [f"段落{i}" for i in range(350)]
+    _write_doc(path, paragraphs, tables=60)
+    baseline = diff_docx(path, engine=engine)
+    assert not baseline["baseline"] and baseline["complete"]
+
+    # 修改第300个段落和第50个表格之后的内容
+    paragraphs[320] = "修改后的段落"
+    _write_doc(path, paragraphs, tables=60, edited_table=55)
+
+    data = diff_docx(path, engine=engine)
+    assert data["baseline"] and data["baseline_complete"] and data["complete"]
+    assert [(c["index"], c["after"]["text"]) for c in data["changed"] if c["after"]["type"] == "paragraph"] == \
+        [(320, "修改后的段落")]
+    assert [c["after"]["data"][0] for c in data["changed"] if c["after"]["type"] == "table"] == [["表55", "已修改"]]
+    assert not data["added"] and not data["removed"]
+
+
+def test_diff_with_caps_is_marked_incomplete(tmp_path, capsys):
+    path = str(tmp_path / "doc.docx")
+    _write_doc(path, [f"段落{i}" for i in range(20)])
+    data = diff_docx(path, max_paragraphs=10)
+    assert not data["complete"]
+
+    main([path, "markdown", "--diff", "--max-paragraphs", "10"])
+    assert "不会列出" in capsys.readouterr().out
+
+
+def test_unchanged_document_is_replayed_without_parsing(tmp_path, monkeypatch):
+    path = str(tmp_path / "doc.docx")
+    _write_doc(path, [f"段落{i}" for i in range(30)], tables=3)
+    first = read_docx.read_docx(path, incremental=True)
+
+    manifest = BlockManifest(path, "docx")
+    assert manifest.unchanged
+
+    def fail(*args, **kwargs):
+        raise AssertionError("文档未变化时不应解析XML")
+    monkeypatch.setattr(read_docx, "iter_docx_blocks", fail)
+    monkeypatch.setattr(read_docx, "Document", fail)
+    assert read_docx.read_docx(path, incremental=True) == first
+    assert diff_docx(path)["unchanged"] == 33
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""read_docx_enhanced 返回给调用方的内容项"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+import content_model
+from read_docx_enhanced import format_output, iter_docx_enhanced, read_docx_enhanced
+
+
+@pytest.fixture
+def doc_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    doc = Document()
+    doc.add_heading("规则说明", level=2)
+    doc.add_paragraph("每日可领取一次奖励")
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "ID"
+    table.cell(1, 0).text = "1001"
+    path = str(tmp_path / "doc.docx")
+    doc.save(path)
+    return path
+
+
+@pytest.mark.parametrize("cache", ["off", "use"])
+def test_public_result_is_plain_json_serializable(doc_path, cache):
+    for _ in range(2):  # 第二次 cache=use 时来自解析缓存
+        data = read_docx_enhanced(doc_path, cache=cache)
+        assert [type(item) for item in data["content"]] == [dict, dict, dict]
+        assert json.loads(json.dumps(data, ensure_ascii=False)) == json.loads(format_output(data, "json"))
+    assert data["content"][0] == {"type": "heading", "level": "Heading 2", "text": "规则说明",
+                                  "has_images": False, "image_ids": [], "index": 0}
+
+
+def test_lazy_and_generator_yield_dicts(doc_path):
+    data = read_docx_enhanced(doc_path, lazy=True)
+    assert all(type(item) is dict for item in data["content"])
+    assert all(type(item) is dict for item in iter_docx_enhanced(doc_path))
+
+
+def test_content_item_is_abstract():
+    with pytest.raises(TypeError):
+        content_model.ContentItem()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""read_xlsx 的 stream 引擎与 openpyxl 引擎结果一致"""
+
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from read_xlsx import read_excel
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "item_config"
+    ws.append(["ID", "名称", "价格", "折扣", "上架", "开始时间", "说明"])
+    for i in range(30):
+        ws.append([1000 + i, f"道具{i}", i * 10, 0.5 + i / 100, i % 2 == 0,
+                   datetime.datetime(2024, 1, 1 + i % 28, 8, 30), None if i % 3 else f"备注{i}"])
+    ws["H5"] = "=C5*2"
+    ws["J40"] = "稀疏单元格"
+
+    skill = wb.create_sheet("skill")
+    skill.append(["技能ID", "冷却"])
+    skill.append([1, 2.5])
+    skill.append(["", None])
+    skill.append([3, "文本"])
+
+    wb.create_sheet("empty")
+    path = str(tmp_path / "cfg.xlsx")
+    wb.save(path)
+    return path
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"max_rows": 5, "max_cols": 3},
+    {"sheets": ["skill"]},
+    {"sheets": ["item_*", "empty"]},
+])
+def test_stream_engine_matches_openpyxl_engine(workbook_path, options):
+    expected = read_excel(workbook_path, engine="openpyxl", **options)
+    assert "error" not in expected
+    assert read_excel(workbook_path, engine="stream", **options) == expected
+
+
+def test_parallel_sheets_keep_workbook_order(workbook_path):
+    expected = read_excel(workbook_path, engine="stream")
+    assert read_excel(workbook_path, engine="stream", workers=2) == expected
+    assert [sheet["name"] for sheet in expected["sheets"]] == ["item_config", "skill", "empty"]
+
+
+def test_unknown_sheet_is_reported(workbook_path):
+    data = read_excel(workbook_path, engine="stream", sheets=["missing"])
+    assert "missing" in data["error"]
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""search_index 的增量更新与查询前检查"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+import search_index
+
+
+def _write_doc(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = Document()
+    doc.add_heading("技能系统", level=1)
+    doc.add_paragraph(text)
+    doc.save(path)
+
+
+def _counts(stats):
+    return {os.path.basename(s["root"]): (s["files"], s["indexed"], s["unchanged"], s["removed"]) for s in stats}
+
+
+def _files(conn, query):
+    return sorted(os.path.basename(r["file"]) for r in search_index.search(conn, query))
+
+
+def test_refresh_follows_edits_and_deletions(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    _write_doc(tmp_path / "docs" / "a.docx", "技能冷却时间为十秒")
+    conn = search_index.connect(str(tmp_path / "index.sqlite"))
+    search_index.update_root(conn, str(tmp_path / "docs"))
+    assert _files(conn, "冷却") == ["a.docx"]
+
+    assert _counts(search_index.refresh(conn)) == {"docs": (1, 0, 1, 0)}
+
+    _write_doc(tmp_path / "docs" / "a.docx", "技能消耗体力")
+    _write_doc(tmp_path / "docs" / "b.docx", "技能冷却时间为五秒")
+    assert _counts(search_index.refresh(conn)) == {"docs": (2, 2, 0, 0)}
+    assert _files(conn, "冷却") == ["b.docx"]
+    assert _files(conn, "体力") == ["a.docx"]
+
+    os.remove(tmp_path / "docs" / "b.docx")
+    assert _counts(search_index.refresh(conn)) == {"docs": (1, 0, 1, 1)}
+    assert _files(conn, "冷却") == []
+
+
+def test_nested_roots_do_not_reindex_shared_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("GDD_CACHE_DIR", str(tmp_path / "cache"))
+    _write_doc(tmp_path / "x" / "top.docx", "顶层文档")
+    _write_doc(tmp_path / "x" / "sub" / "a.docx", "子目录文档")
+    conn = search_index.connect(str(tmp_path / "index.sqlite"))
+
+    assert search_index.update_root(conn, str(tmp_path / "x"))["indexed"] == 2
+    # 内层目录接管已索引的文件，内容未变时不重新解析
+    stats = search_index.update_root(conn, str(tmp_path / "x" / "sub"))
+    assert (stats["files"], stats["indexed"], stats["unchanged"]) == (1, 0, 1)
+
+    for _ in range(3):
+        assert _counts(search_index.refresh(conn)) == {"x": (1, 0, 1, 0), "sub": (1, 0, 1, 0)}
+    assert _files(conn, "子目录") == ["a.docx"]
+
+    os.remove(tmp_path / "x" / "sub" / "a.docx")
+    assert _counts(search_index.refresh(conn)) == {"x": (1, 0, 1, 0), "sub": (0, 0, 0, 1)}
+    assert _files(conn, "子目录") == []